@@ -8,7 +8,8 @@ from app.api.errors import not_found
 from app.api.schemas import Episode, PaginatedTitles, Title
 from app.db.models import Episode as EpisodeModel
 from app.db.models import SubtitleLine
-from app.services.cache_service import warmup_episode_chunks_cache
+from app.rag.retrieval import warm_episode_index
+from app.services.cache_service import warmup_episode_chunks_cache, warmup_episodes_cache
 from app.services.catalog_service import get_title, list_episodes, list_titles
 
 router = APIRouter(tags=["Catalog"])
@@ -121,9 +122,39 @@ def warmup_episode_cache(
     if episode is None:
         raise not_found("Episode not found.")
     cached_chunks = warmup_episode_chunks_cache(db, episodeId)
+    indexed_chunks = len(warm_episode_index(db, episodeId))
     logger.info(
-        "episode_cache_warmup episode_id=%s cached_chunks=%s",
+        "episode_cache_warmup episode_id=%s cached_chunks=%s indexed_chunks=%s",
         episodeId,
         cached_chunks,
+        indexed_chunks,
     )
-    return {"episode_id": episodeId, "cached_chunks": cached_chunks}
+    return {"episode_id": episodeId, "cached_chunks": cached_chunks, "indexed_chunks": indexed_chunks}
+
+
+@router.post("/titles/{titleId}/cache/warmup")
+def warmup_title_cache(
+    titleId: str,
+    season: int | None = Query(default=None, ge=1),
+    db: Session = Depends(get_db),
+):
+    title = get_title(db, titleId)
+    if title is None:
+        raise not_found()
+    episode_ids = [episode.id for episode in list_episodes(db, title_id=titleId, season=season)]
+    # One pipelined write for every episode instead of a round trip each.
+    cached = warmup_episodes_cache(db, episode_ids)
+    indexed = {episode_id: len(warm_episode_index(db, episode_id)) for episode_id in episode_ids}
+    logger.info(
+        "title_cache_warmup title_id=%s episodes=%s cached_chunks=%s",
+        titleId,
+        len(episode_ids),
+        sum(cached.values()),
+    )
+    return {
+        "title_id": titleId,
+        "episodes": [
+            {"episode_id": episode_id, "cached_chunks": cached[episode_id], "indexed_chunks": indexed[episode_id]}
+            for episode_id in episode_ids
+        ],
+    }
@@ -16,6 +16,7 @@ from app.api.schemas import (
     AuthUser,
 )
 from app.db.models import ChatMessage, ChatSession, Episode, Title, User
+from app.services.warmup_service import note_viewer_position
 
 router = APIRouter(prefix='/chat', tags=['ChatSession'])
 
@@ -75,6 +76,7 @@ def create_chat_session(
     db.add(session)
     db.commit()
     db.refresh(session)
+    note_viewer_position(db.get_bind(), session.episode_id, session.current_time_ms)
     return _serialize_session(session)
 
 
@@ -158,5 +160,6 @@ def create_chat_message(
     db.add(message)
     db.commit()
     db.refresh(message)
+    note_viewer_position(db.get_bind(), session.episode_id, payload.current_time_ms)
     return _serialize_message(message)
 
@@ -21,6 +21,7 @@ from app.api.schemas import (
 from app.db.session import SessionLocal
 from app.services.qa_service import ask_question, clear_chat_history, list_chat_history
 from app.services.recap_service import build_recap
+from app.services.warmup_service import note_viewer_position
 
 router = APIRouter(tags=['Companion'])
 
@@ -31,7 +32,9 @@ def _sse(event: str, payload: dict) -> str:
 
 @router.post('/recap', response_model=RecapResponse)
 def create_recap(payload: RecapRequest, db: Session = Depends(get_db)):
-    return build_recap(db, payload)
+    response = build_recap(db, payload)
+    note_viewer_position(db.get_bind(), payload.episode_id, payload.current_time_ms)
+    return response
 
 
 @router.post('/qa', response_model=QAResponse)
@@ -40,7 +43,9 @@ def create_qa(
     db: Session = Depends(get_db),
     user: AuthUser | None = Depends(get_optional_user),
 ):
-    return ask_question(db, payload, user_id=user.id if user else None)
+    response = ask_question(db, payload, user_id=user.id if user else None)
+    note_viewer_position(db.get_bind(), payload.episode_id, payload.current_time_ms)
+    return response
 
 
 @router.post('/qa/stream')
@@ -69,6 +74,7 @@ def create_qa_stream(
                 status_callback=push_status,
             )
             event_queue.put(_sse('done', {'response': response.model_dump(mode='json')}))
+            note_viewer_position(db.get_bind(), payload.episode_id, payload.current_time_ms)
         except Exception as exc:
             event_queue.put(_sse('error', {'message': str(exc)}))
         finally:
@@ -3,6 +3,9 @@
 from fastapi import APIRouter
 
 from app.core.config import get_settings
+from app.rag.query_embeddings import query_embedding_cache_stats
+from app.rag.result_cache import retrieval_cache_stats
+from app.services.cache_service import get_cache_backend
 
 router = APIRouter(prefix='', tags=['Health'])
 
@@ -15,3 +18,14 @@ def health_check() -> dict[str, object]:
         'version': settings.api_version,
         'time': datetime.now(timezone.utc).isoformat(),
     }
+
+
+@router.get('/health/caches')
+def cache_stats() -> dict[str, object]:
+    """Size and hit ratio of the in-process retrieval caches, and the episode cache backend in use."""
+    backend = get_cache_backend()
+    return {
+        'episode_cache_backend': backend.name if backend is not None else 'none',
+        'query_embeddings': query_embedding_cache_stats(),
+        'retrieval_results': retrieval_cache_stats(),
+    }
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, BackgroundTasks, Depends, status
 from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
 
@@ -25,12 +25,12 @@ from app.api.schemas import (
 )
 from app.db.models import Episode as EpisodeModel
 from app.db.models import SubtitleLine, Title as TitleModel
-from app.services.cache_service import invalidate_episode_chunks_cache, warmup_episode_chunks_cache
 from app.services.chunk_service import rebuild_chunks_for_episodes
 from app.services.media_upload_service import (
     build_cloudinary_image_upload_signature,
     build_cloudinary_video_upload_signature,
 )
+from app.services.warmup_service import refresh_episode_caches
 
 router = APIRouter(prefix='/ingest', tags=['Ingestion'])
 
@@ -249,6 +249,7 @@ def issue_image_upload_signature(
 @router.post('/subtitle-lines:bulk', response_model=IngestSubtitleLinesResponse, status_code=status.HTTP_202_ACCEPTED)
 def ingest_subtitle_lines_bulk(
     payload: SubtitleLineBulkRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     _: AuthUser = Depends(get_admin_user),
 ) -> IngestSubtitleLinesResponse:
@@ -281,10 +282,9 @@ def ingest_subtitle_lines_bulk(
         inserted += 1
 
     rebuild_chunks_for_episodes(db, episode_ids)
-    for episode_id in episode_ids:
-        invalidate_episode_chunks_cache(episode_id)
-        warmup_episode_chunks_cache(db, episode_id)
     db.commit()
+    # Caches move to the new content version after the response; readers keep the previous one until then.
+    background_tasks.add_task(refresh_episode_caches, db.get_bind(), episode_ids)
     return IngestSubtitleLinesResponse(
         inserted_count=inserted,
         queued_embedding_jobs=inserted,
@@ -294,6 +294,7 @@ def ingest_subtitle_lines_bulk(
 @router.delete('/episodes/{episode_id}/subtitle-lines', response_model=IngestSubtitleLinesResponse)
 def delete_subtitle_lines_by_episode(
     episode_id: str,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     _: AuthUser = Depends(get_admin_user),
 ) -> IngestSubtitleLinesResponse:
@@ -303,9 +304,8 @@ def delete_subtitle_lines_by_episode(
 
     result = db.execute(delete(SubtitleLine).where(SubtitleLine.episode_id == episode_id))
     rebuild_chunks_for_episodes(db, [episode_id])
-    invalidate_episode_chunks_cache(episode_id)
-    warmup_episode_chunks_cache(db, episode_id)
     db.commit()
+    background_tasks.add_task(refresh_episode_caches, db.get_bind(), [episode_id])
     deleted = int(result.rowcount or 0)
     return IngestSubtitleLinesResponse(
         inserted_count=deleted,
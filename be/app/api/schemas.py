@@ -72,6 +72,11 @@ class ResponseStyle(str, Enum):
     CRITIC = 'CRITIC'
 
 
+class RetrievalScope(str, Enum):
+    EPISODE = 'EPISODE'
+    TITLE = 'TITLE'
+
+
 class RelationType(str, Enum):
     FAMILY = 'FAMILY'
     ROMANCE = 'ROMANCE'
@@ -134,6 +139,7 @@ class QARequest(BaseModel):
     focus: QARequestFocus | None = None
     language: str | None = 'ko'
     response_style: ResponseStyle | None = ResponseStyle.FRIEND
+    retrieval_scope: RetrievalScope | None = RetrievalScope.EPISODE
 
     @field_validator('current_time_ms')
     @classmethod
@@ -22,15 +22,83 @@ class Settings(BaseSettings):
     cloudinary_api_secret: str | None = Field(default=None)
     cloudinary_folder: str = Field(default='netplus')
 
+    # 'lines': CHUNK_SIZE_LINES lines per chunk. 'time': CHUNK_WINDOW_MS windows every
+    # CHUNK_STRIDE_MS (overlapping when stride < window), split at silences over CHUNK_SCENE_GAP_MS.
+    chunk_strategy: str = Field(default='lines')
     chunk_size_lines: int = Field(default=6)
+    chunk_window_ms: int = Field(default=30000)
+    chunk_stride_ms: int = Field(default=15000)
+    chunk_scene_gap_ms: int = Field(default=10000)
     retrieval_top_k: int = Field(default=8)
+    # 0 searches every chunk before current_time_ms; N>0 keeps only the N most recent.
+    retrieval_window_chunks: int = Field(default=0)
+    # In-process vector search: 'exact' (linear scan of the prefix), 'ivf' (k-means lists;
+    # IVF_LISTS=0 picks sqrt(chunks)) or 'scenes' (one list per scene of at most
+    # RETRIEVAL_SCENE_MAX_CHUNKS chunks). Indexes under IVF_MIN_CHUNKS chunks always use the exact scan.
+    retrieval_vector_backend: str = Field(default='ivf')
+    ivf_lists: int = Field(default=0)
+    ivf_probes: int = Field(default=8)
+    ivf_min_chunks: int = Field(default=2048)
+    retrieval_scene_max_chunks: int = Field(default=64)
+    retrieval_scene_probes: int = Field(default=16)
+    episode_index_cache_size: int = Field(default=64)
+    episode_index_ttl_seconds: int = Field(default=300)
+    # Memory-mapped per-episode index files written on ingest; '' disables them.
+    episode_index_dir: str = Field(default='var/episode_index')
+    # Answers are reused per (episode, time bucket, normalized question); 0 size disables.
+    retrieval_cache_size: int = Field(default=2048)
+    retrieval_cache_ttl_seconds: int = Field(default=120)
+    retrieval_cache_bucket_ms: int = Field(default=30000)
+    # Query text -> embedding memo; the Redis tier is shared across workers (0 TTL disables it).
+    # At startup the recap seeds and the most frequent QUERY_EMBEDDING_PRELOAD_QUESTIONS are embedded.
+    query_embedding_cache_size: int = Field(default=4096)
+    query_embedding_redis_ttl_seconds: int = Field(default=86400)
+    query_embedding_preload_questions: int = Field(default=200)
+    # Warm the title's next episode once a viewer is within PREDICTIVE_WARMUP_LEAD_MS of the end.
+    predictive_warmup_enabled: bool = Field(default=True)
+    predictive_warmup_lead_ms: int = Field(default=300000)
+    predictive_warmup_cooldown_seconds: int = Field(default=600)
 
     auth_jwt_secret: str = Field(default='change-me-in-env')
     auth_jwt_exp_minutes: int = Field(default=60 * 24 * 7)
     redis_url: str | None = Field(default=None)
     redis_cache_ttl_seconds: int = Field(default=1800)
+    # Connection pool shared by the sync and asyncio clients (0 = no limit / no timeout).
+    redis_max_connections: int = Field(default=64)
+    redis_socket_timeout_seconds: float = Field(default=5.0)
+    redis_connect_timeout_seconds: float = Field(default=2.0)
+    redis_health_check_interval_seconds: int = Field(default=30)
+    # Episode payload store: 'redis' (needs REDIS_URL), 'memory' (this process only,
+    # bounded by EPISODE_CACHE_MEMORY_BYTES), 'disk' (SQLite file shared by the host) or 'none'.
+    episode_cache_backend: str = Field(default='redis')
+    episode_cache_memory_bytes: int = Field(default=256 * 1024 * 1024)
+    episode_cache_disk_path: str = Field(default='var/episode_cache.sqlite3')
+    # 'json' or 'binary' (versioned columnar format); readers accept both.
+    episode_cache_format: str = Field(default='json')
+    # Payloads are stored in start_ms slices of this length so readers fetch only the
+    # spoiler-safe prefix; 0 keeps one slice per episode.
+    episode_cache_slice_ms: int = Field(default=300000)
+    # On a miss one process per episode refills the cache under a SET NX lease;
+    # the others wait up to EPISODE_CACHE_FILL_WAIT_MS before querying the database.
+    episode_cache_fill_lease_ms: int = Field(default=10000)
+    episode_cache_fill_wait_ms: int = Field(default=2000)
+    # Process-local tier in front of the Redis episode cache (0 size disables), kept
+    # coherent across workers through pub/sub on CACHE_INVALIDATION_CHANNEL.
+    episode_cache_local_size: int = Field(default=256)
+    episode_cache_local_ttl_seconds: int = Field(default=60)
+    cache_invalidation_channel: str = Field(default='netplus:cache:invalidate')
     chat_history_window: int = Field(default=8)
     use_pgvector: bool = Field(default=False)
+    pgvector_index_type: str = Field(default='hnsw')
+    pgvector_hnsw_m: int = Field(default=16)
+    pgvector_hnsw_ef_construction: int = Field(default=64)
+    pgvector_ivfflat_lists: int = Field(default=100)
+    pgvector_ef_search: int = Field(default=100)
+    pgvector_probes: int = Field(default=10)
+    pgvector_iterative_scan: str = Field(default='relaxed_order')
+    pgvector_candidate_multiplier: int = Field(default=4)
+    embedding_provider: str = Field(default='hashing')
+    embedding_dim: int = Field(default=384)
 
     @property
     def is_development(self) -> bool:
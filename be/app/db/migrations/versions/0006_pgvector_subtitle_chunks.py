@@ -10,6 +10,8 @@ import os
 
 from alembic import op
 
+from app.core.config import get_settings
+
 
 revision: str = "0006_pgvector_subtitle_chunks"
 down_revision: str | None = "0005_title_thumbnail_url"
@@ -29,13 +31,15 @@ def upgrade() -> None:
     except Exception:
         # Managed PostgreSQL without pgvector installed: skip migration gracefully.
         return
+    dim = int(get_settings().embedding_dim)
     op.execute(
-        """
+        f"""
         ALTER TABLE subtitle_chunks
-        ALTER COLUMN embedding TYPE vector(4)
+        ALTER COLUMN embedding TYPE vector({dim})
         USING CASE
             WHEN embedding IS NULL OR btrim(embedding) = '' THEN NULL
-            ELSE embedding::vector(4)
+            WHEN vector_dims(embedding::vector) <> {dim} THEN NULL
+            ELSE embedding::vector({dim})
         END
         """
     )
@@ -0,0 +1,66 @@
+"""resize pgvector embedding column to EMBEDDING_DIM
+
+Revision ID: 0007_embedding_dimension
+Revises: 0006_pgvector_subtitle_chunks
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+from collections.abc import Sequence
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import get_settings
+
+
+revision: str = "0007_embedding_dimension"
+down_revision: str | None = "0006_pgvector_subtitle_chunks"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def _current_vector_dim(bind) -> int | None:
+    row = bind.execute(
+        sa.text(
+            """
+            SELECT format_type(atttypid, atttypmod) AS column_type, atttypmod
+            FROM pg_attribute
+            WHERE attrelid = 'subtitle_chunks'::regclass AND attname = 'embedding'
+            """
+        )
+    ).first()
+    if row is None or not str(row.column_type).startswith("vector"):
+        return None
+    return int(row.atttypmod)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    if os.getenv("USE_PGVECTOR", "false").strip().lower() not in {"1", "true", "yes", "on"}:
+        return
+
+    current = _current_vector_dim(bind)
+    dim = int(get_settings().embedding_dim)
+    if current is None or current == dim:
+        return
+
+    # Vectors of another dimension cannot be cast; they are cleared and must be
+    # recomputed with `python scripts/build_chunks.py`.
+    op.execute("DROP INDEX IF EXISTS ix_subtitle_chunks_embedding_cosine")
+    op.execute(f"ALTER TABLE subtitle_chunks ALTER COLUMN embedding TYPE vector({dim}) USING NULL")
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS ix_subtitle_chunks_embedding_cosine
+        ON subtitle_chunks
+        USING ivfflat (embedding vector_cosine_ops)
+        WITH (lists = 100)
+        """
+    )
+
+
+def downgrade() -> None:
+    # Dimension changes are one-way; re-run build_chunks.py after changing EMBEDDING_DIM.
+    return
@@ -0,0 +1,35 @@
+"""content-addressed chunk embedding store
+
+Revision ID: 0008_chunk_embedding_store
+Revises: 0007_embedding_dimension
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0008_chunk_embedding_store'
+down_revision: str | None = '0007_embedding_dimension'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'chunk_embeddings',
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('model', sa.Text(), nullable=False),
+        sa.Column('dim', sa.Integer(), nullable=False),
+        sa.Column('embedding', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('content_hash'),
+    )
+    op.add_column('subtitle_chunks', sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('subtitle_chunks', 'content_hash')
+    op.drop_table('chunk_embeddings')
@@ -0,0 +1,46 @@
+"""rebuild chunk embedding ANN index from PGVECTOR_* settings
+
+Revision ID: 0009_pgvector_index_settings
+Revises: 0008_chunk_embedding_store
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+from collections.abc import Sequence
+import os
+
+from alembic import op
+
+from app.db.vector_index import VECTOR_INDEX_NAME, rebuild_vector_index
+
+
+revision: str = "0009_pgvector_index_settings"
+down_revision: str | None = "0008_chunk_embedding_store"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def _enabled() -> bool:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return False
+    return os.getenv("USE_PGVECTOR", "false").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def upgrade() -> None:
+    if not _enabled():
+        return
+    rebuild_vector_index(op.get_bind())
+
+
+def downgrade() -> None:
+    if not _enabled():
+        return
+    op.execute(f"DROP INDEX IF EXISTS {VECTOR_INDEX_NAME}")
+    op.execute(
+        f"""
+        CREATE INDEX IF NOT EXISTS {VECTOR_INDEX_NAME}
+        ON subtitle_chunks
+        USING ivfflat (embedding vector_cosine_ops)
+        WITH (lists = 100)
+        """
+    )
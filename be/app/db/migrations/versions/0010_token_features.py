@@ -0,0 +1,28 @@
+"""precomputed token features on subtitle lines and chunks
+
+Revision ID: 0010_token_features
+Revises: 0009_pgvector_index_settings
+Create Date: 2026-10-17 00:00:00.000000
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0010_token_features'
+down_revision: str | None = '0009_pgvector_index_settings'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # Rows stay NULL until their episode's chunks are rebuilt; readers fall back to tokenizing.
+    op.add_column('subtitle_lines', sa.Column('tokens', sa.JSON(), nullable=True))
+    op.add_column('subtitle_chunks', sa.Column('tokens', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('subtitle_chunks', 'tokens')
+    op.drop_column('subtitle_lines', 'tokens')
@@ -77,6 +77,8 @@ class SubtitleLine(Base):
     speaker_text: Mapped[str | None] = mapped_column(Text)
     speaker_character_id: Mapped[str | None] = mapped_column(String(36), ForeignKey('characters.id', ondelete='SET NULL'))
     text: Mapped[str] = mapped_column(Text, nullable=False)
+    # Normalized token set, written when the episode's chunks are rebuilt.
+    tokens: Mapped[list[str] | None] = mapped_column(JSON)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, nullable=False)
 
     episode: Mapped['Episode'] = relationship(back_populates='subtitle_lines')
@@ -92,6 +94,18 @@ class SubtitleChunk(Base):
     text_concat: Mapped[str] = mapped_column(Text, nullable=False)
     subtitle_line_ids: Mapped[list[str]] = mapped_column(JSON, nullable=False, default=list)
     embedding: Mapped[list[float] | None] = mapped_column(VectorType)
+    content_hash: Mapped[str | None] = mapped_column(String(64))
+    tokens: Mapped[list[str] | None] = mapped_column(JSON)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, nullable=False)
+
+
+class ChunkEmbedding(Base):
+    __tablename__ = 'chunk_embeddings'
+
+    content_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    model: Mapped[str] = mapped_column(Text, nullable=False)
+    dim: Mapped[int] = mapped_column(Integer, nullable=False)
+    embedding: Mapped[list[float]] = mapped_column(JSON, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow, nullable=False)
 
 
@@ -3,27 +3,38 @@ import os
 from typing import Any
 
 from pgvector.sqlalchemy import Vector
-from sqlalchemy import Text
+from sqlalchemy import Float, Text
 from sqlalchemy.types import TypeDecorator
 
+from app.core.config import get_settings
+
 
 def _use_pgvector() -> bool:
     return os.getenv("USE_PGVECTOR", "false").strip().lower() in {"1", "true", "yes", "on"}
 
 
+def embedding_dim() -> int:
+    return get_settings().embedding_dim
+
+
 class VectorType(TypeDecorator[list[float] | None]):
     """Optional vector type.
 
-    USE_PGVECTOR=true + PostgreSQL => native vector(4)
+    USE_PGVECTOR=true + PostgreSQL => native vector(EMBEDDING_DIM)
     Otherwise => JSON text fallback.
     """
 
     impl = Text
     cache_ok = True
 
+    class comparator_factory(TypeDecorator.Comparator):  # type: ignore[name-defined]
+        # The Text impl has no vector operators, so expose pgvector's here.
+        def cosine_distance(self, other):
+            return self.op("<=>", return_type=Float)(other)
+
     def load_dialect_impl(self, dialect):  # type: ignore[override]
         if dialect.name == "postgresql" and _use_pgvector():
-            return dialect.type_descriptor(Vector(4))
+            return dialect.type_descriptor(Vector(embedding_dim()))
         return dialect.type_descriptor(Text())
 
     def process_bind_param(self, value: Any, dialect: Any):
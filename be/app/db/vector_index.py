@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.core.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+VECTOR_INDEX_NAME = 'ix_subtitle_chunks_embedding_cosine'
+ITERATIVE_SCAN_MODES = {'off', 'relaxed_order', 'strict_order'}
+
+
+def vector_index_ddl(settings: Settings | None = None) -> str:
+    """CREATE INDEX statement for the chunk embedding ANN index.
+
+    HNSW (default) keeps recall stable when most rows are filtered out by
+    episode/time; IVFFlat builds faster but needs ``lists`` tuned to table size.
+    """
+
+    settings = settings or get_settings()
+    index_type = settings.pgvector_index_type.strip().lower()
+    if index_type == 'hnsw':
+        options = f'm = {int(settings.pgvector_hnsw_m)}, ef_construction = {int(settings.pgvector_hnsw_ef_construction)}'
+    elif index_type == 'ivfflat':
+        options = f'lists = {int(settings.pgvector_ivfflat_lists)}'
+    else:
+        raise ValueError(f'Unsupported PGVECTOR_INDEX_TYPE: {settings.pgvector_index_type}')
+    return (
+        f'CREATE INDEX IF NOT EXISTS {VECTOR_INDEX_NAME} '
+        f'ON subtitle_chunks USING {index_type} (embedding vector_cosine_ops) WITH ({options})'
+    )
+
+
+def rebuild_vector_index(bind: Connection, settings: Settings | None = None) -> None:
+    """Drop and recreate the ANN index with the configured type and parameters."""
+
+    bind.execute(text(f'DROP INDEX IF EXISTS {VECTOR_INDEX_NAME}'))
+    bind.execute(text(vector_index_ddl(settings)))
+    logger.info('pgvector_index_rebuilt ddl=%s', vector_index_ddl(settings))
+
+
+def apply_vector_search_settings(db: Session, *, candidate_limit: int) -> None:
+    """Set per-transaction ANN search knobs before a filtered vector query.
+
+    ``ef_search`` must be at least the LIMIT or HNSW returns fewer rows. The
+    iterative scan (pgvector >= 0.8) keeps walking the index until enough rows
+    pass the episode/time filter; older servers reject it, so every setting is
+    applied inside its own savepoint and skipped on error.
+    """
+
+    settings = get_settings()
+    knobs = {
+        'hnsw.ef_search': str(max(int(settings.pgvector_ef_search), candidate_limit)),
+        'ivfflat.probes': str(max(1, int(settings.pgvector_probes))),
+    }
+    iterative_scan = settings.pgvector_iterative_scan.strip().lower()
+    if iterative_scan in ITERATIVE_SCAN_MODES:
+        knobs['hnsw.iterative_scan'] = iterative_scan
+        knobs['ivfflat.iterative_scan'] = 'off' if iterative_scan == 'off' else 'relaxed_order'
+
+    for name, value in knobs.items():
+        try:
+            with db.begin_nested():
+                db.execute(text('SELECT set_config(:name, :value, true)'), {'name': name, 'value': value})
+        except Exception as exc:
+            logger.info('pgvector_setting_skipped name=%s reason=%s', name, exc)
@@ -1,4 +1,5 @@
-﻿from contextlib import asynccontextmanager
+﻿import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
@@ -8,11 +9,25 @@ from fastapi.responses import JSONResponse
 from app.api.router import api_router
 from app.core.config import get_settings
 from app.core.logging import configure_logging
+from app.db.session import SessionLocal
+from app.services.warmup_service import warm_query_embeddings
+
+logger = logging.getLogger(__name__)
+
+
+def _preload_query_embeddings() -> None:
+    try:
+        with SessionLocal() as db:
+            warm_query_embeddings(db)
+    except Exception:
+        # Preloading only saves latency; never block startup on it.
+        logger.exception('query_embedding_preload_failed')
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     configure_logging()
+    _preload_query_embeddings()
     yield
 
 
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import math
+import re
+import zlib
+from functools import lru_cache
+from typing import Protocol
+
+from app.core.config import get_settings
+
+SPACE_RE = re.compile(r"\s+")
+
+
+class EmbeddingProvider(Protocol):
+    """Text embedder used for subtitle chunks and queries.
+
+    ``name`` identifies the model so stored vectors from different providers
+    or dimensions are never mixed.
+    """
+
+    name: str
+    dim: int
+
+    def embed(self, text: str) -> list[float]: ...
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]: ...
+
+
+class HashingEmbedder:
+    """Local CPU embedder: feature-hashed character n-grams.
+
+    Each n-gram of the normalized text is hashed (CRC32, stable across
+    processes) into one of ``dim`` signed buckets; counts are log-scaled and
+    the vector is L2-normalized. Needs no model download or network access and
+    works for mixed Korean/English subtitles.
+    """
+
+    def __init__(self, dim: int = 384, ngram_min: int = 2, ngram_max: int = 4) -> None:
+        if dim <= 0:
+            raise ValueError("embedding dim must be positive")
+        self.dim = dim
+        self.ngram_min = ngram_min
+        self.ngram_max = ngram_max
+        self.name = f"hashing-char{ngram_min}{ngram_max}-{dim}"
+
+    def embed(self, text: str) -> list[float]:
+        stripped = SPACE_RE.sub(" ", (text or "").lower()).strip()
+        if not stripped:
+            return [0.0] * self.dim
+        normalized = f" {stripped} "
+        buckets: dict[int, float] = {}
+        for size in range(self.ngram_min, self.ngram_max + 1):
+            for idx in range(0, max(0, len(normalized) - size + 1)):
+                hashed = zlib.crc32(normalized[idx : idx + size].encode("utf-8"))
+                bucket = hashed % self.dim
+                sign = 1.0 if hashed & 0x80000000 else -1.0
+                buckets[bucket] = buckets.get(bucket, 0.0) + sign
+
+        vector = [0.0] * self.dim
+        for bucket, count in buckets.items():
+            if count:
+                vector[bucket] = math.copysign(1.0 + math.log(abs(count)), count)
+        norm = math.sqrt(sum(value * value for value in vector))
+        if norm == 0.0:
+            return vector
+        return [round(value / norm, 6) for value in vector]
+
+    def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed(text) for text in texts]
+
+
+@lru_cache(maxsize=1)
+def get_embedder() -> EmbeddingProvider:
+    settings = get_settings()
+    provider = settings.embedding_provider.strip().lower()
+    if provider == "hashing":
+        return HashingEmbedder(dim=settings.embedding_dim)
+    raise ValueError(f"Unsupported EMBEDDING_PROVIDER: {settings.embedding_provider}")
@@ -0,0 +1,468 @@
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Callable, Collection, Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.rag.ivf_index import IVFIndex
+from app.rag.lexical_index import InvertedIndex
+from app.utils.lru import LRUTTLCache
+
+LEXICAL_WEIGHT = 0.35
+VECTOR_WEIGHT = 0.65
+
+
+@dataclass
+class RetrievalChunk:
+    start_ms: int
+    text_concat: str
+    subtitle_line_ids: list[str]
+    embedding: list[float] | None = None
+    episode_id: str | None = None
+    # Terms precomputed at ingest; ``None`` means tokenize ``text_concat`` here.
+    tokens: list[str] | None = None
+    end_ms: int | None = None
+
+
+@dataclass(frozen=True)
+class LineRecord:
+    """Subtitle line held by the index; duck-types ``SubtitleLine`` for evidence building."""
+
+    id: str
+    episode_id: str | None
+    start_ms: int
+    end_ms: int
+    text: str
+    speaker_text: str | None = None
+    tokens: list[str] | None = None
+
+
+class EpisodeIndex:
+    """Immutable per-episode retrieval index.
+
+    Chunks are kept in ascending ``start_ms`` order so the spoiler cutoff is a
+    single bisect, and embeddings live in one contiguous float32 matrix with
+    unit-normalized rows so cosine scoring is one matrix-vector product. The
+    lexical half of the score comes from a BM25 inverted index built once with
+    the index.
+
+    With ``window=0`` every chunk before the cutoff is searchable. The exact
+    search is a vectorized linear scan of that prefix: BM25 postings scattered
+    into one score array plus one matrix-vector product, so its cost grows
+    with the prefix; ``use_ivf`` and ``use_scenes`` are the sub-linear paths.
+
+    The index is a scene -> chunk -> line hierarchy: ``scene_breaks`` marks
+    the chunks that open a scene (a new episode or a silence longer than
+    ``scene_gap_ms``). After ``use_scenes`` a query scores the scene vectors
+    first and expands only the chunks of the best scenes. The lines of the
+    returned chunks are resolved from ``lines`` without another database
+    round trip.
+
+    ``from_arrays`` wraps prebuilt arrays instead, e.g. a memory-mapped index
+    artifact, so no chunk list has to be parsed before the first query.
+
+    ``use_ivf`` swaps the exact vector search for an approximate IVF one on
+    large indexes; lexical matches are still scored exactly.
+
+    An index built from a prefix of the episode sets ``horizon_ms``, the last
+    position its chunks cover; ``covers`` tells callers when to rebuild.
+    ``generation`` names the episode cache generation it was built from, if any.
+    """
+
+    def __init__(
+        self,
+        chunks: list[RetrievalChunk],
+        *,
+        tokenize: Callable[[str], list[str]],
+        window: int = 0,
+        order_key: Callable[[RetrievalChunk], int] | None = None,
+        lines: Iterable[LineRecord] = (),
+        scene_gap_ms: int = 0,
+        horizon_ms: int | None = None,
+        generation: str | None = None,
+    ) -> None:
+        key = order_key or (lambda item: item.start_ms)
+        self.chunks = sorted(chunks, key=key)
+        self.horizon_ms = horizon_ms
+        self.generation = generation
+        self.window = window
+        self._tokenize = tokenize
+        self.lines: Mapping[str, LineRecord] = {line.id: line for line in lines}
+        self.scene_gap_ms = scene_gap_ms
+        self.scene_breaks = _scene_breaks(self.chunks, scene_gap_ms)
+        self.ivf: IVFIndex | None = None
+        self.ivf_probes = 0
+        # Position of each chunk on the timeline; start_ms for a single episode.
+        self.order_array = np.asarray([key(chunk) for chunk in self.chunks], dtype=np.int64)
+        self.episode_ids = {chunk.episode_id for chunk in self.chunks if chunk.episode_id}
+        self.lexical = InvertedIndex(
+            [chunk.tokens if chunk.tokens is not None else tokenize(chunk.text_concat) for chunk in self.chunks]
+        )
+
+        dims = Counter(len(chunk.embedding) for chunk in self.chunks if chunk.embedding)
+        self.dim = dims.most_common(1)[0][0] if dims else 0
+        matrix = np.zeros((len(self.chunks), self.dim), dtype=np.float32)
+        for row, chunk in enumerate(self.chunks):
+            if chunk.embedding and len(chunk.embedding) == self.dim:
+                matrix[row] = chunk.embedding
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True) if self.dim else np.zeros((len(self.chunks), 1))
+        self.embeddings = np.ascontiguousarray(
+            np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0.0)
+        )
+
+    @classmethod
+    def from_arrays(
+        cls,
+        chunks: Sequence[RetrievalChunk],
+        *,
+        order: np.ndarray,
+        embeddings: np.ndarray,
+        lexical: InvertedIndex,
+        tokenize: Callable[[str], list[str]],
+        episode_ids: set[str],
+        scene_breaks: np.ndarray,
+        scene_gap_ms: int = 0,
+        lines: Mapping[str, LineRecord] | None = None,
+        window: int = 0,
+    ) -> EpisodeIndex:
+        """Build an index around existing arrays without copying them.
+
+        ``embeddings`` must already be unit-normalized rows in ``order``.
+        """
+
+        index = cls.__new__(cls)
+        index.chunks = chunks
+        index.horizon_ms = None
+        index.generation = None
+        index.window = window
+        index._tokenize = tokenize
+        index.lines = lines if lines is not None else {}
+        index.scene_gap_ms = scene_gap_ms
+        index.scene_breaks = scene_breaks
+        index.ivf = None
+        index.ivf_probes = 0
+        index.order_array = order
+        index.episode_ids = set(episode_ids)
+        index.lexical = lexical
+        index.dim = int(embeddings.shape[1]) if embeddings.ndim == 2 else 0
+        index.embeddings = embeddings
+        return index
+
+    def use_ivf(self, *, lists: int = 0, probes: int = 8) -> None:
+        """Cluster the embeddings into ``lists`` IVF lists (0 = sqrt of the chunk count).
+
+        Lists already attached from an artifact are kept unless ``lists``
+        asks for a different count.
+        """
+
+        if not self.dim or not len(self.chunks):
+            return
+        if self.ivf is None or not self.ivf.clustered or (lists and self.ivf.lists != lists):
+            self.ivf = IVFIndex(self.embeddings, lists=lists)
+        self.ivf_probes = max(1, probes)
+
+    def use_scenes(self, *, max_chunks: int = 64, probes: int = 8) -> None:
+        """Search through one list per scene, splitting scenes longer than ``max_chunks``.
+
+        Each scene's vector is the mean of its chunk embeddings; a query
+        expands the ``probes`` best scenes before the cutoff, and lexical
+        matches are still scored exactly.
+        """
+
+        if not self.dim or not len(self.chunks):
+            return
+        self.ivf = IVFIndex.from_assignments(self.embeddings, self.scene_of_row(max_chunks))
+        self.ivf_probes = max(1, probes)
+
+    def scene_of_row(self, max_chunks: int = 0) -> np.ndarray:
+        """Scene number of every chunk; ``max_chunks > 0`` splits longer scenes."""
+
+        breaks = np.asarray(self.scene_breaks, dtype=bool)
+        scene = np.cumsum(breaks) - 1
+        if max_chunks <= 0 or not breaks.size:
+            return scene
+        # Split long scenes into runs of max_chunks; keys stay ascending along the rows.
+        offset = np.arange(breaks.size) - np.flatnonzero(breaks)[scene]
+        key = scene * breaks.size + offset // max_chunks
+        return np.unique(key, return_inverse=True)[1].reshape(-1)
+
+    def covers(self, current_time_ms: int | None) -> bool:
+        """Whether every chunk up to ``current_time_ms`` (``None``: the whole episode) is held."""
+
+        if self.horizon_ms is None:
+            return True
+        return current_time_ms is not None and current_time_ms <= self.horizon_ms
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def cutoff(self, position: int) -> int:
+        """Number of chunks at or before ``position`` (``start_ms <= current_time_ms`` per episode)."""
+        return int(np.searchsorted(self.order_array, position, side="right"))
+
+    def _lexical_scores(self, query_tokens: list[str], lo: int, hi: int) -> np.ndarray:
+        scores = np.zeros(hi - lo, dtype=np.float64)
+        doc_ids, bm25 = self.lexical.score(query_tokens, lo=lo, hi=hi)
+        scores[doc_ids - lo] = bm25
+        return scores
+
+    def _unit_query(self, query_embedding: list[float]) -> np.ndarray | None:
+        if not self.dim or len(query_embedding) != self.dim:
+            return None
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if norm == 0.0:
+            return None
+        return query / norm
+
+    def _vector_scores(self, query: np.ndarray | None, lo: int, hi: int) -> np.ndarray:
+        if query is None:
+            return np.zeros(hi - lo, dtype=np.float64)
+        cosine = self.embeddings[lo:hi] @ query
+        return np.clip(cosine.astype(np.float64), 0.0, 1.0)
+
+    def _search_window(self, query_tokens: list[str], query: np.ndarray | None, lo: int, hi: int, limit: int) -> list[int]:
+        scores = (LEXICAL_WEIGHT * self._lexical_scores(query_tokens, lo, hi)) + (
+            VECTOR_WEIGHT * self._vector_scores(query, lo, hi)
+        )
+        positions = _top_positions(scores, self.order_array[lo:hi], limit)
+        return [lo + int(pos) for pos in positions]
+
+    def _score_rows(
+        self,
+        rows: np.ndarray,
+        query: np.ndarray | None,
+        lex_ids: np.ndarray,
+        lex_scores: np.ndarray,
+    ) -> np.ndarray:
+        vector = np.zeros(rows.size, dtype=np.float64)
+        if query is not None and rows.size:
+            vector = np.clip((self.embeddings[rows] @ query).astype(np.float64), 0.0, 1.0)
+        lexical = np.zeros(rows.size, dtype=np.float64)
+        if lex_ids.size and rows.size:
+            slots = np.minimum(np.searchsorted(lex_ids, rows), lex_ids.size - 1)
+            matched = lex_ids[slots] == rows
+            lexical[matched] = lex_scores[slots[matched]]
+        return (LEXICAL_WEIGHT * lexical) + (VECTOR_WEIGHT * vector)
+
+    def _search_ivf(self, query_tokens: list[str], query: np.ndarray | None, hi: int, limit: int) -> list[int]:
+        # Vector candidates come from the probed IVF lists and lexical ones
+        # from the postings; the most recent rows pad the pool when both are
+        # short, matching the exact search's position tie-break on zero scores.
+        lex_ids, lex_scores = self.lexical.score(query_tokens, hi=hi)
+        rows = lex_ids.astype(np.int64)
+        if query is not None and self.ivf is not None:
+            vector_rows = self.ivf.candidates(query, hi=hi, probes=self.ivf_probes, min_rows=limit)
+            rows = np.union1d(rows, vector_rows)
+        if rows.size < limit:
+            rows = np.union1d(rows, np.arange(max(0, hi - limit), hi))
+        scores = self._score_rows(rows, query, lex_ids, lex_scores)
+        keep = _top_positions(scores, self.order_array[rows], limit)
+        return [int(pos) for pos in rows[keep]]
+
+    def search(
+        self,
+        *,
+        query: str,
+        query_embedding: list[float],
+        current_time_ms: int,
+        limit: int,
+    ) -> list[RetrievalChunk]:
+        return self.search_before(
+            position=current_time_ms,
+            query=query,
+            query_embedding=query_embedding,
+            limit=limit,
+        )
+
+    def search_before(
+        self,
+        *,
+        position: int,
+        query: str,
+        query_embedding: list[float],
+        limit: int,
+    ) -> list[RetrievalChunk]:
+        hi = self.cutoff(position)
+        if hi <= 0 or limit <= 0:
+            return []
+
+        query_tokens = self._tokenize(query)
+        unit_query = self._unit_query(query_embedding)
+        if self.window > 0:
+            positions = self._search_window(query_tokens, unit_query, max(0, hi - self.window), hi, limit)
+        elif self.ivf is not None:
+            positions = self._search_ivf(query_tokens, unit_query, hi, limit)
+        else:
+            positions = self._search_window(query_tokens, unit_query, 0, hi, limit)
+        return [self.chunks[pos] for pos in positions]
+
+    def resolve_lines(
+        self,
+        chunks: Sequence[RetrievalChunk],
+        *,
+        episode_id: str,
+        current_time_ms: int,
+        max_lines: int = 6,
+    ) -> list[LineRecord] | None:
+        """The most recent spoiler-safe lines of ``chunks``, oldest first.
+
+        Same selection as ``resolve_lines_from_chunks`` but served from the
+        index. Returns ``None`` when a line is not held, so the caller can fall
+        back to the database.
+        """
+
+        records: list[LineRecord] = []
+        for line_id in dict.fromkeys(line_id for chunk in chunks for line_id in chunk.subtitle_line_ids):
+            record = self.lines.get(line_id)
+            if record is None:
+                return None
+            if record.episode_id == episode_id and record.start_ms <= current_time_ms:
+                records.append(record)
+        records.sort(key=lambda record: record.start_ms, reverse=True)
+        return list(reversed(records[:max_lines]))
+
+    def resolve_ranked_lines(
+        self,
+        chunks: Sequence[RetrievalChunk],
+        *,
+        episode_id: str,
+        current_time_ms: int,
+        prior_episode_ids: Collection[str],
+        max_lines: int = 6,
+    ) -> list[LineRecord] | None:
+        """Lines of ``chunks`` in chunk ranking order, for title-wide retrieval.
+
+        Lines from ``prior_episode_ids`` are allowed in full; lines of the
+        current episode must start at or before ``current_time_ms``.
+        """
+
+        records: list[LineRecord] = []
+        for line_id in dict.fromkeys(line_id for chunk in chunks for line_id in chunk.subtitle_line_ids):
+            record = self.lines.get(line_id)
+            if record is None:
+                return None
+            if record.episode_id in prior_episode_ids or (
+                record.episode_id == episode_id and record.start_ms <= current_time_ms
+            ):
+                records.append(record)
+        return records[:max_lines]
+
+
+class TitleIndex(EpisodeIndex):
+    """Retrieval index over every episode of a title.
+
+    Chunks are ordered by ``(season, episode_number, start_ms)`` through a
+    packed position key, so "everything the viewer has already seen" is the
+    same prefix cutoff as within one episode.
+    """
+
+    def __init__(
+        self,
+        chunks: list[RetrievalChunk],
+        *,
+        episode_order: dict[str, int],
+        tokenize: Callable[[str], list[str]],
+        window: int = 0,
+        lines: Iterable[LineRecord] = (),
+        scene_gap_ms: int = 0,
+    ) -> None:
+        self.episode_order = episode_order
+        super().__init__(
+            [chunk for chunk in chunks if chunk.episode_id in episode_order],
+            tokenize=tokenize,
+            window=window,
+            order_key=lambda chunk: self.position(chunk.episode_id or "", chunk.start_ms),
+            lines=lines,
+            scene_gap_ms=scene_gap_ms,
+        )
+        self.episode_ids = set(episode_order)
+
+    def position(self, episode_id: str, current_time_ms: int) -> int:
+        return (self.episode_order[episode_id] << 32) | max(0, min(int(current_time_ms), 0xFFFFFFFF))
+
+    def search_title(
+        self,
+        *,
+        episode_id: str,
+        current_time_ms: int,
+        query: str,
+        query_embedding: list[float],
+        limit: int,
+    ) -> list[RetrievalChunk]:
+        if episode_id not in self.episode_order:
+            return []
+        return self.search_before(
+            position=self.position(episode_id, current_time_ms),
+            query=query,
+            query_embedding=query_embedding,
+            limit=limit,
+        )
+
+
+def _scene_breaks(chunks: Sequence[RetrievalChunk], gap_ms: int) -> np.ndarray:
+    """Rows that open a new scene: a new episode or a silence longer than ``gap_ms`` (0 disables)."""
+
+    breaks = np.zeros(len(chunks), dtype=bool)
+    for row in range(1, len(chunks)):
+        previous, current = chunks[row - 1], chunks[row]
+        previous_end = previous.end_ms if previous.end_ms is not None else previous.start_ms
+        breaks[row] = current.episode_id != previous.episode_id or (
+            gap_ms > 0 and current.start_ms - previous_end > gap_ms
+        )
+    if len(chunks):
+        breaks[0] = True
+    return breaks
+
+
+def _top_positions(scores: np.ndarray, order: np.ndarray, limit: int) -> np.ndarray:
+    """Order by ``(score, position)`` descending and keep the first ``limit``."""
+    if scores.size > limit:
+        kth = np.partition(scores, scores.size - limit)[scores.size - limit]
+        candidates = np.flatnonzero(scores >= kth)
+    else:
+        candidates = np.arange(scores.size)
+    ranked = np.lexsort((order[candidates], scores[candidates]))[::-1]
+    return candidates[ranked[:limit]]
+
+
+@lru_cache(maxsize=1)
+def _registry() -> LRUTTLCache[str, EpisodeIndex]:
+    """Process-local LRU+TTL registry of built episode and title indexes."""
+
+    settings = get_settings()
+    return LRUTTLCache(settings.episode_index_cache_size, settings.episode_index_ttl_seconds)
+
+
+def get_episode_index(episode_id: str) -> EpisodeIndex | None:
+    return _registry().get(episode_id)
+
+
+def store_episode_index(episode_id: str, index: EpisodeIndex) -> None:
+    _registry().put(episode_id, index)
+
+
+def drop_episode_index(episode_id: str) -> None:
+    # Title indexes embed the episode's chunks as well.
+    _registry().drop_where(lambda key, index: key == episode_id or episode_id in index.episode_ids)
+
+
+def _title_key(title_id: str) -> str:
+    return f"title:{title_id}"
+
+
+def get_title_index(title_id: str) -> TitleIndex | None:
+    index = _registry().get(_title_key(title_id))
+    return index if isinstance(index, TitleIndex) else None
+
+
+def store_title_index(title_id: str, index: TitleIndex) -> None:
+    _registry().put(_title_key(title_id), index)
+
+
+def drop_title_index(title_id: str) -> None:
+    _registry().pop(_title_key(title_id))
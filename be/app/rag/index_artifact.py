@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.rag.episode_index import EpisodeIndex, LineRecord, RetrievalChunk
+from app.rag.ivf_index import IVFIndex
+from app.rag.lexical_index import InvertedIndex
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows workers build without a host lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# File layout: MAGIC, little-endian u32 header length, JSON header, then every
+# array at an ALIGNMENT-byte boundary. The header records dtype, shape and
+# offset per array so a reader maps the file once and slices views from it.
+# IVF lists are optional arrays, present when the index was built with k-means
+# lists; scene lists are cheap to derive from ``scene_breaks`` and are not stored.
+MAGIC = b"NPXIDX\x00\x00"
+FORMAT_VERSION = 3
+ALIGNMENT = 64
+SAFE_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def _pack_strings(values: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.concatenate(([0], np.cumsum([len(value) for value in encoded], dtype=np.int64))).astype(np.int64)
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def _unpack_string(offsets: np.ndarray, data: np.ndarray, row: int) -> str:
+    return data[int(offsets[row]) : int(offsets[row + 1])].tobytes().decode("utf-8")
+
+
+class ArtifactChunks(Sequence[RetrievalChunk]):
+    """Chunk view over a mapped artifact; chunks are materialized on access."""
+
+    def __init__(self, arrays: dict[str, np.ndarray], episode_id: str) -> None:
+        self.episode_id = episode_id
+        self.start_ms = arrays["start_ms"]
+        self.embeddings = arrays["embeddings"]
+        self.line_offsets = arrays["line_offsets"]
+        self.line_ids = arrays["line_ids"]
+        self.text_offsets = arrays["text_offsets"]
+        self.text_bytes = arrays["text_bytes"]
+        self.end_ms = arrays["end_ms"]
+
+    def __len__(self) -> int:
+        return len(self.start_ms)
+
+    def __getitem__(self, pos):  # type: ignore[override]
+        if isinstance(pos, slice):
+            return [self[idx] for idx in range(*pos.indices(len(self)))]
+        lines = self.line_ids[int(self.line_offsets[pos]) : int(self.line_offsets[pos + 1])]
+        return RetrievalChunk(
+            start_ms=int(self.start_ms[pos]),
+            text_concat=_unpack_string(self.text_offsets, self.text_bytes, pos),
+            subtitle_line_ids=[line.decode("ascii") for line in lines.tolist()],
+            embedding=self.embeddings[pos].tolist() if self.embeddings.shape[1] else None,
+            episode_id=self.episode_id,
+            end_ms=int(self.end_ms[pos]),
+        )
+
+
+class ArtifactLines(Mapping[str, LineRecord]):
+    """Line table of a mapped artifact, looked up by binary search on the sorted ids."""
+
+    def __init__(self, arrays: dict[str, np.ndarray], episode_id: str) -> None:
+        self.episode_id = episode_id
+        self.arrays = arrays
+        self.ids = arrays["line_table_ids"]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[str]:
+        return (line_id.decode("ascii") for line_id in self.ids.tolist())
+
+    def __getitem__(self, line_id: str) -> LineRecord:
+        key = line_id.encode("ascii", errors="replace")
+        row = int(np.searchsorted(self.ids, key))
+        if row >= len(self.ids) or self.ids[row] != key:
+            raise KeyError(line_id)
+        arrays = self.arrays
+        tokens = _unpack_string(arrays["line_token_offsets"], arrays["line_token_bytes"], row)
+        return LineRecord(
+            id=line_id,
+            episode_id=self.episode_id,
+            start_ms=int(arrays["line_start_ms"][row]),
+            end_ms=int(arrays["line_end_ms"][row]),
+            text=_unpack_string(arrays["line_text_offsets"], arrays["line_text_bytes"], row),
+            speaker_text=None
+            if arrays["line_speaker_null"][row]
+            else _unpack_string(arrays["line_speaker_offsets"], arrays["line_speaker_bytes"], row),
+            tokens=None if arrays["line_tokens_null"][row] else (tokens.split("\n") if tokens else []),
+        )
+
+
+def artifact_path(episode_id: str) -> Path | None:
+    directory = get_settings().episode_index_dir.strip()
+    if not directory:
+        return None
+    return Path(directory) / f"{SAFE_NAME_RE.sub('_', episode_id)}.idx"
+
+
+@contextmanager
+def artifact_build_lock(episode_id: str) -> Iterator[None]:
+    """Host-wide exclusive lock around building or removing an episode's artifact.
+
+    Workers that miss on the same episode queue here; after the first one
+    writes the file the others map it instead of building their own copy.
+    """
+
+    path = artifact_path(episode_id)
+    if path is None or fcntl is None:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lock_path = path.with_suffix(".lock")
+    while True:
+        handle = lock_path.open("a")
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        # remove_episode_artifact unlinks the lock file under the lock; a waiter
+        # that got the unlinked file retries on the current one.
+        try:
+            if os.path.samestat(os.fstat(handle.fileno()), os.stat(lock_path)):
+                break
+        except FileNotFoundError:
+            pass
+        handle.close()
+    try:
+        yield
+    finally:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        handle.close()
+
+
+def _index_arrays(index: EpisodeIndex) -> dict[str, np.ndarray]:
+    chunks = list(index.chunks)
+    line_ids = [line_id for chunk in chunks for line_id in chunk.subtitle_line_ids]
+    text_offsets, text_bytes = _pack_strings([chunk.text_concat or "" for chunk in chunks])
+    lexical = index.lexical
+    lines = [index.lines[line_id] for line_id in sorted(index.lines)]
+    line_text_offsets, line_text_bytes = _pack_strings([line.text or "" for line in lines])
+    speaker_offsets, speaker_bytes = _pack_strings([line.speaker_text or "" for line in lines])
+    token_offsets, token_bytes = _pack_strings(["\n".join(line.tokens or []) for line in lines])
+    arrays = {
+        "start_ms": np.asarray([chunk.start_ms for chunk in chunks], dtype=np.int64),
+        "end_ms": np.asarray(
+            [chunk.end_ms if chunk.end_ms is not None else chunk.start_ms for chunk in chunks], dtype=np.int64
+        ),
+        "embeddings": np.asarray(index.embeddings, dtype=np.float32).reshape(len(chunks), index.dim),
+        "line_offsets": np.concatenate(
+            ([0], np.cumsum([len(chunk.subtitle_line_ids) for chunk in chunks], dtype=np.int64))
+        ).astype(np.int64),
+        "line_ids": np.asarray([line_id.encode("ascii") for line_id in line_ids], dtype=np.bytes_),
+        "text_offsets": text_offsets,
+        "text_bytes": text_bytes,
+        "vocab": np.asarray(lexical.vocab, dtype=np.str_),
+        "postings_offsets": np.asarray(lexical.offsets, dtype=np.int64),
+        "postings_docs": np.asarray(lexical.doc_ids, dtype=np.int32),
+        "postings_tfs": np.asarray(lexical.tfs, dtype=np.float32),
+        "doc_lengths": np.asarray(lexical.doc_lengths, dtype=np.float32),
+        "scene_breaks": np.asarray(index.scene_breaks, dtype=np.bool_),
+        "line_table_ids": np.asarray([line.id.encode("ascii") for line in lines], dtype=np.bytes_),
+        "line_start_ms": np.asarray([line.start_ms for line in lines], dtype=np.int64),
+        "line_end_ms": np.asarray([line.end_ms for line in lines], dtype=np.int64),
+        "line_text_offsets": line_text_offsets,
+        "line_text_bytes": line_text_bytes,
+        "line_speaker_offsets": speaker_offsets,
+        "line_speaker_bytes": speaker_bytes,
+        "line_speaker_null": np.asarray([line.speaker_text is None for line in lines], dtype=np.bool_),
+        "line_token_offsets": token_offsets,
+        "line_token_bytes": token_bytes,
+        "line_tokens_null": np.asarray([line.tokens is None for line in lines], dtype=np.bool_),
+    }
+    if index.ivf is not None and index.ivf.clustered:
+        arrays["ivf_centroids"] = np.asarray(index.ivf.centroids, dtype=np.float32)
+        arrays["ivf_list_of_row"] = np.asarray(index.ivf.list_of_row, dtype=np.int32)
+        arrays["ivf_offsets"] = np.asarray(index.ivf.offsets, dtype=np.int64)
+        arrays["ivf_rows"] = np.asarray(index.ivf.rows, dtype=np.int64)
+    return arrays
+
+
+def write_episode_artifact(index: EpisodeIndex, episode_id: str, path: Path | None = None) -> Path | None:
+    """Serialize an episode index to its artifact file.
+
+    The file is written next to the target and moved into place with
+    ``os.replace``, so workers that still map the previous version keep a
+    consistent view and new readers only ever see a complete file.
+    """
+
+    path = path or artifact_path(episode_id)
+    if path is None:
+        return None
+    arrays = _index_arrays(index)
+    layout: dict[str, dict] = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header = json.dumps(
+        {
+            "version": FORMAT_VERSION,
+            "episode_id": episode_id,
+            "scene_gap_ms": index.scene_gap_ms,
+            "generation": index.generation,
+            "arrays": layout,
+        }
+    ).encode("utf-8")
+    data_start = -(-(len(MAGIC) + 4 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(MAGIC)
+            handle.write(struct.pack("<I", len(header)))
+            handle.write(header)
+            for name, array in arrays.items():
+                handle.seek(data_start + layout[name]["offset"])
+                handle.write(np.ascontiguousarray(array).tobytes())
+            handle.truncate(data_start + offset)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    logger.info("rag_index_artifact_written episode_id=%s chunks=%s bytes=%s", episode_id, len(index), data_start + offset)
+    return path
+
+
+def load_episode_artifact(
+    episode_id: str,
+    *,
+    tokenize: Callable[[str], list[str]],
+    window: int = 0,
+    scene_gap_ms: int = 0,
+    generation: str | None = None,
+) -> EpisodeIndex | None:
+    """Map an episode's artifact read-only and wrap it as an ``EpisodeIndex``.
+
+    Arrays are views into one shared mapping, so every worker process serves
+    from the same page-cache copy. Missing, outdated or damaged files return
+    ``None`` and the caller falls back to building the index. When
+    ``generation`` is given, an artifact built from another episode cache
+    generation counts as outdated.
+    """
+
+    path = artifact_path(episode_id)
+    if path is None or not path.is_file():
+        return None
+    try:
+        with path.open("rb") as handle:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[: len(MAGIC)] != MAGIC:
+            raise ValueError("bad magic")
+        (header_len,) = struct.unpack_from("<I", mapped, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        header = json.loads(mapped[header_start : header_start + header_len].decode("utf-8"))
+        if (
+            header.get("version") != FORMAT_VERSION
+            or header.get("episode_id") != episode_id
+            or header.get("scene_gap_ms") != scene_gap_ms
+            or (generation is not None and header.get("generation") != generation)
+        ):
+            logger.info("rag_index_artifact_outdated episode_id=%s", episode_id)
+            return None
+        data_start = -(-(header_start + header_len) // ALIGNMENT) * ALIGNMENT
+        arrays: dict[str, np.ndarray] = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            shape = tuple(spec["shape"])
+            count = int(np.prod(shape)) if shape else 1
+            arrays[name] = np.frombuffer(
+                mapped, dtype=dtype, count=count, offset=data_start + spec["offset"]
+            ).reshape(shape)
+    except (OSError, ValueError, KeyError, struct.error) as exc:
+        logger.warning("rag_index_artifact_unreadable episode_id=%s reason=%s", episode_id, exc)
+        return None
+
+    lexical = InvertedIndex.from_arrays(
+        vocab=arrays["vocab"],
+        offsets=arrays["postings_offsets"],
+        doc_ids=arrays["postings_docs"],
+        tfs=arrays["postings_tfs"],
+        doc_lengths=arrays["doc_lengths"],
+    )
+    index = EpisodeIndex.from_arrays(
+        ArtifactChunks(arrays, episode_id),
+        order=arrays["start_ms"],
+        embeddings=arrays["embeddings"],
+        lexical=lexical,
+        tokenize=tokenize,
+        episode_ids={episode_id},
+        scene_breaks=arrays["scene_breaks"],
+        scene_gap_ms=scene_gap_ms,
+        lines=ArtifactLines(arrays, episode_id),
+        window=window,
+    )
+    if "ivf_centroids" in arrays:
+        index.ivf = IVFIndex.from_arrays(
+            centroids=arrays["ivf_centroids"],
+            list_of_row=arrays["ivf_list_of_row"],
+            offsets=arrays["ivf_offsets"],
+            rows=arrays["ivf_rows"],
+        )
+    index.generation = header.get("generation")
+    return index
+
+
+def remove_episode_artifact(episode_id: str) -> None:
+    path = artifact_path(episode_id)
+    if path is None:
+        return
+    with artifact_build_lock(episode_id):
+        path.unlink(missing_ok=True)
+        path.with_suffix(".lock").unlink(missing_ok=True)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+KMEANS_ITERATIONS = 12
+KMEANS_SEED = 17
+
+
+class IVFIndex:
+    """Inverted-file ANN index over unit-normalized, time-ordered embeddings.
+
+    Rows are clustered with spherical k-means; each list keeps its row numbers
+    in ascending order, so the spoiler cutoff ``row < hi`` is a prefix of every
+    list. A query ranks the centroids and scans only the best ``probes`` lists
+    (more when they hold too few rows before the cutoff). Rows with a zero
+    vector belong to no list.
+
+    ``from_assignments`` takes the lists as given instead (e.g. one per
+    scene); ``clustered`` tells the two apart.
+    """
+
+    clustered = True
+
+    def __init__(self, embeddings: np.ndarray, *, lists: int = 0, seed: int = KMEANS_SEED) -> None:
+        size = len(embeddings)
+        has_vector = np.any(embeddings != 0.0, axis=1) if embeddings.ndim == 2 and size else np.zeros(size, dtype=bool)
+        vector_rows = np.flatnonzero(has_vector)
+        lists = lists or round(math.sqrt(max(1, vector_rows.size)))
+        self.lists = max(1, min(lists, max(1, vector_rows.size)))
+        self.centroids = _spherical_kmeans(embeddings[vector_rows], self.lists, seed=seed)
+
+        # list_of_row uses ``self.lists`` as the "no list" bucket for zero vectors.
+        list_of_row = np.full(size, self.lists, dtype=np.int32)
+        if vector_rows.size:
+            list_of_row[vector_rows] = np.argmax(embeddings[vector_rows] @ self.centroids.T, axis=1)
+        self._set_lists(list_of_row)
+
+    @classmethod
+    def from_assignments(cls, embeddings: np.ndarray, list_of_row: np.ndarray) -> IVFIndex:
+        """Lists from a given row -> list assignment, each centroid the normalized mean of its rows."""
+
+        size = len(embeddings)
+        lists = int(list_of_row.max()) + 1 if size else 1
+        has_vector = np.any(embeddings != 0.0, axis=1) if embeddings.ndim == 2 and size else np.zeros(size, dtype=bool)
+        sums = np.zeros((lists, embeddings.shape[1] if embeddings.ndim == 2 else 0), dtype=np.float32)
+        np.add.at(sums, list_of_row[has_vector], embeddings[has_vector])
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+
+        index = cls.__new__(cls)
+        index.clustered = False
+        index.lists = lists
+        index.centroids = np.ascontiguousarray(np.divide(sums, norms, out=np.zeros_like(sums), where=norms > 0.0))
+        index._set_lists(np.where(has_vector, list_of_row, lists).astype(np.int32))
+        return index
+
+    def _set_lists(self, list_of_row: np.ndarray) -> None:
+        self.list_of_row = list_of_row
+        order = np.argsort(list_of_row, kind="stable")
+        counts = np.bincount(list_of_row, minlength=self.lists + 1)[: self.lists]
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self.rows = order[: self.offsets[-1]].astype(np.int64)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        *,
+        centroids: np.ndarray,
+        list_of_row: np.ndarray,
+        offsets: np.ndarray,
+        rows: np.ndarray,
+    ) -> IVFIndex:
+        """Wrap stored lists (e.g. views into an index artifact) without re-clustering."""
+
+        index = cls.__new__(cls)
+        index.lists = int(centroids.shape[0])
+        index.centroids = centroids
+        index.list_of_row = list_of_row
+        index.offsets = offsets
+        index.rows = rows
+        return index
+
+    def candidates(self, query: np.ndarray, *, hi: int, probes: int, min_rows: int) -> np.ndarray:
+        """Rows before ``hi`` in the lists closest to ``query``.
+
+        At least ``probes`` lists are scanned, and more are added until
+        ``min_rows`` rows before the cutoff have been collected.
+        """
+
+        if hi <= 0 or not self.rows.size:
+            return np.empty(0, dtype=np.int64)
+        visible = np.bincount(self.list_of_row[:hi], minlength=self.lists + 1)[: self.lists]
+        ranked = np.argsort(-(self.centroids @ query), kind="stable")
+        ranked = ranked[visible[ranked] > 0]
+        enough = int(np.searchsorted(np.cumsum(visible[ranked]), min_rows, side="left")) + 1
+        chosen = ranked[: max(probes, enough)]
+        parts = [self.rows[self.offsets[j] : self.offsets[j] + visible[j]] for j in chosen]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+
+def _spherical_kmeans(vectors: np.ndarray, k: int, *, seed: int) -> np.ndarray:
+    if not vectors.size:
+        return np.zeros((k, vectors.shape[1] if vectors.ndim == 2 else 0), dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].astype(np.float32)
+    for _ in range(KMEANS_ITERATIONS):
+        similarity = vectors @ centroids.T
+        assignment = np.argmax(similarity, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms.reshape(-1) == 0.0
+        if empty.any():
+            # Re-seed empty lists with the rows farthest from their centroid.
+            farthest = np.argsort(similarity[np.arange(len(vectors)), assignment])[: int(empty.sum())]
+            sums[empty] = vectors[farthest]
+            norms[empty] = np.linalg.norm(sums[empty], axis=1, keepdims=True)
+        updated = np.divide(sums, norms, out=np.zeros_like(sums), where=norms > 0.0)
+        if np.allclose(updated, centroids, atol=1e-5):
+            centroids = updated
+            break
+        centroids = updated
+    return np.ascontiguousarray(centroids, dtype=np.float32)
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import math
+from collections import Counter, defaultdict
+
+import numpy as np
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+class InvertedIndex:
+    """BM25 inverted index over time-ordered documents.
+
+    Documents are numbered in ascending ``start_ms`` order, so every postings
+    list is sorted by time as well and the spoiler cutoff is a prefix slice.
+    Corpus statistics (document count, document frequency, average length) are
+    taken from that prefix only, so later chunks never influence a score.
+    """
+
+    def __init__(self, documents: list[list[str]], *, k1: float = BM25_K1, b: float = BM25_B) -> None:
+        positions: dict[str, list[int]] = defaultdict(list)
+        frequencies: dict[str, list[int]] = defaultdict(list)
+        for doc_id, tokens in enumerate(documents):
+            for token, count in Counter(tokens).items():
+                positions[token].append(doc_id)
+                frequencies[token].append(count)
+        vocab = sorted(positions)
+        counts = [len(positions[token]) for token in vocab]
+        self._init_arrays(
+            vocab=np.asarray(vocab, dtype=np.str_),
+            offsets=np.concatenate(([0], np.cumsum(counts, dtype=np.int64))).astype(np.int64),
+            doc_ids=np.asarray([doc for token in vocab for doc in positions[token]], dtype=np.int32),
+            tfs=np.asarray([tf for token in vocab for tf in frequencies[token]], dtype=np.float32),
+            doc_lengths=np.asarray([len(tokens) for tokens in documents], dtype=np.float32),
+            k1=k1,
+            b=b,
+        )
+
+    @classmethod
+    def from_arrays(
+        cls,
+        *,
+        vocab: np.ndarray,
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        tfs: np.ndarray,
+        doc_lengths: np.ndarray,
+        k1: float = BM25_K1,
+        b: float = BM25_B,
+    ) -> InvertedIndex:
+        """Wrap prebuilt postings (e.g. memory-mapped from an index artifact) without copying."""
+
+        index = cls.__new__(cls)
+        index._init_arrays(vocab=vocab, offsets=offsets, doc_ids=doc_ids, tfs=tfs, doc_lengths=doc_lengths, k1=k1, b=b)
+        return index
+
+    def _init_arrays(
+        self,
+        *,
+        vocab: np.ndarray,
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        tfs: np.ndarray,
+        doc_lengths: np.ndarray,
+        k1: float,
+        b: float,
+    ) -> None:
+        # Postings are stored CSR-style: the postings of ``vocab[i]`` are
+        # ``doc_ids[offsets[i]:offsets[i + 1]]`` with matching ``tfs``.
+        self.k1 = k1
+        self.b = b
+        self.vocab = vocab
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_lengths = doc_lengths
+        self.size = len(doc_lengths)
+        self.length_prefix = np.concatenate(([0.0], np.cumsum(doc_lengths, dtype=np.float64)))
+
+    def posting(self, token: str) -> tuple[np.ndarray, np.ndarray] | None:
+        slot = int(np.searchsorted(self.vocab, token))
+        if slot >= len(self.vocab) or self.vocab[slot] != token:
+            return None
+        start, end = int(self.offsets[slot]), int(self.offsets[slot + 1])
+        return self.doc_ids[start:end], self.tfs[start:end]
+
+    def score(
+        self,
+        query_tokens: list[str],
+        *,
+        hi: int,
+        lo: int = 0,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return ``(doc_ids, scores)`` for documents in ``[lo, hi)`` matching the query.
+
+        Scores are normalized by the query's maximum attainable BM25 score so
+        they stay in ``[0, 1)`` like the other half of the hybrid score. Work
+        is proportional to the matching postings, not to the corpus size.
+        """
+
+        empty = (np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64))
+        if not query_tokens or hi <= 0:
+            return empty
+        hi = min(hi, self.size)
+        avg_length = self.length_prefix[hi] / hi if hi else 0.0
+
+        doc_parts: list[np.ndarray] = []
+        score_parts: list[np.ndarray] = []
+        upper_bound = 0.0
+        for token, query_count in Counter(query_tokens).items():
+            posting = self.posting(token)
+            doc_ids, tfs = posting if posting else empty
+            prefix_end = int(np.searchsorted(doc_ids, hi, side="left"))
+            df = prefix_end
+            idf = math.log(1.0 + (hi - df + 0.5) / (df + 0.5))
+            upper_bound += query_count * idf * (self.k1 + 1.0)
+            if df == 0:
+                continue
+            start = int(np.searchsorted(doc_ids, lo, side="left"))
+            ids = doc_ids[start:prefix_end]
+            tf = tfs[start:prefix_end].astype(np.float64)
+            norm = self.k1 * (1.0 - self.b + self.b * self.doc_lengths[ids].astype(np.float64) / max(avg_length, 1e-9))
+            doc_parts.append(ids)
+            score_parts.append(query_count * idf * tf * (self.k1 + 1.0) / (tf + norm))
+
+        if not doc_parts or upper_bound <= 0.0:
+            return empty
+        doc_ids, inverse = np.unique(np.concatenate(doc_parts), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_parts))
+        return doc_ids.astype(np.int32), scores / upper_bound
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from collections.abc import Iterable
+from functools import lru_cache
+
+from app.core.config import get_settings
+from app.rag.embeddings import get_embedder
+from app.utils.lru import LRUTTLCache
+
+logger = logging.getLogger(__name__)
+
+# Query text -> embedding memo. The process LRU is the first tier; with Redis
+# configured a shared second tier lets workers and restarts reuse vectors
+# computed elsewhere. Keys include the embedder name so vectors from another
+# model or dimension are never served.
+
+
+@lru_cache(maxsize=1)
+def _cache() -> LRUTTLCache[tuple[str, str], tuple[float, ...]]:
+    return LRUTTLCache(get_settings().query_embedding_cache_size, 0)
+
+
+@lru_cache(maxsize=1)
+def _shared_counters() -> dict[str, int]:
+    return {"shared_hits": 0, "shared_misses": 0}
+
+
+def _shared_key(model: str, text: str) -> str:
+    digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    return f"netplus:qemb:{model}:{digest}"
+
+
+def _shared_client():
+    if get_settings().query_embedding_redis_ttl_seconds <= 0:
+        return None
+    # Imported lazily: cache_service depends on the rag package.
+    from app.services.cache_service import _redis_client
+
+    return _redis_client()
+
+
+def _shared_get(model: str, text: str) -> tuple[float, ...] | None:
+    client = _shared_client()
+    if client is None:
+        return None
+    counters = _shared_counters()
+    try:
+        raw = client.get(_shared_key(model, text))
+    except Exception:
+        return None
+    if not raw:
+        counters["shared_misses"] += 1
+        return None
+    counters["shared_hits"] += 1
+    return tuple(float(value) for value in json.loads(raw))
+
+
+def _shared_put(model: str, text: str, vector: tuple[float, ...]) -> None:
+    client = _shared_client()
+    if client is None:
+        return
+    try:
+        client.setex(_shared_key(model, text), get_settings().query_embedding_redis_ttl_seconds, json.dumps(vector))
+    except Exception:
+        return
+
+
+def embed_query(text: str) -> list[float]:
+    """Embedding of a query string, memoized per embedder."""
+
+    embedder = get_embedder()
+    key = (embedder.name, text)
+    cache = _cache()
+    vector = cache.get(key)
+    if vector is None:
+        vector = _shared_get(embedder.name, text)
+        if vector is None:
+            vector = tuple(embedder.embed(text))
+            _shared_put(embedder.name, text, vector)
+        cache.put(key, vector)
+    return list(vector)
+
+
+def preload_query_embeddings(texts: Iterable[str]) -> int:
+    """Embed ``texts`` ahead of traffic; returns how many were not cached yet."""
+
+    embedder = get_embedder()
+    cache = _cache()
+    pending = [text for text in dict.fromkeys(texts) if text and (embedder.name, text) not in cache]
+    for text, vector in zip(pending, embedder.embed_batch(pending)):
+        cache.put((embedder.name, text), tuple(vector))
+        _shared_put(embedder.name, text, tuple(vector))
+    return len(pending)
+
+
+def query_embedding_cache_stats() -> dict[str, float]:
+    return {**_cache().stats(), **_shared_counters()}
@@ -3,7 +3,8 @@ from __future__ import annotations
 import re
 from dataclasses import dataclass
 
-WORD_RE = re.compile(r"[a-zA-Z0-9\uAC00-\uD7A3]+")
+from app.rag.tokenizer import words
+
 SPACE_RE = re.compile(r"\s+")
 
 CASUAL_KEYWORDS = {
@@ -103,14 +104,10 @@ def _compact_korean(text: str) -> str:
     return text.replace(" ", "")
 
 
-def _tokenize(text: str) -> list[str]:
-    return [token for token in WORD_RE.findall(text.lower()) if token]
-
-
 def classify_query_intent(question: str) -> QueryIntentResult:
     normalized = _normalize(question)
     compact = _compact_korean(normalized)
-    tokens = _tokenize(normalized)
+    tokens = words(normalized)
     token_set = set(tokens)
 
     if not normalized:
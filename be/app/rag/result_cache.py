@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from collections.abc import Collection, Iterable
+from dataclasses import dataclass
+from functools import lru_cache
+
+from app.core.config import get_settings
+from app.rag.episode_index import LineRecord
+from app.utils.lru import LRUTTLCache
+
+
+@dataclass(frozen=True)
+class CachedRetrieval:
+    """Final evidence lines of one retrieval, in answer order.
+
+    Lines carry their full payload so a hit builds evidence without touching
+    the database. ``computed_at_ms`` is the playback position the lines were retrieved for;
+    ``episode_ids`` lists every episode the result was drawn from so ingestion
+    into any of them drops the entry.
+    """
+
+    lines: tuple[LineRecord, ...]
+    computed_at_ms: int
+    episode_ids: frozenset[str]
+
+
+def retrieval_cache_key(
+    *,
+    scope: str,
+    title_id: str,
+    episode_id: str,
+    current_time_ms: int,
+    normalized_question: str,
+) -> tuple[str, str, str, int, str]:
+    """Key of one retrieval; the question must be the form retrieval ran on (``QueryIntentResult.normalized_question``)."""
+
+    bucket_ms = max(1, int(get_settings().retrieval_cache_bucket_ms))
+    return (scope, title_id, episode_id, max(0, current_time_ms) // bucket_ms, normalized_question)
+
+
+@lru_cache(maxsize=1)
+def _cache() -> LRUTTLCache[tuple, CachedRetrieval]:
+    settings = get_settings()
+    return LRUTTLCache(settings.retrieval_cache_size, settings.retrieval_cache_ttl_seconds)
+
+
+def get_cached_retrieval(key: tuple, *, episode_id: str, current_time_ms: int) -> list[LineRecord] | None:
+    """Return the cached lines if they are all spoiler-safe at ``current_time_ms``.
+
+    An entry computed later in the same bucket may hold current-episode lines
+    past this request's position. Such an entry counts as a miss rather than
+    being trimmed, so the time guard holds and the request retrieves afresh.
+    """
+
+    if get_settings().retrieval_cache_size <= 0:
+        return None
+    cached = _cache().get(key)
+    if cached is None:
+        return None
+    if cached.computed_at_ms > current_time_ms and any(
+        line.episode_id == episode_id and line.start_ms > current_time_ms for line in cached.lines
+    ):
+        return None
+    return list(cached.lines)
+
+
+def _line_record(line) -> LineRecord:
+    if isinstance(line, LineRecord):
+        return line
+    return LineRecord(
+        id=line.id,
+        episode_id=line.episode_id,
+        start_ms=int(line.start_ms),
+        end_ms=int(line.end_ms),
+        text=line.text,
+        speaker_text=line.speaker_text,
+        tokens=line.tokens,
+    )
+
+
+def store_cached_retrieval(
+    key: tuple,
+    *,
+    lines: Iterable,
+    current_time_ms: int,
+    episode_ids: Collection[str],
+) -> None:
+    if get_settings().retrieval_cache_size <= 0:
+        return
+    entry = CachedRetrieval(
+        lines=tuple(_line_record(line) for line in lines),
+        computed_at_ms=current_time_ms,
+        episode_ids=frozenset(episode_ids),
+    )
+    _cache().put(key, entry)
+
+
+def invalidate_retrieval_cache(episode_id: str) -> int:
+    return _cache().drop_where(lambda _key, entry: episode_id in entry.episode_ids)
+
+
+def retrieval_cache_stats() -> dict[str, float]:
+    return _cache().stats()
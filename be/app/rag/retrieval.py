@@ -1,92 +1,104 @@
 from __future__ import annotations
 
 import logging
-import re
-from collections import Counter
-from dataclasses import dataclass
 
-from sqlalchemy import select
+from collections.abc import Collection
+
+from sqlalchemy import and_, or_, select
 from sqlalchemy.orm import Session
 
 from app.core.config import get_settings
-from app.db.models import SubtitleChunk, SubtitleLine
-from app.services.cache_service import get_cached_episode_chunks
-
-WORD_RE = re.compile(r"[A-Za-z0-9\uAC00-\uD7A3]+")
-MIN_TOKEN_LEN = 2
-STOPWORDS = {
-    "the",
-    "a",
-    "an",
-    "of",
-    "to",
-    "in",
-    "on",
-    "at",
-    "for",
-    "and",
-    "or",
-    "is",
-    "are",
-    "was",
-    "were",
-    "be",
-    "been",
-    "being",
-    "it",
-    "this",
-    "that",
-    "with",
-    "as",
-    "by",
-}
+from app.db.models import Episode, SubtitleChunk, SubtitleLine
+from app.db.vector_index import apply_vector_search_settings
+from app.rag.episode_index import (
+    EpisodeIndex,
+    LineRecord,
+    RetrievalChunk,
+    TitleIndex,
+    drop_episode_index,
+    drop_title_index,
+    get_episode_index,
+    get_title_index,
+    store_episode_index,
+    store_title_index,
+)
+from app.rag.index_artifact import artifact_build_lock, artifact_path, load_episode_artifact, write_episode_artifact
+from app.rag.query_embeddings import embed_query
+from app.rag.tokenizer import chunk_terms
+from app.services.cache_service import get_cached_generation, get_or_fill_cached_episode, is_cache_enabled
+
 logger = logging.getLogger(__name__)
 
 
-@dataclass
-class RetrievalChunk:
-    start_ms: int
-    text_concat: str
-    subtitle_line_ids: list[str]
-    embedding: list[float] | None = None
+def _chunk_from_row(row: SubtitleChunk) -> RetrievalChunk:
+    return RetrievalChunk(
+        start_ms=row.start_ms,
+        text_concat=row.text_concat,
+        subtitle_line_ids=row.subtitle_line_ids or [],
+        embedding=row.embedding,
+        episode_id=row.episode_id,
+        tokens=row.tokens,
+        end_ms=row.end_ms,
+    )
+
 
+def _chunk_from_cache_item(item: dict) -> RetrievalChunk:
+    return RetrievalChunk(
+        start_ms=int(item.get("start_ms") or 0),
+        text_concat=str(item.get("text_concat") or ""),
+        subtitle_line_ids=[str(v) for v in (item.get("subtitle_line_ids") or [])],
+        # JSON and binary payloads both decode to lists of numbers; EpisodeIndex
+        # packs them into float32 itself, so no per-element conversion here.
+        embedding=item.get("embedding") or None,
+        episode_id=str(item.get("episode_id") or "") or None,
+        tokens=[str(v) for v in item["tokens"]] if item.get("tokens") is not None else None,
+        end_ms=int(item["end_ms"]) if item.get("end_ms") is not None else None,
+    )
 
-def _tokenize(text: str) -> list[str]:
-    tokens: list[str] = []
-    for token in WORD_RE.findall((text or "").lower()):
-        if token in STOPWORDS:
-            continue
-        if not token.isdigit() and len(token) < MIN_TOKEN_LEN:
-            continue
-        tokens.append(token)
-    return tokens
 
+def _line_from_row(row: SubtitleLine) -> LineRecord:
+    return LineRecord(
+        id=row.id,
+        episode_id=row.episode_id,
+        start_ms=row.start_ms,
+        end_ms=row.end_ms,
+        text=row.text,
+        speaker_text=row.speaker_text,
+        tokens=row.tokens,
+    )
 
-def _score_tokens(query_tokens: list[str], text: str) -> float:
-    if not query_tokens:
-        return 0.0
-    q_counter = Counter(query_tokens)
-    t_counter = Counter(_tokenize(text))
-    overlap = sum(min(q_counter[token], t_counter[token]) for token in q_counter)
-    return overlap / max(1, len(query_tokens))
 
+def _line_from_cache_item(item: dict) -> LineRecord:
+    return LineRecord(
+        id=str(item["id"]),
+        episode_id=str(item.get("episode_id") or "") or None,
+        start_ms=int(item.get("start_ms") or 0),
+        end_ms=int(item.get("end_ms") or 0),
+        text=str(item.get("text") or ""),
+        speaker_text=item.get("speaker_text"),
+        tokens=[str(v) for v in item["tokens"]] if item.get("tokens") is not None else None,
+    )
 
-def _simple_embedding(text: str) -> list[float]:
-    base = [0.0, 0.0, 0.0, 0.0]
-    for idx, ch in enumerate((text or "")[:120]):
-        base[idx % 4] += (ord(ch) % 97) / 97.0
-    return [round(value / max(1, len((text or "")[:120])), 6) for value in base]
 
+def pgvector_candidates_stmt(
+    *,
+    episode_id: str,
+    current_time_ms: int,
+    query_embedding: list[float],
+    candidate_limit: int,
+):
+    """Filtered ANN query; ORDER BY must stay the bare distance so the index is usable."""
 
-def _cosine_similarity(a: list[float], b: list[float]) -> float:
-    if not a or not b or len(a) != len(b):
-        return 0.0
-    dot = sum(x * y for x, y in zip(a, b))
-    norm_a = sum(x * x for x in a) ** 0.5
-    norm_b = sum(y * y for y in b) ** 0.5
-    if norm_a == 0.0 or norm_b == 0.0:
-        return 0.0
-    return max(-1.0, min(1.0, dot / (norm_a * norm_b)))
+    return (
+        select(SubtitleChunk)
+        .where(
+            SubtitleChunk.episode_id == episode_id,
+            SubtitleChunk.start_ms <= current_time_ms,
+            SubtitleChunk.embedding.is_not(None),
+        )
+        .order_by(SubtitleChunk.embedding.cosine_distance(query_embedding))
+        .limit(candidate_limit)
+    )
 
 
 def _retrieve_chunks_with_pgvector(
@@ -100,28 +112,167 @@ def _retrieve_chunks_with_pgvector(
     """Use pgvector SQL distance when available.
 
     This path is attempted for PostgreSQL and falls back automatically on errors.
+    It runs in a savepoint so a failure does not abort the request transaction.
     """
 
-    stmt = (
-        select(SubtitleChunk)
-        .where(
-            SubtitleChunk.episode_id == episode_id,
-            SubtitleChunk.start_ms <= current_time_ms,
-            SubtitleChunk.embedding.is_not(None),
+    candidate_limit = max(limit, limit * get_settings().pgvector_candidate_multiplier)
+    with db.begin_nested():
+        apply_vector_search_settings(db, candidate_limit=candidate_limit)
+        stmt = pgvector_candidates_stmt(
+            episode_id=episode_id,
+            current_time_ms=current_time_ms,
+            query_embedding=query_embedding,
+            candidate_limit=candidate_limit,
         )
-        .order_by(SubtitleChunk.embedding.cosine_distance(query_embedding))
-        .limit(max(40, limit * 8))
-    )
-    rows = list(db.scalars(stmt).all())
-    return [
-        RetrievalChunk(
-            start_ms=row.start_ms,
-            text_concat=row.text_concat,
-            subtitle_line_ids=row.subtitle_line_ids or [],
-            embedding=row.embedding,
+        return [_chunk_from_row(row) for row in db.scalars(stmt).all()]
+
+
+VECTOR_BACKENDS = ("exact", "ivf", "scenes")
+
+
+def _apply_vector_backend(index: EpisodeIndex) -> EpisodeIndex:
+    settings = get_settings()
+    backend = settings.retrieval_vector_backend
+    if backend not in VECTOR_BACKENDS:
+        raise ValueError(f"Unknown retrieval_vector_backend: {backend}")
+    if backend == "ivf" and len(index) >= settings.ivf_min_chunks:
+        index.use_ivf(lists=settings.ivf_lists, probes=settings.ivf_probes)
+    elif backend == "scenes" and len(index) >= settings.ivf_min_chunks:
+        index.use_scenes(max_chunks=settings.retrieval_scene_max_chunks, probes=settings.retrieval_scene_probes)
+    else:
+        index.ivf = None
+    return index
+
+
+def _build_episode_index(db: Session, episode_id: str, *, until_ms: int | None = None) -> EpisodeIndex:
+    """Build from the Redis slices up to ``until_ms`` (the whole episode by default), else the database.
+
+    Lines come from the same slices, so queries resolve evidence from the index.
+    A cache miss is refilled by one request per episode while the others wait.
+    """
+
+    cached = get_or_fill_cached_episode(db, episode_id, until_ms=until_ms)
+    horizon_ms = None
+    generation = None
+    if cached is not None:
+        logger.info(
+            "rag_cache_hit episode_id=%s cache_chunks=%s horizon_ms=%s", episode_id, len(cached.chunks), cached.horizon_ms
         )
-        for row in rows
-    ]
+        chunks = [_chunk_from_cache_item(item) for item in cached.chunks]
+        lines = [_line_from_cache_item(item) for item in cached.lines]
+        horizon_ms = cached.horizon_ms
+        generation = cached.generation
+    else:
+        logger.info("rag_cache_miss episode_id=%s", episode_id)
+        rows = db.scalars(
+            select(SubtitleChunk)
+            .where(SubtitleChunk.episode_id == episode_id)
+            .order_by(SubtitleChunk.start_ms.asc())
+        ).all()
+        chunks = [_chunk_from_row(row) for row in rows]
+        line_rows = db.scalars(select(SubtitleLine).where(SubtitleLine.episode_id == episode_id)).all()
+        lines = [_line_from_row(row) for row in line_rows]
+
+    settings = get_settings()
+    index = EpisodeIndex(
+        chunks,
+        tokenize=chunk_terms,
+        window=settings.retrieval_window_chunks,
+        lines=lines,
+        scene_gap_ms=settings.chunk_scene_gap_ms,
+        horizon_ms=horizon_ms,
+        generation=generation,
+    )
+    logger.info("rag_index_built episode_id=%s chunks=%s dim=%s", episode_id, len(index), index.dim)
+    return _apply_vector_backend(index)
+
+
+def _map_episode_artifact(episode_id: str) -> EpisodeIndex | None:
+    """Map the episode's artifact if it matches the current episode cache generation.
+
+    An ingest on another host only reaches this host as a new manifest, so an
+    artifact built from an older generation, or one that cannot be checked
+    because the manifest is gone, is rebuilt instead of mapped.
+    """
+
+    generation = None
+    if is_cache_enabled():
+        generation = get_cached_generation(episode_id)
+        if generation is None:
+            return None
+    settings = get_settings()
+    index = load_episode_artifact(
+        episode_id,
+        tokenize=chunk_terms,
+        window=settings.retrieval_window_chunks,
+        scene_gap_ms=settings.chunk_scene_gap_ms,
+        generation=generation,
+    )
+    if index is not None:
+        logger.info("rag_index_mapped episode_id=%s chunks=%s", episode_id, len(index))
+        _apply_vector_backend(index)
+    return index
+
+
+def _publish_episode_index(db: Session, episode_id: str) -> EpisodeIndex:
+    """Build the index, write its artifact and serve the mapped copy.
+
+    Serving the mapping rather than the freshly built arrays keeps one
+    page-cache copy per host however many workers load the episode. The
+    built index is returned when artifacts are disabled or the write fails.
+    """
+
+    index = _build_episode_index(db, episode_id)
+    try:
+        written = write_episode_artifact(index, episode_id)
+    except OSError:
+        logger.exception("rag_index_artifact_write_failed episode_id=%s", episode_id)
+        return index
+    if written is None:
+        return index
+    return _map_episode_artifact(episode_id) or index
+
+
+def load_episode_index(db: Session, episode_id: str, *, current_time_ms: int | None = None) -> EpisodeIndex:
+    """Return the in-process index for an episode.
+
+    Lookup order is the process registry, the memory-mapped artifact, then a
+    build. Builds run under a host-wide lock and publish an artifact, so each
+    episode is built once per host and every other worker maps the result.
+    The spoiler cutoff is applied per query.
+
+    Without artifacts the index is built from the cached slices up to
+    ``current_time_ms`` only, and rebuilt with more slices once a request
+    passes its horizon.
+    """
+
+    index = get_episode_index(episode_id)
+    if index is not None and index.covers(current_time_ms):
+        return index
+
+    index = _map_episode_artifact(episode_id)
+    if index is None and artifact_path(episode_id) is None:
+        index = _build_episode_index(db, episode_id, until_ms=current_time_ms)
+    elif index is None:
+        with artifact_build_lock(episode_id):
+            # Another worker may have published the artifact while we waited.
+            index = _map_episode_artifact(episode_id) or _publish_episode_index(db, episode_id)
+    store_episode_index(episode_id, index)
+    return index
+
+
+def warm_episode_index(db: Session, episode_id: str) -> EpisodeIndex:
+    """Rebuild the episode index eagerly and rewrite its on-disk artifact.
+
+    Called right after ingest or cache warmup so other workers map the fresh
+    artifact instead of rebuilding.
+    """
+
+    drop_episode_index(episode_id)
+    with artifact_build_lock(episode_id):
+        index = _publish_episode_index(db, episode_id)
+    store_episode_index(episode_id, index)
+    return index
 
 
 def retrieve_chunks(
@@ -134,10 +285,8 @@ def retrieve_chunks(
 ) -> list[RetrievalChunk]:
     settings = get_settings()
     limit = top_k or settings.retrieval_top_k
-    query_tokens = _tokenize(query)
-    query_embedding = _simple_embedding(query)
+    query_embedding = embed_query(query)
 
-    chunks: list[RetrievalChunk] = []
     bind = getattr(db, "bind", None)
     dialect = getattr(bind, "dialect", None)
     dialect_name = getattr(dialect, "name", "")
@@ -155,62 +304,173 @@ def retrieve_chunks(
         except Exception as exc:
             logger.warning("rag_pgvector_fallback episode_id=%s reason=%s", episode_id, exc)
             chunks = []
-
-    if not chunks:
-        cached = get_cached_episode_chunks(episode_id)
-        if cached:
-            logger.info(
-                "rag_cache_hit episode_id=%s cache_chunks=%s current_time_ms=%s",
-                episode_id,
-                len(cached),
-                current_time_ms,
-            )
-            chunks = [
-                RetrievalChunk(
-                    start_ms=int(item.get("start_ms") or 0),
-                    text_concat=str(item.get("text_concat") or ""),
-                    subtitle_line_ids=[str(v) for v in (item.get("subtitle_line_ids") or [])],
-                    embedding=[float(v) for v in (item.get("embedding") or [])] or None,
-                )
-                for item in cached
-                if int(item.get("start_ms") or 0) <= current_time_ms
-            ]
-            chunks.sort(key=lambda item: item.start_ms, reverse=True)
-            chunks = chunks[:120]
-        else:
-            logger.info("rag_cache_miss episode_id=%s current_time_ms=%s", episode_id, current_time_ms)
-            stmt = (
-                select(SubtitleChunk)
-                .where(
-                    SubtitleChunk.episode_id == episode_id,
-                    SubtitleChunk.start_ms <= current_time_ms,
-                )
-                .order_by(SubtitleChunk.start_ms.desc())
-                .limit(120)
+        if chunks:
+            # Final hybrid rerank (lexical + vector) over the ANN candidates.
+            return EpisodeIndex(chunks, tokenize=chunk_terms).search(
+                query=query,
+                query_embedding=query_embedding,
+                current_time_ms=current_time_ms,
+                limit=limit,
             )
-            rows = list(db.scalars(stmt).all())
-            chunks = [
-                RetrievalChunk(
-                    start_ms=row.start_ms,
-                    text_concat=row.text_concat,
-                    subtitle_line_ids=row.subtitle_line_ids or [],
-                    embedding=row.embedding,
-                )
-                for row in rows
-            ]
-
-    if not chunks:
+
+    index = load_episode_index(db, episode_id, current_time_ms=current_time_ms)
+    return index.search(
+        query=query,
+        query_embedding=query_embedding,
+        current_time_ms=current_time_ms,
+        limit=limit,
+    )
+
+
+def load_title_index(db: Session, title_id: str) -> TitleIndex:
+    """Return the in-process index over every episode of a title.
+
+    Built from one query over the title's chunks, ordered by
+    ``(season, episode_number, start_ms)``, instead of one query per episode.
+    """
+
+    index = get_title_index(title_id)
+    if index is not None:
+        return index
+
+    episodes = db.execute(
+        select(Episode.id)
+        .where(Episode.title_id == title_id)
+        .order_by(Episode.season.asc(), Episode.episode_number.asc(), Episode.id.asc())
+    ).all()
+    episode_order = {row.id: ordinal for ordinal, row in enumerate(episodes)}
+    rows = db.scalars(
+        select(SubtitleChunk)
+        .join(Episode, Episode.id == SubtitleChunk.episode_id)
+        .where(Episode.title_id == title_id)
+        .order_by(Episode.season.asc(), Episode.episode_number.asc(), SubtitleChunk.start_ms.asc())
+    ).all()
+    lines = db.scalars(
+        select(SubtitleLine)
+        .join(Episode, Episode.id == SubtitleLine.episode_id)
+        .where(Episode.title_id == title_id)
+    ).all()
+
+    settings = get_settings()
+    index = TitleIndex(
+        [_chunk_from_row(row) for row in rows],
+        episode_order=episode_order,
+        tokenize=chunk_terms,
+        window=settings.retrieval_window_chunks,
+        lines=[_line_from_row(row) for row in lines],
+        scene_gap_ms=settings.chunk_scene_gap_ms,
+    )
+    _apply_vector_backend(index)
+    store_title_index(title_id, index)
+    logger.info("rag_title_index_built title_id=%s episodes=%s chunks=%s", title_id, len(episode_order), len(index))
+    return index
+
+
+def retrieve_title_chunks(
+    db: Session,
+    *,
+    title_id: str,
+    episode_id: str,
+    current_time_ms: int,
+    query: str,
+    top_k: int | None = None,
+) -> list[RetrievalChunk]:
+    """Search every chunk the viewer has already seen across the whole title.
+
+    Earlier episodes are fully searchable; the current episode is cut at
+    ``current_time_ms`` and later episodes are excluded.
+    """
+
+    settings = get_settings()
+    limit = top_k or settings.retrieval_top_k
+    index = load_title_index(db, title_id)
+    if episode_id not in index.episode_order:
+        # Episode added after the index was built.
+        drop_title_index(title_id)
+        index = load_title_index(db, title_id)
+    return index.search_title(
+        episode_id=episode_id,
+        current_time_ms=current_time_ms,
+        query=query,
+        query_embedding=embed_query(query),
+        limit=limit,
+    )
+
+
+def previous_episode_ids(db: Session, *, title_id: str, episode_id: str) -> list[str]:
+    """Episodes of the title ordered before ``episode_id`` by (season, episode_number)."""
+
+    current = db.execute(
+        select(Episode.season, Episode.episode_number).where(Episode.id == episode_id, Episode.title_id == title_id)
+    ).first()
+    if current is None:
         return []
+    return list(
+        db.scalars(
+            select(Episode.id).where(
+                Episode.title_id == title_id,
+                or_(
+                    Episode.season < current.season,
+                    and_(Episode.season == current.season, Episode.episode_number < current.episode_number),
+                ),
+            )
+        ).all()
+    )
+
+
+def resolve_lines_from_title_chunks(
+    db: Session,
+    *,
+    title_id: str,
+    episode_id: str,
+    current_time_ms: int,
+    chunks: list[RetrievalChunk],
+    max_lines: int = 6,
+    prior_episode_ids: Collection[str] | None = None,
+) -> list[SubtitleLine | LineRecord]:
+    """Resolve title-wide chunks to lines, keeping the cross-episode time guard.
 
-    # Final hybrid rerank (lexical + vector) to keep behavior stable.
-    scored: list[tuple[RetrievalChunk, float]] = []
+    Lines from earlier episodes are allowed in full; lines from the current
+    episode must start at or before ``current_time_ms``. Lines keep the chunk
+    ranking order (best chunk first) and come from the cached title index
+    when it holds them.
+    """
+
+    line_ids: list[str] = []
     for chunk in chunks:
-        lexical = _score_tokens(query_tokens, chunk.text_concat)
-        vector = _cosine_similarity(query_embedding, chunk.embedding or [])
-        score = (0.35 * lexical) + (0.65 * max(0.0, vector))
-        scored.append((chunk, score))
-    scored.sort(key=lambda item: (item[1], item[0].start_ms), reverse=True)
-    return [chunk for chunk, _ in scored[:limit]]
+        line_ids.extend(chunk.subtitle_line_ids or [])
+    if not line_ids:
+        return []
+
+    prior = (
+        previous_episode_ids(db, title_id=title_id, episode_id=episode_id)
+        if prior_episode_ids is None
+        else prior_episode_ids
+    )
+    index = get_title_index(title_id)
+    if index is not None:
+        resolved = index.resolve_ranked_lines(
+            chunks,
+            episode_id=episode_id,
+            current_time_ms=current_time_ms,
+            prior_episode_ids=set(prior),
+            max_lines=max_lines,
+        )
+        if resolved is not None:
+            return resolved
+
+    rows = db.scalars(
+        select(SubtitleLine).where(
+            SubtitleLine.id.in_(line_ids),
+            or_(
+                SubtitleLine.episode_id.in_(prior),
+                and_(SubtitleLine.episode_id == episode_id, SubtitleLine.start_ms <= current_time_ms),
+            ),
+        )
+    ).all()
+    by_id = {row.id: row for row in rows}
+    ordered = [by_id[line_id] for line_id in dict.fromkeys(line_ids) if line_id in by_id]
+    return ordered[:max_lines]
 
 
 def resolve_lines_from_chunks(
@@ -220,7 +480,7 @@ def resolve_lines_from_chunks(
     current_time_ms: int,
     chunks: list[RetrievalChunk],
     max_lines: int = 6,
-) -> list[SubtitleLine]:
+) -> list[SubtitleLine | LineRecord]:
     line_ids: list[str] = []
     for chunk in chunks:
         line_ids.extend(chunk.subtitle_line_ids or [])
@@ -228,6 +488,17 @@ def resolve_lines_from_chunks(
     if not line_ids:
         return []
 
+    index = get_episode_index(episode_id)
+    if index is not None:
+        resolved = index.resolve_lines(
+            chunks,
+            episode_id=episode_id,
+            current_time_ms=current_time_ms,
+            max_lines=max_lines,
+        )
+        if resolved is not None:
+            return resolved
+
     stmt = (
         select(SubtitleLine)
         .where(
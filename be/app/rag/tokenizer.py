@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable
+from functools import lru_cache
+
+# Shared tokenizer for retrieval, evidence reranking and intent classification.
+# Every flavour starts from the same lowercased word scan; hot strings (the
+# question of the current request) are memoized, while the batch functions used
+# at ingest bypass the caches so one-off subtitle texts do not evict them.
+
+WORD_RE = re.compile(r"[a-z0-9\uAC00-\uD7A3]+")
+TOKEN_CACHE_SIZE = 4096
+
+# Chunk terms: words with repeats, used for BM25 postings.
+MIN_TOKEN_LEN = 2
+STOPWORDS = {
+    "the",
+    "a",
+    "an",
+    "of",
+    "to",
+    "in",
+    "on",
+    "at",
+    "for",
+    "and",
+    "or",
+    "is",
+    "are",
+    "was",
+    "were",
+    "be",
+    "been",
+    "being",
+    "it",
+    "this",
+    "that",
+    "with",
+    "as",
+    "by",
+}
+
+# Line/question tokens: normalized with Korean particle stripping and compared
+# as sets when reranking evidence lines.
+QUERY_STOPWORDS = {
+    "이", "그", "저", "것", "수", "좀", "더", "그리고", "근데", "그럼", "정말",
+    "은", "는", "이야", "가", "을", "를", "에", "의", "와", "과", "도", "로", "으로",
+    "a", "an", "the", "is", "are", "was", "were", "be", "to", "of", "in", "on", "and",
+}
+KO_SUFFIXES = (
+    "으로부터", "에게서", "까지는", "까지도", "이라도", "처럼", "부터", "까지",
+    "으로", "에서", "에게", "한테", "께서", "의", "은", "는", "이", "가", "을", "를",
+    "와", "과", "도", "만", "나", "야", "요",
+)
+MIN_STEM_LEN = 2
+
+
+def _build_suffix_trie(suffixes: Iterable[str]) -> dict:
+    """Trie over reversed suffixes; a node's ``""`` key marks a complete suffix."""
+
+    root: dict = {}
+    for suffix in suffixes:
+        node = root
+        for char in reversed(suffix):
+            node = node.setdefault(char, {})
+        node[""] = len(suffix)
+    return root
+
+
+_SUFFIX_TRIE = _build_suffix_trie(KO_SUFFIXES)
+
+
+def _scan(text: str) -> list[str]:
+    return WORD_RE.findall((text or "").lower())
+
+
+def strip_suffix(token: str) -> str:
+    """Drop the longest particle suffix that leaves a stem of at least two characters."""
+
+    node = _SUFFIX_TRIE
+    cut = 0
+    for depth, char in enumerate(reversed(token), start=1):
+        node = node.get(char)
+        if node is None or len(token) - depth < MIN_STEM_LEN:
+            break
+        if "" in node:
+            cut = depth
+    return token[:-cut] if cut else token
+
+
+def normalize_token(token: str) -> str:
+    t = token.lower().strip()
+    if len(t) < 2:
+        return t
+    return strip_suffix(t)
+
+
+def _terms(tokens: Iterable[str]) -> list[str]:
+    return [
+        token
+        for token in tokens
+        if token not in STOPWORDS and (token.isdigit() or len(token) >= MIN_TOKEN_LEN)
+    ]
+
+
+def _query_token_set(tokens: Iterable[str]) -> frozenset[str]:
+    normalized = (strip_suffix(token) if len(token) >= 2 else token for token in tokens)
+    return frozenset(t for t in normalized if len(t) >= 2 and t not in QUERY_STOPWORDS)
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def words(text: str) -> tuple[str, ...]:
+    """Lowercased word tokens, no filtering (intent classification)."""
+
+    return tuple(_scan(text))
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def _cached_terms(text: str) -> tuple[str, ...]:
+    return tuple(_terms(words(text)))
+
+
+def chunk_terms(text: str) -> list[str]:
+    """BM25 terms of a text, in order and with repeats."""
+
+    return list(_cached_terms(text or ""))
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def query_tokens(text: str) -> frozenset[str]:
+    """Normalized token set of a question or line."""
+
+    return _query_token_set(words(text or ""))
+
+
+def line_tokens(text: str, speaker_text: str | None = None) -> list[str]:
+    """Token features stored on a subtitle line at ingest (sorted, unique)."""
+
+    return sorted(_query_token_set(_scan(f"{speaker_text or ''} {text or ''}")))
+
+
+def line_token_set(line) -> set[str]:
+    """Stored line features, computed on the fly for rows ingested before they existed."""
+
+    stored = getattr(line, "tokens", None)
+    if stored is not None:
+        return set(stored)
+    return set(line_tokens(getattr(line, "text", ""), getattr(line, "speaker_text", None)))
+
+
+def chunk_terms_batch(texts: Iterable[str]) -> list[list[str]]:
+    """Uncached ``chunk_terms`` for ingest."""
+
+    return [_terms(_scan(text)) for text in texts]
+
+
+def line_tokens_batch(lines: Iterable[tuple[str, str | None]]) -> list[list[str]]:
+    """Uncached ``line_tokens`` for ``(text, speaker_text)`` pairs at ingest."""
+
+    return [line_tokens(text, speaker_text) for text, speaker_text in lines]
+
+
+def tokenizer_cache_info() -> dict[str, dict[str, int]]:
+    return {
+        name: func.cache_info()._asdict()
+        for name, func in (("words", words), ("terms", _cached_terms), ("query_tokens", query_tokens))
+    }
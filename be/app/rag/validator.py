@@ -1,5 +1,8 @@
 ﻿from __future__ import annotations
 
+from collections.abc import Collection, Mapping
+from typing import Any
+
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
@@ -22,24 +25,44 @@ def sanitize_evidences(
     episode_id: str,
     current_time_ms: int,
     warnings: list[WarningItem],
+    prior_episode_ids: Collection[str] = (),
+    known_lines: Mapping[str, Any] | None = None,
 ) -> list[Evidence]:
+    """Drop evidence lines that are missing, from another episode or after ``current_time_ms``.
+
+    ``prior_episode_ids`` (title-wide retrieval) lists already-watched episodes
+    whose lines are allowed in full. ``known_lines`` maps line ids to lines
+    the caller already holds (index records or rows); only the other ids are
+    loaded, in one query.
+    """
+
+    subtitles: dict[str, Any] = {}
+    wanted = {line.subtitle_line_id for evidence in evidences for line in evidence.lines[:2]}
+    for line_id in wanted:
+        if known_lines is not None and line_id in known_lines:
+            subtitles[line_id] = known_lines[line_id]
+    missing = wanted - subtitles.keys()
+    if missing:
+        subtitles.update({row.id: row for row in db.scalars(select(SubtitleLine).where(SubtitleLine.id.in_(missing)))})
+
     sanitized: list[Evidence] = []
 
     for evidence in evidences:
         clean_lines = []
         for line in evidence.lines[:2]:
-            subtitle = db.scalar(select(SubtitleLine).where(SubtitleLine.id == line.subtitle_line_id))
+            subtitle = subtitles.get(line.subtitle_line_id)
             if subtitle is None:
                 warnings.append(
                     WarningItem(code='EVIDENCE_LINE_REMOVED', message='존재하지 않는 근거 라인이 제거되었습니다.')
                 )
                 continue
-            if subtitle.episode_id != episode_id:
+            from_prior_episode = subtitle.episode_id in prior_episode_ids
+            if subtitle.episode_id != episode_id and not from_prior_episode:
                 warnings.append(
                     WarningItem(code='EVIDENCE_EPISODE_MISMATCH', message='다른 회차 근거가 제거되었습니다.')
                 )
                 continue
-            if subtitle.start_ms > current_time_ms:
+            if subtitle.start_ms > current_time_ms and not from_prior_episode:
                 warnings.append(
                     WarningItem(code='TIME_GUARD_EVIDENCE_REMOVED', message='현재 시점 이후 근거가 제거되었습니다.')
                 )
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import Protocol
+
+# Key/value stores behind the episode cache. Values are the encoded payloads
+# (str for JSON, bytes for the binary format) and come back as stored; every
+# key carries its own expiry.
+
+CACHE_BACKENDS = ('redis', 'memory', 'disk', 'none')
+
+# Deletes a lease key only if it still holds the caller's token.
+RELEASE_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class CacheBackend(Protocol):
+    """Store used by ``cache_service`` for episode payloads and fill leases.
+
+    ``shared`` backends are visible to every host and deliver invalidation
+    messages; the others ignore ``messages``.
+    """
+
+    name: str
+    shared: bool
+
+    def mget(self, keys: Sequence[str]) -> list[str | bytes | None]: ...
+
+    def write(
+        self,
+        *,
+        sets: Sequence[tuple[str, str | bytes]],
+        ttl_seconds: int,
+        deletes: Iterable[str] = (),
+        messages: Sequence[tuple[str, str]] = (),
+    ) -> None:
+        """Apply every set, delete and message atomically."""
+
+    def add(self, key: str, value: str, ttl_ms: int) -> bool:
+        """Set ``key`` only if absent (or expired); ``True`` when this call set it."""
+
+    def release(self, key: str, token: str) -> None:
+        """Delete ``key`` if it still holds ``token``."""
+
+
+class RedisCacheBackend:
+    name = 'redis'
+    shared = True
+
+    def __init__(self, client) -> None:
+        self.client = client
+
+    def mget(self, keys: Sequence[str]) -> list[str | bytes | None]:
+        return self.client.mget(list(keys))
+
+    def write(self, *, sets, ttl_seconds, deletes=(), messages=()) -> None:
+        pipe = self.client.pipeline()
+        for key, value in sets:
+            pipe.setex(key, ttl_seconds, value)
+        deletes = list(deletes)
+        if deletes:
+            pipe.delete(*deletes)
+        for channel, message in messages:
+            pipe.publish(channel, message)
+        pipe.execute()
+
+    def add(self, key: str, value: str, ttl_ms: int) -> bool:
+        return bool(self.client.set(key, value, nx=True, px=max(1, ttl_ms)))
+
+    def release(self, key: str, token: str) -> None:
+        self.client.eval(RELEASE_LEASE_SCRIPT, 1, key, token)
+
+
+class MemoryCacheBackend:
+    """Process-local store bounded by the total size of its values, least recently used first out.
+
+    For single-worker deployments: other workers neither see its entries nor
+    its invalidations.
+    """
+
+    name = 'memory'
+    shared = False
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max(1, int(max_bytes))
+        self.size = 0
+        self._items: OrderedDict[str, tuple[float, str | bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, key: str, now: float) -> str | bytes | None:
+        entry = self._items.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            self._remove(key)
+            return None
+        self._items.move_to_end(key)
+        return entry[1]
+
+    def _remove(self, key: str) -> None:
+        entry = self._items.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+    def _put(self, key: str, value: str | bytes, expires_at: float) -> None:
+        self._remove(key)
+        self._items[key] = (expires_at, value)
+        self.size += len(value)
+        while self.size > self.max_bytes and len(self._items) > 1:
+            self._remove(next(iter(self._items)))
+
+    def mget(self, keys: Sequence[str]) -> list[str | bytes | None]:
+        now = time.monotonic()
+        with self._lock:
+            return [self._live(key, now) for key in keys]
+
+    def write(self, *, sets, ttl_seconds, deletes=(), messages=()) -> None:
+        expires_at = time.monotonic() + ttl_seconds
+        with self._lock:
+            for key in deletes:
+                self._remove(key)
+            for key, value in sets:
+                self._put(key, value, expires_at)
+
+    def add(self, key: str, value: str, ttl_ms: int) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if self._live(key, now) is not None:
+                return False
+            self._put(key, value, now + max(1, ttl_ms) / 1000)
+            return True
+
+    def release(self, key: str, token: str) -> None:
+        with self._lock:
+            if self._live(key, time.monotonic()) == token:
+                self._remove(key)
+
+
+class DiskCacheBackend:
+    """SQLite file shared by the workers of one host; entries survive restarts.
+
+    Expired rows are ignored on read and purged on write. There is no
+    pub/sub: other workers pick up new payloads when their own process-level
+    caches expire.
+    """
+
+    name = 'disk'
+    shared = False
+    # SQLite's default limit on bound parameters is 999.
+    BATCH = 500
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entries '
+                '(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)'
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections are not shareable across threads.
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=5.0)
+        return conn
+
+    def mget(self, keys: Sequence[str]) -> list[str | bytes | None]:
+        conn = self._connect()
+        now = time.time()
+        found: dict[str, str | bytes] = {}
+        keys = list(keys)
+        for start in range(0, len(keys), self.BATCH):
+            batch = keys[start : start + self.BATCH]
+            rows = conn.execute(
+                f'SELECT key, value FROM cache_entries WHERE expires_at > ? AND key IN ({",".join("?" * len(batch))})',
+                (now, *batch),
+            )
+            found.update(rows)
+        return [found.get(key) for key in keys]
+
+    def write(self, *, sets, ttl_seconds, deletes=(), messages=()) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany('DELETE FROM cache_entries WHERE key = ?', [(key,) for key in deletes])
+            conn.executemany(
+                'INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)',
+                [(key, value, now + ttl_seconds) for key, value in sets],
+            )
+            conn.execute('DELETE FROM cache_entries WHERE expires_at <= ?', (now,))
+
+    def add(self, key: str, value: str, ttl_ms: int) -> bool:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('DELETE FROM cache_entries WHERE key = ? AND expires_at <= ?', (key, now))
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, value, now + max(1, ttl_ms) / 1000),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, key: str, token: str) -> None:
+        with self._connect() as conn:
+            conn.execute('DELETE FROM cache_entries WHERE key = ? AND value = ?', (key, token))
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import json
+import struct
+import zlib
+from typing import Any
+
+import numpy as np
+
+# Versioned binary encoding of the episode cache payloads (lists of chunk or
+# line dicts). Layout:
+#
+#   MAGIC | u8 version | u8 kind | u32 row count | per field: u32 size + section
+#
+# Field sections are column-wise. Integers are zigzag varints of the delta to
+# the previous row; strings (text, ids, tokens) are indexes into one interned
+# string table, NUL-separated and zlib-compressed, stored last; embeddings are a
+# packed float32 matrix with a presence mask. Readers detect the format from
+# the leading bytes, so JSON and binary entries can coexist during a rollout.
+
+MAGIC = b'NPXC'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBBI')
+SIZE = struct.Struct('<I')
+
+CHUNK_FIELDS = (
+    ('id', 'str'),
+    ('episode_id', 'str'),
+    ('start_ms', 'int'),
+    ('end_ms', 'int'),
+    ('text_concat', 'str'),
+    ('subtitle_line_ids', 'strlist'),
+    ('embedding', 'floats'),
+    ('tokens', 'strlist'),
+)
+LINE_FIELDS = (
+    ('id', 'str'),
+    ('episode_id', 'str'),
+    ('start_ms', 'int'),
+    ('end_ms', 'int'),
+    ('speaker_text', 'str'),
+    ('text', 'str'),
+    ('tokens', 'strlist'),
+)
+KIND_CHUNKS = 1
+KIND_LINES = 2
+KINDS = {KIND_CHUNKS: CHUNK_FIELDS, KIND_LINES: LINE_FIELDS}
+FORMATS = ('json', 'binary')
+
+
+class CacheFormatError(ValueError):
+    """Payload with an unknown version or a damaged layout."""
+
+
+def _put_varint(out: bytearray, value: int) -> None:
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_all_varints(data: bytes) -> np.ndarray:
+    """Decode a section made only of varints, vectorized."""
+
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if not raw.size:
+        return np.empty(0, dtype=np.int64)
+    ends = np.flatnonzero(raw < 0x80)
+    if not ends.size or ends[-1] != raw.size - 1:
+        raise CacheFormatError('truncated varint')
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    shifts = (np.arange(raw.size) - np.repeat(starts, ends - starts + 1)) * 7
+    if shifts.max() > 56:
+        raise CacheFormatError('varint too long')
+    parts = (raw & 0x7F).astype(np.int64) << shifts.astype(np.int64)
+    return np.add.reduceat(parts, starts)
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+class _StringTable:
+    # Index 0 is reserved for None.
+    def __init__(self) -> None:
+        self.index: dict[str, int] = {}
+        self.values: list[str] = []
+
+    def ref(self, value: str | None) -> int:
+        if value is None:
+            return 0
+        found = self.index.get(value)
+        if found is None:
+            self.values.append(value)
+            found = self.index[value] = len(self.values)
+        return found
+
+    def encode(self) -> bytes:
+        # NUL-separated utf-8, zlib-compressed; decoded with one bytes.split.
+        if any('\x00' in value for value in self.values):
+            raise CacheFormatError('NUL in cached string')
+        return zlib.compress('\x00'.join(self.values).encode('utf-8'), 6)
+
+
+def _decode_table(section: bytes, size: int) -> list[str | None]:
+    raw = zlib.decompress(section).decode('utf-8')
+    values = raw.split('\x00') if size else []
+    if len(values) != size:
+        raise CacheFormatError('string table size mismatch')
+    return [None, *values]
+
+
+def _encode_ints(rows: list[dict[str, Any]], name: str) -> bytes:
+    out = bytearray()
+    previous = 0
+    for row in rows:
+        value = int(row.get(name) or 0)
+        _put_varint(out, _zigzag(value - previous))
+        previous = value
+    return bytes(out)
+
+
+def _encode_strs(rows: list[dict[str, Any]], name: str, table: _StringTable) -> bytes:
+    out = bytearray()
+    for row in rows:
+        _put_varint(out, table.ref(row.get(name)))
+    return bytes(out)
+
+
+def _encode_strlists(rows: list[dict[str, Any]], name: str, table: _StringTable) -> bytes:
+    # One size per row (0 for None, else len + 1), then every string ref.
+    sizes = bytearray()
+    refs = bytearray()
+    for row in rows:
+        values = row.get(name)
+        if values is None:
+            _put_varint(sizes, 0)
+            continue
+        _put_varint(sizes, len(values) + 1)
+        for value in values:
+            _put_varint(refs, table.ref(str(value)))
+    return bytes(sizes) + bytes(refs)
+
+
+def _encode_floats(rows: list[dict[str, Any]], name: str) -> bytes:
+    dims = {len(row[name]) for row in rows if row.get(name)}
+    if len(dims) > 1:
+        raise CacheFormatError(f'mixed {name} dimensions: {sorted(dims)}')
+    dim = dims.pop() if dims else 0
+    present = np.asarray([bool(row.get(name)) for row in rows], dtype=np.uint8)
+    matrix = np.asarray([row[name] for row in rows if row.get(name)], dtype=np.float32).reshape(int(present.sum()), dim)
+    return SIZE.pack(dim) + present.tobytes() + matrix.tobytes()
+
+
+def encode_payload(rows: list[dict[str, Any]], kind: int) -> bytes:
+    fields = KINDS[kind]
+    table = _StringTable()
+    sections: list[bytes] = []
+    for name, field_type in fields:
+        if field_type == 'int':
+            sections.append(_encode_ints(rows, name))
+        elif field_type == 'str':
+            sections.append(_encode_strs(rows, name, table))
+        elif field_type == 'strlist':
+            sections.append(_encode_strlists(rows, name, table))
+        else:
+            sections.append(_encode_floats(rows, name))
+    sections.append(SIZE.pack(len(table.values)) + table.encode())
+    body = b''.join(SIZE.pack(len(section)) + section for section in sections)
+    return HEADER.pack(MAGIC, FORMAT_VERSION, kind, len(rows)) + body
+
+
+def decode_payload(data: bytes) -> list[dict[str, Any]]:
+    try:
+        magic, version, kind, count = HEADER.unpack_from(data)
+    except struct.error as exc:
+        raise CacheFormatError(str(exc)) from exc
+    if magic != MAGIC or version != FORMAT_VERSION or kind not in KINDS:
+        raise CacheFormatError(f'unsupported cache payload version={version} kind={kind}')
+    fields = KINDS[kind]
+    try:
+        sections: list[bytes] = []
+        pos = HEADER.size
+        for _ in range(len(fields) + 1):
+            (size,) = SIZE.unpack_from(data, pos)
+            sections.append(data[pos + SIZE.size : pos + SIZE.size + size])
+            pos += SIZE.size + size
+        (table_size,) = SIZE.unpack_from(sections[-1])
+        table = _decode_table(sections[-1][SIZE.size :], table_size)
+        columns = [_decode_column(field_type, section, count, table) for (_, field_type), section in zip(fields, sections)]
+    except (struct.error, zlib.error, IndexError, StopIteration, ValueError) as exc:
+        raise CacheFormatError(str(exc)) from exc
+    if any(len(column) != count for column in columns):
+        raise CacheFormatError('column length mismatch')
+    names = [name for name, _ in fields]
+    return [dict(zip(names, values)) for values in zip(*columns)]
+
+
+def _decode_column(field_type: str, section: bytes, count: int, table: list[str | None]) -> list[Any]:
+    if field_type == 'int':
+        zigzag = _read_all_varints(section)
+        return np.cumsum((zigzag >> 1) ^ -(zigzag & 1)).tolist()
+    if field_type == 'str':
+        return [table[ref] for ref in _read_all_varints(section).tolist()]
+    if field_type == 'strlist':
+        return _decode_strlists(section, count, table)
+    (dim,) = SIZE.unpack_from(section)
+    present = np.frombuffer(section, dtype=np.uint8, count=count, offset=SIZE.size).astype(bool).tolist()
+    if not dim:
+        return [None] * count
+    vectors = iter(np.frombuffer(section, dtype=np.float32, offset=SIZE.size + count).reshape(-1, dim).tolist())
+    return [next(vectors) if flag else None for flag in present]
+
+
+def _decode_strlists(section: bytes, count: int, table: list[str | None]) -> list[list[str] | None]:
+    values = _read_all_varints(section)
+    sizes = values[:count]
+    lengths = np.maximum(sizes - 1, 0)
+    if sizes.size != count or int(lengths.sum()) != values.size - count:
+        raise CacheFormatError('string list size mismatch')
+    strings = [table[ref] for ref in values[count:].tolist()]
+    ends = np.cumsum(lengths).tolist()
+    return [
+        strings[end - length : end] if size else None  # type: ignore[misc]
+        for size, length, end in zip(sizes.tolist(), lengths.tolist(), ends)
+    ]
+
+
+def dumps(rows: list[dict[str, Any]], *, kind: int, fmt: str) -> str | bytes:
+    if fmt == 'binary':
+        try:
+            return encode_payload(rows, kind)
+        except CacheFormatError:
+            # Rows the binary layout cannot hold are stored as JSON; readers detect either.
+            pass
+    elif fmt != 'json':
+        raise ValueError(f'Unknown episode_cache_format: {fmt}')
+    return json.dumps(rows, ensure_ascii=False)
+
+
+def loads(raw: str | bytes) -> list[dict[str, Any]] | None:
+    """Decode either format; ``None`` for payloads this build cannot read."""
+
+    if isinstance(raw, bytes) and raw.startswith(MAGIC):
+        try:
+            return decode_payload(raw)
+        except CacheFormatError:
+            return None
+    parsed = json.loads(raw)
+    return parsed if isinstance(parsed, list) else None
@@ -1,26 +1,148 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
+import logging
+import threading
+import time
+import uuid
+import weakref
+from collections.abc import Generator, Iterable
+from dataclasses import dataclass
 from functools import lru_cache
 from typing import Any
-import logging
 
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.core.config import get_settings
-from app.db.models import SubtitleChunk
+from app.db.models import Episode, SubtitleChunk, SubtitleLine
+from app.rag.episode_index import drop_episode_index, drop_title_index
+from app.rag.index_artifact import remove_episode_artifact
+from app.rag.result_cache import invalidate_retrieval_cache
+from app.services import cache_codec
+from app.services.cache_backends import (
+    CACHE_BACKENDS,
+    CacheBackend,
+    DiskCacheBackend,
+    MemoryCacheBackend,
+    RedisCacheBackend,
+)
+from app.utils.lru import LRUTTLCache
 
 try:
     import redis
+    import redis.asyncio as redis_asyncio
 except Exception:  # pragma: no cover - optional runtime dependency
     redis = None  # type: ignore[assignment]
+    redis_asyncio = None  # type: ignore[assignment]
 
 logger = logging.getLogger(__name__)
 
+# Identifies this process on the invalidation channel so it skips its own messages.
+PROCESS_ID = uuid.uuid4().hex
+INVALIDATION_RETRY_SECONDS = 5.0
+INVALIDATION_POLL_SECONDS = 1.0
+FILL_POLL_SECONDS = 0.05
+# Striped so concurrent fills of one episode serialize without a lock per episode.
+_FILL_LOCKS = [threading.Lock() for _ in range(64)]
+
+
+# Episode payloads are split into fixed start_ms slices so a reader fetches only
+# the slices up to the viewer's position. The manifest names the generation of
+# the slice keys: a hash of their content, so keys are never modified once
+# written and identical content maps to the same keys. Warmup writes the new
+# generation and swaps the manifest in one MULTI; previous generations are left
+# to expire, so a reader holding an older manifest still finds its slices.
+
+
+@dataclass(frozen=True)
+class CachedEpisode:
+    """Chunk and line payloads of the slices read from the cache.
+
+    ``horizon_ms`` is the last position the slices cover, or ``None`` when
+    every slice of the episode was read. ``generation`` is the manifest
+    generation the slices belong to.
+    """
+
+    chunks: list[dict[str, Any]]
+    lines: list[dict[str, Any]]
+    horizon_ms: int | None
+    generation: str
+
+
+def _key_episode_prefix(episode_id: str) -> str:
+    return f'netplus:episode:{episode_id}:'
+
+
+def _key_episode_manifest(episode_id: str) -> str:
+    return f'netplus:episode:{episode_id}:slices'
+
+
+def _key_episode_fill_lease(episode_id: str) -> str:
+    return f'netplus:episode:{episode_id}:fill'
+
+
+def _key_episode_slice(episode_id: str, generation: str, kind: str, slice_no: int) -> str:
+    return f'netplus:episode:{episode_id}:{generation}:{kind}:{slice_no}'
+
+
+def _slice_keys(episode_id: str, manifest: dict[str, Any], count: int | None = None) -> list[str]:
+    """Chunk keys then line keys of the first ``count`` slices (all by default)."""
+
+    count = manifest['slices'] if count is None else count
+    generation = manifest['generation']
+    return [
+        _key_episode_slice(episode_id, generation, kind, slice_no)
+        for kind in ('chunks', 'lines')
+        for slice_no in range(count)
+    ]
+
+
+def _slice_of(start_ms: int, slice_ms: int) -> int:
+    return max(0, start_ms) // slice_ms if slice_ms > 0 else 0
 
-def _key_episode_chunks(episode_id: str) -> str:
-    return f'netplus:episode:{episode_id}:chunks'
+
+def slice_episode_payloads(
+    chunks: list[dict[str, Any]],
+    lines: list[dict[str, Any]],
+    slice_ms: int,
+) -> tuple[list[list[dict[str, Any]]], list[list[dict[str, Any]]]]:
+    """Group payloads by ``start_ms // slice_ms``; ``slice_ms <= 0`` keeps one slice.
+
+    A line goes to the slice of the earliest chunk that references it, so any
+    prefix of slices resolves every line of its chunks.
+    """
+
+    count = 1 + max(
+        (_slice_of(int(item.get('start_ms') or 0), slice_ms) for item in (*chunks, *lines)),
+        default=0,
+    )
+    chunk_slices: list[list[dict[str, Any]]] = [[] for _ in range(count)]
+    line_slices: list[list[dict[str, Any]]] = [[] for _ in range(count)]
+    slice_of_line: dict[str, int] = {}
+    for chunk in sorted(chunks, key=lambda item: int(item.get('start_ms') or 0)):
+        slice_no = _slice_of(int(chunk.get('start_ms') or 0), slice_ms)
+        chunk_slices[slice_no].append(chunk)
+        for line_id in chunk.get('subtitle_line_ids') or []:
+            slice_of_line.setdefault(str(line_id), slice_no)
+    for line in lines:
+        slice_no = slice_of_line.get(str(line['id']), _slice_of(int(line.get('start_ms') or 0), slice_ms))
+        line_slices[slice_no].append(line)
+    return chunk_slices, line_slices
+
+
+def _pool_options() -> dict[str, Any]:
+    settings = get_settings()
+    return {
+        'max_connections': settings.redis_max_connections or None,
+        'socket_timeout': settings.redis_socket_timeout_seconds or None,
+        'socket_connect_timeout': settings.redis_connect_timeout_seconds or None,
+        'health_check_interval': settings.redis_health_check_interval_seconds,
+        # Raw bytes: episode payloads may be binary (EPISODE_CACHE_FORMAT=binary).
+        'decode_responses': False,
+    }
 
 
 @lru_cache(maxsize=1)
@@ -30,70 +152,619 @@ def _redis_client():
         logger.info('redis_cache_disabled reason=%s', 'missing_redis_url_or_package')
         return None
     try:
-        client = redis.Redis.from_url(settings.redis_url, decode_responses=True)
-        logger.info('redis_cache_enabled')
+        pool = redis.ConnectionPool.from_url(settings.redis_url, **_pool_options())
+        client = redis.Redis(connection_pool=pool)
+        logger.info('redis_cache_enabled max_connections=%s', settings.redis_max_connections)
         return client
     except Exception:
         logger.exception('redis_cache_connection_failed')
         return None
 
 
-def is_cache_enabled() -> bool:
-    return _redis_client() is not None
+# redis.asyncio connections belong to the event loop that opened them.
+_async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any] = weakref.WeakKeyDictionary()
+
 
+def _async_redis_client():
+    """``redis.asyncio`` client with the same pool settings, one per running event loop."""
 
-def get_cached_episode_chunks(episode_id: str) -> list[dict[str, Any]] | None:
-    client = _redis_client()
+    settings = get_settings()
+    if not settings.redis_url or redis_asyncio is None:
+        return None
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
     if client is None:
+        pool = redis_asyncio.ConnectionPool.from_url(settings.redis_url, **_pool_options())
+        client = _async_clients[loop] = redis_asyncio.Redis(connection_pool=pool)
+    return client
+
+
+@lru_cache(maxsize=1)
+def _memory_backend() -> MemoryCacheBackend:
+    return MemoryCacheBackend(get_settings().episode_cache_memory_bytes)
+
+
+@lru_cache(maxsize=1)
+def _disk_backend() -> DiskCacheBackend:
+    return DiskCacheBackend(get_settings().episode_cache_disk_path)
+
+
+def get_cache_backend() -> CacheBackend | None:
+    """Store selected by EPISODE_CACHE_BACKEND; ``None`` when caching is off or Redis is unavailable."""
+
+    backend = get_settings().episode_cache_backend.strip().lower()
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(f'Unknown episode_cache_backend: {backend}')
+    if backend == 'redis':
+        client = _redis_client()
+        if client is None:
+            return None
+        # Invalidations also drop episode indexes and cached retrievals, so listen even without the local tier.
+        _start_invalidation_listener(client)
+        return RedisCacheBackend(client)
+    if backend == 'memory':
+        return _memory_backend()
+    if backend == 'disk':
+        return _disk_backend()
+    return None
+
+
+def is_cache_enabled() -> bool:
+    return get_cache_backend() is not None
+
+
+@lru_cache(maxsize=1)
+def _local_cache() -> LRUTTLCache[str, Any]:
+    """Process-local tier in front of Redis, keyed by Redis key.
+
+    Entries are parsed manifests and slice payloads shared between callers and
+    must be treated as read-only. Slice keys never change once written, so only
+    manifests can go stale: pub/sub messages keep them coherent and the TTL
+    bounds staleness if a message is lost.
+    """
+
+    settings = get_settings()
+    return LRUTTLCache(settings.episode_cache_local_size, settings.episode_cache_local_ttl_seconds)
+
+
+def _drop_local(episode_id: str) -> None:
+    prefix = _key_episode_prefix(episode_id)
+    _local_cache().drop_where(lambda key, _value: key.startswith(prefix))
+
+
+def _invalidation_message(episode_id: str, title_id: str | None = None) -> str:
+    message = {'episode_id': episode_id, 'sender': PROCESS_ID}
+    if title_id is not None:
+        message['title_id'] = title_id
+    return json.dumps(message)
+
+
+def apply_invalidation_message(raw: str | bytes | None) -> str | None:
+    """Drop this process's copies of an episode named by another process.
+
+    A ``title_id`` in the message also drops that title's index, which may
+    predate the episode. Returns the episode id, or ``None`` for own,
+    malformed or empty messages.
+    """
+
+    try:
+        message = json.loads(raw or '')
+        episode_id = str(message['episode_id'])
+    except (TypeError, ValueError, KeyError):
         return None
+    if message.get('sender') == PROCESS_ID:
+        return None
+    _drop_local(episode_id)
+    drop_episode_index(episode_id)
+    if message.get('title_id'):
+        drop_title_index(str(message['title_id']))
+    invalidate_retrieval_cache(episode_id)
+    return episode_id
+
+
+def _listen_for_invalidations(client) -> None:
+    channel = get_settings().cache_invalidation_channel
+    while True:
+        try:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(channel)
+            # Messages sent while (re)connecting are lost; start from a clean tier.
+            _local_cache().clear()
+            while True:
+                # Polled so an idle channel never trips REDIS_SOCKET_TIMEOUT_SECONDS.
+                message = pubsub.get_message(timeout=INVALIDATION_POLL_SECONDS)
+                episode_id = apply_invalidation_message(message.get('data')) if message else None
+                if episode_id:
+                    logger.info('cache_invalidation_received episode_id=%s', episode_id)
+        except Exception:
+            logger.warning('cache_invalidation_listener_reconnect', exc_info=True)
+            time.sleep(INVALIDATION_RETRY_SECONDS)
+
+
+@lru_cache(maxsize=1)
+def _start_invalidation_listener(client) -> threading.Thread:
+    thread = threading.Thread(
+        target=_listen_for_invalidations,
+        args=(client,),
+        name='cache-invalidation-listener',
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
+
+def _parse_manifest(raw: str | bytes | None) -> dict[str, Any] | None:
     try:
-        raw = client.get(_key_episode_chunks(episode_id))
-        if not raw:
+        manifest = json.loads(raw) if raw else None
+        if manifest is None:
             return None
-        parsed = json.loads(raw)
-        return parsed if isinstance(parsed, list) else None
+        return {
+            'generation': str(manifest['generation']),
+            'slice_ms': int(manifest['slice_ms']),
+            'slices': int(manifest['slices']),
+        }
     except Exception:
         return None
 
 
-def warmup_episode_chunks_cache(db: Session, episode_id: str) -> int:
-    client = _redis_client()
-    if client is None:
-        return 0
-
-    chunks = list(
-        db.scalars(
-            select(SubtitleChunk)
-            .where(SubtitleChunk.episode_id == episode_id)
-            .order_by(SubtitleChunk.start_ms.asc())
-        ).all()
-    )
-    payload = [
-        {
-            'id': chunk.id,
-            'episode_id': chunk.episode_id,
-            'start_ms': chunk.start_ms,
-            'end_ms': chunk.end_ms,
-            'text_concat': chunk.text_concat,
-            'subtitle_line_ids': chunk.subtitle_line_ids or [],
-            'embedding': chunk.embedding,
-        }
-        for chunk in chunks
-    ]
+def _parse_payload(raw: str | bytes | None) -> list[dict[str, Any]] | None:
+    try:
+        return cache_codec.loads(raw) if raw else None
+    except Exception:
+        return None
+
+
+def _local_tier(backend: CacheBackend) -> LRUTTLCache[str, Any] | None:
+    # Only shared backends deliver the invalidations that keep the tier coherent.
+    if not backend.shared or get_settings().episode_cache_local_size <= 0:
+        return None
+    return _local_cache()
+
+
+def _cached_or_fetch(
+    keys: list[str],
+    parse,
+    local: LRUTTLCache[str, Any] | None,
+) -> Generator[list[str], list[Any], dict[str, Any]]:
+    """Values of ``keys`` from the local tier, the rest with one MGET; unreadable ones are left out."""
+
+    found: dict[str, Any] = {}
+    if local is not None:
+        for key in keys:
+            value = local.get(key)
+            if value is not None:
+                found[key] = value
+    missing = [key for key in keys if key not in found]
+    if missing:
+        raws = yield missing
+        for key, raw in zip(missing, raws):
+            value = parse(raw)
+            if value is None:
+                continue
+            found[key] = value
+            if local is not None:
+                local.put(key, value)
+    return found
+
+
+def _episode_reader(
+    wanted: dict[str, int | None],
+    local: LRUTTLCache[str, Any] | None,
+) -> Generator[list[str], list[Any], dict[str, CachedEpisode]]:
+    """Read several episodes in two round trips: every manifest, then every slice.
+
+    The generator yields the key lists to MGET and receives the raw values, so
+    the sync and asyncio clients share the same reader.
+    """
 
-    ttl = max(60, get_settings().redis_cache_ttl_seconds)
+    manifest_keys = {episode_id: _key_episode_manifest(episode_id) for episode_id in wanted}
+    manifests = yield from _cached_or_fetch(list(manifest_keys.values()), _parse_manifest, local)
+
+    plans: dict[str, tuple[int, int | None, str, list[str]]] = {}
+    for episode_id, until_ms in wanted.items():
+        manifest = manifests.get(manifest_keys[episode_id])
+        if manifest is None:
+            continue
+        total = manifest['slices']
+        count = total if until_ms is None else min(total, _slice_of(until_ms, manifest['slice_ms']) + 1)
+        horizon_ms = None if count >= total else count * manifest['slice_ms'] - 1
+        plans[episode_id] = (count, horizon_ms, manifest['generation'], _slice_keys(episode_id, manifest, count))
+
+    payloads = yield from _cached_or_fetch([key for *_, keys in plans.values() for key in keys], _parse_payload, local)
+
+    episodes: dict[str, CachedEpisode] = {}
+    for episode_id, (count, horizon_ms, generation, keys) in plans.items():
+        if any(key not in payloads for key in keys):
+            continue  # a missing slice makes the whole episode a miss
+        lists = [payloads[key] for key in keys]
+        episodes[episode_id] = CachedEpisode(
+            chunks=[item for payload in lists[:count] for item in payload],
+            lines=[item for payload in lists[count:] for item in payload],
+            horizon_ms=horizon_ms,
+            generation=generation,
+        )
+    return episodes
+
+
+def _wanted(episode_ids: Iterable[str], until_ms: int | None) -> dict[str, int | None]:
+    return dict.fromkeys(episode_ids, until_ms)
+
+
+def get_cached_episodes(episode_ids: Iterable[str], *, until_ms: int | None = None) -> dict[str, CachedEpisode]:
+    """Chunk and line payloads of the slices up to ``until_ms`` (all slices by default).
+
+    Later slices are never requested, so future content stays off the wire.
+    Episodes that are not cached, or miss a slice, are left out.
+    """
+
+    backend = get_cache_backend()
+    if backend is None:
+        return {}
     try:
-        client.setex(_key_episode_chunks(episode_id), ttl, json.dumps(payload, ensure_ascii=False))
-        return len(payload)
+        return _run_reader(backend, _episode_reader(_wanted(episode_ids, until_ms), _local_tier(backend)))
     except Exception:
-        return 0
+        logger.warning('redis_cache_read_failed', exc_info=True)
+        return {}
 
 
-def invalidate_episode_chunks_cache(episode_id: str) -> None:
-    client = _redis_client()
-    if client is None:
+def _run_reader(backend: CacheBackend, reader: Generator[list[str], list[Any], Any]) -> Any:
+    try:
+        keys = next(reader)
+        while True:
+            keys = reader.send(backend.mget(keys))
+    except StopIteration as done:
+        return done.value
+
+
+def get_cached_generation(episode_id: str) -> str | None:
+    """Generation named by the episode's manifest; ``None`` when it is not cached or unreadable."""
+
+    backend = get_cache_backend()
+    if backend is None:
+        return None
+    key = _key_episode_manifest(episode_id)
+    try:
+        manifests = _run_reader(backend, _cached_or_fetch([key], _parse_manifest, _local_tier(backend)))
+    except Exception:
+        logger.warning('redis_cache_read_failed', exc_info=True)
+        return None
+    manifest = manifests.get(key)
+    return manifest['generation'] if manifest else None
+
+
+def get_cached_episode(episode_id: str, *, until_ms: int | None = None) -> CachedEpisode | None:
+    return get_cached_episodes([episode_id], until_ms=until_ms).get(episode_id)
+
+
+async def get_cached_episodes_async(episode_ids: Iterable[str], *, until_ms: int | None = None) -> dict[str, CachedEpisode]:
+    """``get_cached_episodes`` over ``redis.asyncio``, for async endpoints.
+
+    Other backends are read in a worker thread.
+    """
+
+    backend = get_cache_backend()
+    if backend is None:
+        return {}
+    if backend.name != 'redis':
+        return await asyncio.to_thread(get_cached_episodes, list(episode_ids), until_ms=until_ms)
+    client = _async_redis_client()
+    reader = _episode_reader(_wanted(episode_ids, until_ms), _local_tier(backend))
+    try:
+        keys = next(reader)
+        while True:
+            keys = reader.send(await client.mget(keys))
+    except StopIteration as done:
+        return done.value
+    except Exception:
+        logger.warning('redis_cache_read_failed', exc_info=True)
+        return {}
+
+
+async def get_cached_episode_async(episode_id: str, *, until_ms: int | None = None) -> CachedEpisode | None:
+    return (await get_cached_episodes_async([episode_id], until_ms=until_ms)).get(episode_id)
+
+
+def _wait_for_fill(episode_id: str, until_ms: int | None, wait_seconds: float) -> CachedEpisode | None:
+    deadline = time.monotonic() + wait_seconds
+    while time.monotonic() < deadline:
+        time.sleep(FILL_POLL_SECONDS)
+        cached = get_cached_episode(episode_id, until_ms=until_ms)
+        if cached is not None:
+            return cached
+    return None
+
+
+def _take_fill_lease(backend: CacheBackend, episode_id: str, wait_seconds: float = 0.0) -> str | None:
+    """Take the episode's fill lease, polling up to ``wait_seconds`` while another process holds it.
+
+    Returns the token to release it with, or ``None`` when it stayed taken.
+    """
+
+    key = _key_episode_fill_lease(episode_id)
+    token = f'{PROCESS_ID}:{uuid.uuid4().hex}'
+    lease_ms = get_settings().episode_cache_fill_lease_ms
+    deadline = time.monotonic() + wait_seconds
+    while not backend.add(key, token, lease_ms):
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(FILL_POLL_SECONDS)
+    return token
+
+
+def _release_fill_lease(backend: CacheBackend, episode_id: str, token: str) -> None:
+    try:
+        backend.release(_key_episode_fill_lease(episode_id), token)
+    except Exception:
+        pass  # the lease expires on its own
+
+
+def get_or_fill_cached_episode(db: Session, episode_id: str, *, until_ms: int | None = None) -> CachedEpisode | None:
+    """``get_cached_episode`` that refills the cache on a miss, once per episode.
+
+    Within a process concurrent misses queue on a lock and re-read what the
+    first one wrote. Across hosts a ``SET NX`` lease picks the one process
+    that loads the episode from the database and writes it back; the others
+    poll the cache for up to EPISODE_CACHE_FILL_WAIT_MS. ``None`` (Redis
+    disabled, the wait ran out, or the write failed) sends the caller to the
+    database.
+    """
+
+    cached = get_cached_episode(episode_id, until_ms=until_ms)
+    backend = get_cache_backend()
+    if cached is not None or backend is None:
+        return cached
+
+    settings = get_settings()
+    wait_seconds = max(0, settings.episode_cache_fill_wait_ms) / 1000
+    lock = _FILL_LOCKS[hash(episode_id) % len(_FILL_LOCKS)]
+    if not lock.acquire(timeout=wait_seconds):
+        return None
+    try:
+        cached = get_cached_episode(episode_id, until_ms=until_ms)
+        if cached is not None:
+            return cached
+        try:
+            token = _take_fill_lease(backend, episode_id)
+        except Exception:
+            return None
+        if token is None:
+            logger.info('episode_cache_fill_wait episode_id=%s', episode_id)
+            return _wait_for_fill(episode_id, until_ms, wait_seconds)
+        try:
+            payloads = _episode_payloads(db, [episode_id])
+            generation = write_episode_payloads(backend, payloads)[episode_id]
+            logger.info('episode_cache_filled episode_id=%s chunks=%s', episode_id, len(payloads[episode_id][0]))
+        except Exception:
+            logger.warning('episode_cache_fill_failed episode_id=%s', episode_id, exc_info=True)
+            return None
+        finally:
+            _release_fill_lease(backend, episode_id, token)
+        chunks, lines = payloads[episode_id]
+        return CachedEpisode(chunks=chunks, lines=lines, horizon_ms=None, generation=generation)
+    finally:
+        lock.release()
+
+
+def _chunk_payload(chunk: SubtitleChunk) -> dict[str, Any]:
+    return {
+        'id': chunk.id,
+        'episode_id': chunk.episode_id,
+        'start_ms': chunk.start_ms,
+        'end_ms': chunk.end_ms,
+        'text_concat': chunk.text_concat,
+        'subtitle_line_ids': chunk.subtitle_line_ids or [],
+        'embedding': chunk.embedding,
+        'tokens': chunk.tokens,
+    }
+
+
+def _line_payload(line: SubtitleLine) -> dict[str, Any]:
+    return {
+        'id': line.id,
+        'episode_id': line.episode_id,
+        'start_ms': line.start_ms,
+        'end_ms': line.end_ms,
+        'speaker_text': line.speaker_text,
+        'text': line.text,
+        'tokens': line.tokens,
+    }
+
+
+def _episode_payloads(db: Session, episode_ids: list[str]) -> dict[str, tuple[list[dict[str, Any]], list[dict[str, Any]]]]:
+    """Chunk and line payloads of every episode, with one query per table."""
+
+    payloads: dict[str, tuple[list[dict[str, Any]], list[dict[str, Any]]]] = {
+        episode_id: ([], []) for episode_id in episode_ids
+    }
+    chunks = db.scalars(
+        select(SubtitleChunk)
+        .where(SubtitleChunk.episode_id.in_(episode_ids))
+        .order_by(SubtitleChunk.episode_id.asc(), SubtitleChunk.start_ms.asc())
+    ).all()
+    for chunk in chunks:
+        payloads[chunk.episode_id][0].append(_chunk_payload(chunk))
+    lines = db.scalars(
+        select(SubtitleLine)
+        .where(SubtitleLine.episode_id.in_(episode_ids))
+        .order_by(SubtitleLine.start_ms.asc(), SubtitleLine.id.asc())
+    ).all()
+    for line in lines:
+        payloads[line.episode_id][1].append(_line_payload(line))
+    return payloads
+
+
+def _episode_titles(db: Session, episode_ids: list[str]) -> dict[str, str]:
+    rows = db.execute(select(Episode.id, Episode.title_id).where(Episode.id.in_(episode_ids))).all()
+    return {row.id: row.title_id for row in rows}
+
+
+def _cache_format() -> str:
+    fmt = get_settings().episode_cache_format
+    if fmt not in cache_codec.FORMATS:
+        raise ValueError(f'Unknown episode_cache_format: {fmt}')
+    return fmt
+
+
+def _content_generation(slice_ms: int, encoded: list[str | bytes]) -> str:
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(str(slice_ms).encode())
+    for value in encoded:
+        raw = value.encode('utf-8') if isinstance(value, str) else value
+        digest.update(len(raw).to_bytes(8, 'little'))
+        digest.update(raw)
+    return digest.hexdigest()
+
+
+def write_episode_payloads(
+    backend: CacheBackend,
+    payloads: dict[str, tuple[list[dict[str, Any]], list[dict[str, Any]]]],
+    titles: dict[str, str] | None = None,
+) -> dict[str, str]:
+    """Store chunk and line payloads for several episodes in one atomic write (one MULTI on Redis).
+
+    Each episode's slices, its manifest swap and the invalidation message go
+    out in the same transaction, so readers see either the old generation or
+    the new one. Older generations are not deleted; they expire. Episodes
+    named in ``titles`` carry their title id in the message. Returns the
+    generation written per episode.
+    """
+
+    settings = get_settings()
+    ttl = max(60, settings.redis_cache_ttl_seconds)
+    fmt = _cache_format()
+    slice_ms = max(0, settings.episode_cache_slice_ms)
+
+    sets: list[tuple[str, str | bytes]] = []
+    messages: list[tuple[str, str]] = []
+    generations: dict[str, str] = {}
+    for episode_id, (chunks, lines) in payloads.items():
+        chunk_slices, line_slices = slice_episode_payloads(chunks, lines, slice_ms)
+        encoded = [
+            *(cache_codec.dumps(rows, kind=cache_codec.KIND_CHUNKS, fmt=fmt) for rows in chunk_slices),
+            *(cache_codec.dumps(rows, kind=cache_codec.KIND_LINES, fmt=fmt) for rows in line_slices),
+        ]
+        manifest = {
+            'generation': _content_generation(slice_ms, encoded),
+            'slice_ms': slice_ms,
+            'slices': len(chunk_slices),
+        }
+        sets.extend(zip(_slice_keys(episode_id, manifest), encoded))
+        sets.append((_key_episode_manifest(episode_id), json.dumps(manifest)))
+        message = _invalidation_message(episode_id, (titles or {}).get(episode_id))
+        messages.append((settings.cache_invalidation_channel, message))
+        generations[episode_id] = manifest['generation']
+    backend.write(sets=sets, ttl_seconds=ttl, messages=messages)
+    return generations
+
+
+def _drop_process_copies(episode_ids: Iterable[str], titles: dict[str, str] | None = None) -> None:
+    for episode_id in episode_ids:
+        _drop_local(episode_id)
+        drop_episode_index(episode_id)
+        invalidate_retrieval_cache(episode_id)
+    # By title, not membership: a title index built before the episode existed does not list it.
+    for title_id in set((titles or {}).values()):
+        drop_title_index(title_id)
+
+
+def _take_fill_leases(backend: CacheBackend, episode_ids: list[str]) -> dict[str, str]:
+    # A lease outlives no holder by more than EPISODE_CACHE_FILL_LEASE_MS, so waiting
+    # that long lets an in-flight fill finish before we write over it. Free leases are
+    # taken at once and the contended ones share one deadline, so a batch never waits
+    # longer than a single lease.
+    wait_seconds = max(0, get_settings().episode_cache_fill_lease_ms) / 1000
+    deadline = time.monotonic() + wait_seconds
+    tokens: dict[str, str] = {}
+    pending = list(episode_ids)
+    while pending:
+        busy = []
+        for episode_id in pending:
+            try:
+                token = _take_fill_lease(backend, episode_id)
+            except Exception:
+                logger.warning('episode_cache_fill_lease_busy episode_id=%s', episode_id)
+                continue
+            if token is None:
+                busy.append(episode_id)
+            else:
+                tokens[episode_id] = token
+        pending = busy
+        if pending and time.monotonic() >= deadline:
+            for episode_id in pending:
+                logger.warning('episode_cache_fill_lease_busy episode_id=%s', episode_id)
+            break
+        if pending:
+            time.sleep(FILL_POLL_SECONDS)
+    return tokens
+
+
+def warmup_episodes_cache(db: Session, episode_ids: Iterable[str]) -> dict[str, int]:
+    """Warm several episodes with one query per table and one backend write.
+
+    Holds each episode's fill lease while reading the database and writing, so
+    a fill that read its snapshot before an ingest committed cannot overwrite
+    the refreshed generation afterwards. Returns the number of cached chunks
+    per episode (0 when caching is unavailable).
+    """
+
+    episode_ids = list(dict.fromkeys(episode_ids))
+    titles = _episode_titles(db, episode_ids) if episode_ids else {}
+    _drop_process_copies(episode_ids, titles)
+    backend = get_cache_backend()
+    if backend is None or not episode_ids:
+        return dict.fromkeys(episode_ids, 0)
+
+    _cache_format()
+    leases = _take_fill_leases(backend, episode_ids)
+    try:
+        payloads = _episode_payloads(db, episode_ids)
+        try:
+            write_episode_payloads(backend, payloads, titles)
+        except Exception:
+            logger.warning(
+                'episode_cache_write_failed backend=%s episodes=%s', backend.name, len(episode_ids), exc_info=True
+            )
+            # The previous generation must not stay current once the database moved on.
+            invalidate_episodes_cache(episode_ids, titles)
+            return dict.fromkeys(episode_ids, 0)
+    finally:
+        for episode_id, token in leases.items():
+            _release_fill_lease(backend, episode_id, token)
+    for episode_id in episode_ids:
+        _drop_local(episode_id)
+    return {episode_id: len(payloads[episode_id][0]) for episode_id in episode_ids}
+
+
+def warmup_episode_chunks_cache(db: Session, episode_id: str) -> int:
+    return warmup_episodes_cache(db, [episode_id])[episode_id]
+
+
+def invalidate_episodes_cache(episode_ids: Iterable[str], titles: dict[str, str] | None = None) -> None:
+    episode_ids = list(dict.fromkeys(episode_ids))
+    _drop_process_copies(episode_ids, titles)
+    for episode_id in episode_ids:
+        remove_episode_artifact(episode_id)
+    backend = get_cache_backend()
+    if backend is None or not episode_ids:
         return
     try:
-        client.delete(_key_episode_chunks(episode_id))
+        manifest_keys = [_key_episode_manifest(episode_id) for episode_id in episode_ids]
+        previous = [_parse_manifest(raw) for raw in backend.mget(manifest_keys)]
+        channel = get_settings().cache_invalidation_channel
+        backend.write(
+            sets=[],
+            ttl_seconds=0,
+            deletes=[
+                *manifest_keys,
+                *(key for episode_id, old in zip(episode_ids, previous) if old is not None for key in _slice_keys(episode_id, old)),
+            ],
+            messages=[
+                (channel, _invalidation_message(episode_id, (titles or {}).get(episode_id))) for episode_id in episode_ids
+            ],
+        )
     except Exception:
         return
+
+
+def invalidate_episode_chunks_cache(episode_id: str) -> None:
+    invalidate_episodes_cache([episode_id])
@@ -1,25 +1,102 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
 from datetime import datetime, timezone
+from typing import Protocol, TypeVar
 from uuid import uuid4
 
 from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
 
-from app.core.config import get_settings
+from app.core.config import Settings, get_settings
 from app.db.models import SubtitleChunk, SubtitleLine
+from app.rag.tokenizer import chunk_terms_batch, line_tokens_batch
+from app.services.embedding_store import embed_texts
+
+
+class _TimedLine(Protocol):
+    start_ms: int
+    end_ms: int
+
+
+L = TypeVar('L', bound=_TimedLine)
 
 
 def _now() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def _simple_embedding(text: str) -> list[float]:
-    # Lightweight fallback embedding used for local/demo retrieval.
-    base = [0.0, 0.0, 0.0, 0.0]
-    for idx, ch in enumerate(text[:120]):
-        base[idx % 4] += (ord(ch) % 97) / 97.0
-    return [round(value / max(1, len(text[:120])), 6) for value in base]
+def group_lines_fixed(lines: Sequence[L], chunk_size: int) -> list[list[L]]:
+    size = max(2, chunk_size)
+    return [list(lines[idx : idx + size]) for idx in range(0, len(lines), size)]
+
+
+def group_lines_by_time(
+    lines: Sequence[L],
+    *,
+    window_ms: int,
+    stride_ms: int,
+    gap_ms: int,
+) -> list[list[L]]:
+    """Sliding time windows over ``start_ms``-ordered lines, cut at scene gaps.
+
+    A silence longer than ``gap_ms`` between two lines starts a new scene and
+    no window crosses it; ``gap_ms <= 0`` disables scene breaks, here and in
+    the retrieval index's scene lists. Inside a scene, windows of ``window_ms`` start every
+    ``stride_ms``, so consecutive chunks overlap by ``window_ms - stride_ms``
+    and a line near a window edge also appears with its neighbours. Windows
+    that add no line beyond the previous one are skipped.
+    """
+
+    window_ms = max(1, window_ms)
+    stride_ms = min(max(1, stride_ms), window_ms)
+    scenes: list[list[L]] = []
+    for line in lines:
+        if scenes and (gap_ms <= 0 or line.start_ms - scenes[-1][-1].end_ms <= gap_ms):
+            scenes[-1].append(line)
+        else:
+            scenes.append([line])
+
+    groups: list[list[L]] = []
+    for scene in scenes:
+        lo = hi = 0
+        last_hi = 0
+        window_start = scene[0].start_ms
+        while lo < len(scene):
+            while lo < len(scene) and scene[lo].start_ms < window_start:
+                lo += 1
+            hi = max(hi, lo)
+            while hi < len(scene) and scene[hi].start_ms < window_start + window_ms:
+                hi += 1
+            if hi > last_hi and lo < hi:
+                groups.append(list(scene[lo:hi]))
+                last_hi = hi
+            if hi >= len(scene):
+                break
+            # Jump over empty stretches instead of stepping through them.
+            next_start = window_start + stride_ms
+            if scene[hi].start_ms >= next_start + window_ms:
+                skipped = (scene[hi].start_ms - window_start - window_ms) // stride_ms + 1
+                next_start = window_start + skipped * stride_ms
+            window_start = next_start
+    return groups
+
+
+def group_lines(lines: Sequence[L], settings: Settings | None = None) -> list[list[L]]:
+    """Split one episode's ``start_ms``-ordered lines with the configured CHUNK_STRATEGY."""
+
+    settings = settings or get_settings()
+    strategy = settings.chunk_strategy.strip().lower()
+    if strategy == 'lines':
+        return group_lines_fixed(lines, settings.chunk_size_lines)
+    if strategy == 'time':
+        return group_lines_by_time(
+            lines,
+            window_ms=settings.chunk_window_ms,
+            stride_ms=settings.chunk_stride_ms,
+            gap_ms=settings.chunk_scene_gap_ms,
+        )
+    raise ValueError(f'Unsupported CHUNK_STRATEGY: {settings.chunk_strategy}')
 
 
 def rebuild_chunks_for_episodes(db: Session, episode_ids: list[str]) -> None:
@@ -27,10 +104,12 @@ def rebuild_chunks_for_episodes(db: Session, episode_ids: list[str]) -> None:
         return
 
     settings = get_settings()
-    chunk_size = max(2, settings.chunk_size_lines)
 
+    # Pending subtitle lines must be visible to the select below.
+    db.flush()
     db.execute(delete(SubtitleChunk).where(SubtitleChunk.episode_id.in_(episode_ids)))
 
+    groups: list[tuple[str, list[SubtitleLine]]] = []
     for episode_id in episode_ids:
         lines = list(
             db.scalars(
@@ -40,22 +119,32 @@ def rebuild_chunks_for_episodes(db: Session, episode_ids: list[str]) -> None:
             ).all()
         )
 
-        for idx in range(0, len(lines), chunk_size):
-            group = lines[idx : idx + chunk_size]
-            if not group:
-                continue
-
-            text_concat = ' '.join(line.text for line in group)
-            db.add(
-                SubtitleChunk(
-                    id=str(uuid4()),
-                    episode_id=episode_id,
-                    start_ms=group[0].start_ms,
-                    end_ms=group[-1].end_ms,
-                    text_concat=text_concat,
-                    subtitle_line_ids=[line.id for line in group],
-                    embedding=_simple_embedding(text_concat),
-                    created_at=_now(),
-                )
-            )
+        # Token features are computed once here so queries only intersect sets.
+        features = line_tokens_batch((line.text, line.speaker_text) for line in lines)
+        for line, tokens in zip(lines, features):
+            line.tokens = tokens
 
+        groups.extend((episode_id, group) for group in group_lines(lines, settings))
+
+    # Unchanged chunk texts reuse their stored embeddings; only new texts are embedded.
+    texts = [' '.join(line.text for line in group) for _, group in groups]
+    hashes, embeddings = embed_texts(db, texts)
+    terms = chunk_terms_batch(texts)
+
+    for (episode_id, group), text_concat, digest, embedding, chunk_tokens in zip(
+        groups, texts, hashes, embeddings, terms
+    ):
+        db.add(
+            SubtitleChunk(
+                id=str(uuid4()),
+                episode_id=episode_id,
+                start_ms=group[0].start_ms,
+                end_ms=group[-1].end_ms,
+                text_concat=text_concat,
+                subtitle_line_ids=[line.id for line in group],
+                embedding=embedding,
+                content_hash=digest,
+                tokens=chunk_tokens,
+                created_at=_now(),
+            )
+        )
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.models import ChunkEmbedding
+from app.rag.embeddings import EmbeddingProvider, get_embedder
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_BATCH_SIZE = 500
+# Dialects whose INSERT supports ON CONFLICT DO NOTHING.
+UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def content_hash(text: str, *, model: str) -> str:
+    # The model name is part of the key so a provider or dimension change never
+    # reuses vectors from another embedding space.
+    return hashlib.sha256(f'{model}\0{text}'.encode('utf-8')).hexdigest()
+
+
+def _store_embeddings(db: Session, rows: list[dict]) -> None:
+    # A concurrent ingest may store the same hash between our lookup and this insert;
+    # its vector is the same, so the existing row wins.
+    dialect_insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if dialect_insert is not None:
+        db.execute(dialect_insert(ChunkEmbedding).values(rows).on_conflict_do_nothing(index_elements=['content_hash']))
+        return
+    for row in rows:
+        try:
+            with db.begin_nested():
+                db.execute(insert(ChunkEmbedding).values(row))
+        except IntegrityError:
+            continue
+
+
+def embed_texts(
+    db: Session,
+    texts: list[str],
+    *,
+    embedder: EmbeddingProvider | None = None,
+) -> tuple[list[str], list[list[float]]]:
+    """Return ``(content_hashes, embeddings)`` for ``texts``, embedding only unseen texts.
+
+    Known hashes are looked up in batches; new vectors are inserted in the
+    caller's transaction, skipping hashes another ingest stored meanwhile, and
+    persist with the caller's commit.
+    """
+
+    provider = embedder or get_embedder()
+    hashes = [content_hash(text, model=provider.name) for text in texts]
+    unique_hashes = list(dict.fromkeys(hashes))
+
+    known: dict[str, list[float]] = {}
+    for idx in range(0, len(unique_hashes), LOOKUP_BATCH_SIZE):
+        batch = unique_hashes[idx : idx + LOOKUP_BATCH_SIZE]
+        rows = db.execute(
+            select(ChunkEmbedding.content_hash, ChunkEmbedding.embedding).where(
+                ChunkEmbedding.content_hash.in_(batch)
+            )
+        ).all()
+        known.update({row.content_hash: list(row.embedding) for row in rows})
+
+    missing: dict[str, str] = {}
+    for text, digest in zip(texts, hashes):
+        if digest not in known and digest not in missing:
+            missing[digest] = text
+    if missing:
+        now = datetime.now(timezone.utc)
+        vectors = provider.embed_batch(list(missing.values()))
+        rows = []
+        for digest, vector in zip(missing.keys(), vectors):
+            known[digest] = vector
+            rows.append(
+                {
+                    'content_hash': digest,
+                    'model': provider.name,
+                    'dim': provider.dim,
+                    'embedding': vector,
+                    'created_at': now,
+                }
+            )
+        for idx in range(0, len(rows), LOOKUP_BATCH_SIZE):
+            _store_embeddings(db, rows[idx : idx + LOOKUP_BATCH_SIZE])
+
+    logger.info(
+        'embedding_store texts=%s unique=%s reused=%s embedded=%s',
+        len(texts),
+        len(unique_hashes),
+        len(unique_hashes) - len(missing),
+        len(missing),
+    )
+    return hashes, [known[digest] for digest in hashes]
@@ -14,6 +14,7 @@ from app.api.schemas import (
     QAResponse,
     ResponseStyle,
     RelatedGraphFocus,
+    RetrievalScope,
     WarningItem,
 )
 from app.db.models import ChatMessage, ChatSession, Relation
@@ -22,7 +23,16 @@ from app.llm.prompting import load_prompt
 from app.core.config import get_settings
 from app.rag.evidence_select import build_evidences_from_lines
 from app.rag.query_intent import classify_query_intent
-from app.rag.retrieval import fallback_recent_lines, resolve_lines_from_chunks, retrieve_chunks
+from app.rag.retrieval import (
+    fallback_recent_lines,
+    previous_episode_ids,
+    resolve_lines_from_chunks,
+    resolve_lines_from_title_chunks,
+    retrieve_chunks,
+    retrieve_title_chunks,
+)
+from app.rag.result_cache import get_cached_retrieval, retrieval_cache_key, store_cached_retrieval
+from app.rag.tokenizer import line_token_set, query_tokens
 from app.rag.validator import enforce_degrade_if_needed, sanitize_evidences
 
 try:
@@ -56,17 +66,6 @@ def _as_list(value) -> list:
 
 _NOISE_LINE_RE = re.compile(r'^\s*(?:[A-Z]\s*[:\)]|INTENT\s*:)', re.IGNORECASE)
 _PERCENT_RE = re.compile(r'\(\s*\d{1,3}\s*%?\s*\)')
-_TOKEN_RE = re.compile(r"[a-zA-Z0-9\uAC00-\uD7A3]+")
-_STOPWORDS = {
-    '이', '그', '저', '것', '수', '좀', '더', '그리고', '근데', '그럼', '정말',
-    '은', '는', '이야', '가', '을', '를', '에', '의', '와', '과', '도', '로', '으로',
-    'a', 'an', 'the', 'is', 'are', 'was', 'were', 'be', 'to', 'of', 'in', 'on', 'and',
-}
-_KO_SUFFIXES = (
-    '으로부터', '에게서', '까지는', '까지도', '이라도', '처럼', '부터', '까지',
-    '으로', '에서', '에게', '한테', '께서', '의', '은', '는', '이', '가', '을', '를',
-    '와', '과', '도', '만', '나', '야', '요',
-)
 
 
 def _clean_text_line(text: str) -> str:
@@ -95,33 +94,15 @@ def _clean_lines(values: list[str], *, limit: int) -> list[str]:
     return result
 
 
-def _normalize_token(token: str) -> str:
-    t = token.lower().strip()
-    if len(t) < 2:
-        return t
-    for suffix in _KO_SUFFIXES:
-        if t.endswith(suffix) and len(t) - len(suffix) >= 2:
-            return t[: -len(suffix)]
-    return t
-
-
-def _query_tokens(text: str) -> set[str]:
-    raw_tokens = [t for t in _TOKEN_RE.findall(text or '')]
-    normalized = [_normalize_token(t) for t in raw_tokens]
-    return {t for t in normalized if len(t) >= 2 and t not in _STOPWORDS}
-
-
 def _rerank_lines_for_question(lines: list, question: str, *, limit: int = 6) -> list:
     if not lines:
         return lines
-    q_tokens = _query_tokens(question)
+    q_tokens = query_tokens(question)
     if not q_tokens:
         return lines[:limit]
 
     def _score(line) -> tuple[int, int]:
-        source = f'{getattr(line, "speaker_text", "")} {getattr(line, "text", "")}'.lower()
-        line_tokens = _query_tokens(source)
-        overlap = len(q_tokens.intersection(line_tokens))
+        overlap = len(q_tokens.intersection(line_token_set(line)))
         recency = -int(getattr(line, 'start_ms', 0))
         return (overlap, recency)
 
@@ -132,15 +113,13 @@ def _rerank_lines_for_question(lines: list, question: str, *, limit: int = 6) ->
 def _filter_relevant_lines(lines: list, question: str, *, limit: int = 6) -> list:
     if not lines:
         return []
-    q_tokens = _query_tokens(question)
+    q_tokens = query_tokens(question)
     if not q_tokens:
         return lines[:limit]
 
     scored: list[tuple[int, int, object]] = []
     for line in lines:
-        source = f'{getattr(line, "speaker_text", "")} {getattr(line, "text", "")}'.lower()
-        line_tokens = _query_tokens(source)
-        overlap = len(q_tokens.intersection(line_tokens))
+        overlap = len(q_tokens.intersection(line_token_set(line)))
         recency = -int(getattr(line, 'start_ms', 0))
         if overlap > 0:
             scored.append((overlap, recency, line))
@@ -700,28 +679,68 @@ def ask_question(
         return response
 
     emit_status('관련 장면 근거를 찾는 중이에요.')
-    chunks = retrieve_chunks(
-        db,
+    prior_episode_ids: list[str] = []
+    scope = req.retrieval_scope or RetrievalScope.EPISODE
+    if scope == RetrievalScope.TITLE:
+        prior_episode_ids = previous_episode_ids(db, title_id=req.title_id, episode_id=req.episode_id)
+    query = intent.normalized_question or req.question
+    cache_key = retrieval_cache_key(
+        scope=scope.value,
+        title_id=req.title_id,
         episode_id=req.episode_id,
         current_time_ms=req.current_time_ms,
-        query=intent.normalized_question or req.question,
+        normalized_question=query,
     )
-    lines = resolve_lines_from_chunks(
-        db,
-        episode_id=req.episode_id,
-        current_time_ms=req.current_time_ms,
-        chunks=chunks,
-        max_lines=6,
-    )
-    if not lines:
-        lines = fallback_recent_lines(
+    cached_lines = get_cached_retrieval(cache_key, episode_id=req.episode_id, current_time_ms=req.current_time_ms)
+    if cached_lines is not None:
+        lines = cached_lines
+    elif scope == RetrievalScope.TITLE:
+        chunks = retrieve_title_chunks(
+            db,
+            title_id=req.title_id,
+            episode_id=req.episode_id,
+            current_time_ms=req.current_time_ms,
+            query=query,
+        )
+        lines = resolve_lines_from_title_chunks(
             db,
+            title_id=req.title_id,
             episode_id=req.episode_id,
             current_time_ms=req.current_time_ms,
+            chunks=chunks,
             max_lines=6,
+            prior_episode_ids=prior_episode_ids,
+        )
+    else:
+        chunks = retrieve_chunks(
+            db,
+            episode_id=req.episode_id,
+            current_time_ms=req.current_time_ms,
+            query=query,
+        )
+        lines = resolve_lines_from_chunks(
+            db,
+            episode_id=req.episode_id,
+            current_time_ms=req.current_time_ms,
+            chunks=chunks,
+            max_lines=6,
+        )
+    if cached_lines is None:
+        if not lines:
+            lines = fallback_recent_lines(
+                db,
+                episode_id=req.episode_id,
+                current_time_ms=req.current_time_ms,
+                max_lines=6,
+            )
+        lines = _rerank_lines_for_question(lines, req.question, limit=6)
+        lines = _filter_relevant_lines(lines, req.question, limit=6)
+        store_cached_retrieval(
+            cache_key,
+            lines=lines,
+            current_time_ms=req.current_time_ms,
+            episode_ids=[req.episode_id, *prior_episode_ids],
         )
-    lines = _rerank_lines_for_question(lines, req.question, limit=6)
-    lines = _filter_relevant_lines(lines, req.question, limit=6)
 
     evidences = build_evidences_from_lines(lines, max_lines_per_evidence=2)
     evidences = sanitize_evidences(
@@ -730,6 +749,8 @@ def ask_question(
         episode_id=req.episode_id,
         current_time_ms=req.current_time_ms,
         warnings=warnings,
+        prior_episode_ids=prior_episode_ids,
+        known_lines={line.id: line for line in lines},
     )
 
     answer = None
@@ -24,6 +24,13 @@ except Exception:  # pragma: no cover - optional dependency at runtime
         return _decorator
 
 
+RECAP_QUERY_SEEDS = {
+    'GENERAL': '지난 이야기 핵심',
+    'CHARACTER_FOCUSED': '인물 중심 관계 변화',
+    'CONFLICT_FOCUSED': '갈등과 의심의 흐름',
+}
+
+
 def _language_instruction(language: str | None) -> str:
     if (language or '').lower().startswith('ko'):
         return 'Korean'
@@ -48,11 +55,7 @@ def _style_instruction(style: ResponseStyle | None) -> str:
 def build_recap(db, req: RecapRequest) -> RecapResponse:
     warnings: list[WarningItem] = []
 
-    query_seed = {
-        'GENERAL': '지난 이야기 핵심',
-        'CHARACTER_FOCUSED': '인물 중심 관계 변화',
-        'CONFLICT_FOCUSED': '갈등과 의심의 흐름',
-    }.get(req.mode.value if req.mode else 'GENERAL', '지난 이야기 핵심')
+    query_seed = RECAP_QUERY_SEEDS.get(req.mode.value if req.mode else 'GENERAL', RECAP_QUERY_SEEDS['GENERAL'])
 
     chunks = retrieve_chunks(
         db,
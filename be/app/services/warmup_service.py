@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import logging
+import threading
+from functools import lru_cache
+from queue import Full, Queue
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.models import ChatMessage, Episode
+from app.rag.query_embeddings import preload_query_embeddings
+from app.rag.query_intent import classify_query_intent
+from app.rag.retrieval import load_episode_index, warm_episode_index
+from app.services.cache_service import warmup_episodes_cache
+from app.services.recap_service import RECAP_QUERY_SEEDS
+from app.utils.lru import LRUTTLCache
+
+logger = logging.getLogger(__name__)
+
+PREDICTIVE_QUEUE_SIZE = 256
+
+
+def frequent_questions(db: Session, *, limit: int) -> list[str]:
+    """Most asked user questions, in the normalized form retrieval embeds."""
+
+    if limit <= 0:
+        return []
+    rows = db.execute(
+        select(ChatMessage.content)
+        .where(ChatMessage.role == 'user')
+        .group_by(ChatMessage.content)
+        .order_by(func.count().desc())
+        .limit(limit)
+    ).all()
+    return [classify_query_intent(row.content).normalized_question or row.content for row in rows]
+
+
+def warm_query_embeddings(db: Session) -> int:
+    questions = frequent_questions(db, limit=get_settings().query_embedding_preload_questions)
+    embedded = preload_query_embeddings([*RECAP_QUERY_SEEDS.values(), *questions])
+    logger.info('query_embedding_preload seeds=%s questions=%s embedded=%s', len(RECAP_QUERY_SEEDS), len(questions), embedded)
+    return embedded
+
+
+def refresh_episode_caches(bind: Engine | Connection, episode_ids: list[str]) -> None:
+    """Rewrite the episode cache and index artifacts after an ingest has committed.
+
+    Runs as a background task with its own session, so the ingest transaction
+    never waits on cache writes. Until it finishes readers keep the previous
+    cache generation, which is complete, rather than an empty cache.
+    """
+
+    db = Session(bind=bind)
+    try:
+        cached = warmup_episodes_cache(db, episode_ids)
+        for episode_id in episode_ids:
+            warm_episode_index(db, episode_id)
+        logger.info('episode_cache_refresh episodes=%s cached_chunks=%s', len(episode_ids), sum(cached.values()))
+    except Exception:
+        logger.exception('episode_cache_refresh_failed episodes=%s', episode_ids)
+    finally:
+        db.close()
+
+
+# Predictive warmup: viewer positions come from recap/QA requests and chat
+# session writes, reported by the routes once their own work is done. Once a
+# viewer is within PREDICTIVE_WARMUP_LEAD_MS of the end of an episode, the
+# title's next episode is loaded on a background thread, so its episode cache,
+# artifact and index are warm before the first question.
+
+
+@lru_cache(maxsize=1)
+def _episode_positions() -> LRUTTLCache[str, tuple[str, int, int, int | None]]:
+    """episode id -> (title_id, season, episode_number, duration_ms)."""
+
+    return LRUTTLCache(4096, 600)
+
+
+@lru_cache(maxsize=1)
+def _next_episodes() -> LRUTTLCache[str, str]:
+    """episode id -> next episode id of the same title; only found ones are kept."""
+
+    return LRUTTLCache(4096, 600)
+
+
+@lru_cache(maxsize=1)
+def _recently_warmed() -> LRUTTLCache[str, bool]:
+    return LRUTTLCache(4096, get_settings().predictive_warmup_cooldown_seconds)
+
+
+def _episode_position(conn: Connection, episode_id: str) -> tuple[str, int, int, int | None] | None:
+    positions = _episode_positions()
+    found = positions.get(episode_id)
+    if found is None:
+        row = conn.execute(
+            select(Episode.title_id, Episode.season, Episode.episode_number, Episode.duration_ms).where(
+                Episode.id == episode_id
+            )
+        ).first()
+        if row is None:
+            return None
+        found = (row.title_id, row.season, row.episode_number, row.duration_ms)
+        positions.put(episode_id, found)
+    return found
+
+
+def _next_episode_id(conn: Connection, episode_id: str, position: tuple[str, int, int, int | None]) -> str | None:
+    # A missing next episode is not memoized, so one ingested later is picked up at once.
+    following = _next_episodes()
+    next_id = following.get(episode_id)
+    if next_id is None:
+        title_id, season, episode_number, _ = position
+        next_id = conn.execute(
+            select(Episode.id)
+            .where(
+                Episode.title_id == title_id,
+                or_(
+                    Episode.season > season,
+                    and_(Episode.season == season, Episode.episode_number > episode_number),
+                ),
+            )
+            .order_by(Episode.season.asc(), Episode.episode_number.asc())
+            .limit(1)
+        ).scalar()
+        if next_id is not None:
+            following.put(episode_id, next_id)
+    return next_id
+
+
+@lru_cache(maxsize=1)
+def _warmup_queue() -> Queue[tuple[Engine, str]]:
+    queue: Queue[tuple[Engine, str]] = Queue(maxsize=PREDICTIVE_QUEUE_SIZE)
+    threading.Thread(target=_run_warmups, args=(queue,), name='predictive-warmup', daemon=True).start()
+    return queue
+
+
+def _run_warmups(queue: Queue[tuple[Engine, str]]) -> None:
+    while True:
+        engine, episode_id = queue.get()
+        db = Session(bind=engine)
+        try:
+            index = load_episode_index(db, episode_id)
+            logger.info('predictive_warmup episode_id=%s chunks=%s', episode_id, len(index))
+        except Exception:
+            logger.exception('predictive_warmup_failed episode_id=%s', episode_id)
+        finally:
+            db.close()
+
+
+def _enqueue_warmup(engine: Engine, episode_id: str) -> None:
+    try:
+        _warmup_queue().put_nowait((engine, episode_id))
+    except Full:
+        logger.warning('predictive_warmup_dropped episode_id=%s', episode_id)
+
+
+def note_viewer_position(bind: Engine | Connection, episode_id: str, current_time_ms: int) -> str | None:
+    """Schedule the next episode's warmup when a viewer nears the end of ``episode_id``.
+
+    Lookups run on a connection of their own, never inside the caller's
+    transaction, so call it after the request's writes. Cheap enough for
+    every request: episode positions are memoized and each next episode is
+    scheduled at most once per PREDICTIVE_WARMUP_COOLDOWN_SECONDS. Returns
+    the scheduled episode id.
+    """
+
+    settings = get_settings()
+    if not settings.predictive_warmup_enabled or not episode_id:
+        return None
+    engine = bind.engine
+    try:
+        with engine.connect() as conn:
+            position = _episode_position(conn, episode_id)
+            duration_ms = position[3] if position else None
+            if not duration_ms or current_time_ms < duration_ms - settings.predictive_warmup_lead_ms:
+                return None
+            next_id = _next_episode_id(conn, episode_id, position)
+    except Exception:
+        logger.warning('predictive_warmup_lookup_failed episode_id=%s', episode_id, exc_info=True)
+        return None
+    if next_id is None:
+        return None
+    warmed = _recently_warmed()
+    if next_id in warmed:
+        return None
+    warmed.put(next_id, True)
+    _enqueue_warmup(engine, next_id)
+    return next_id
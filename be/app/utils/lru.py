@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Generic, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+class LRUTTLCache(Generic[K, V]):
+    """Thread-safe, size-bounded LRU with a per-entry time-to-live.
+
+    ``ttl_seconds <= 0`` disables expiry. Hit/miss counters are kept for
+    metrics endpoints.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float) -> None:
+        self.max_size = max(1, int(max_size))
+        self.ttl_seconds = float(ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: object) -> bool:
+        """Membership test that leaves recency and hit/miss counters untouched."""
+        with self._lock:
+            entry = self._items.get(key)  # type: ignore[arg-type]
+            return entry is not None and not self._expired(entry[0])
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.monotonic() - stored_at > self.ttl_seconds
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None or self._expired(entry[0]):
+                if entry is not None:
+                    del self._items[key]
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: K, value: V) -> None:
+        with self._lock:
+            self._items[key] = (time.monotonic(), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+    def drop_where(self, predicate: Callable[[K, V], bool]) -> int:
+        with self._lock:
+            stale = [key for key, (_, value) in self._items.items() if predicate(key, value)]
+            for key in stale:
+                del self._items[key]
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._items),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
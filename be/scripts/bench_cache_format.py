@@ -0,0 +1,89 @@
+"""Episode cache payload size and decode time, JSON vs the binary format.
+
+Builds a synthetic episode (subtitle lines grouped into overlapping chunks with
+HashingEmbedder vectors, as warmup stores them) and reports, per format, the
+bytes written to Redis and the time to turn them back into payload dicts and
+RetrievalChunk objects.
+
+Usage: python scripts/bench_cache_format.py [lines] [repeats]
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+
+from app.rag.embeddings import HashingEmbedder
+from app.rag.retrieval import _chunk_from_cache_item
+from app.rag.tokenizer import chunk_terms, line_tokens
+from app.services import cache_codec
+
+WORDS = ['harbor', 'letter', 'brother', 'storm', 'lantern', 'captain', '약속', '비밀', '편지', '형', '바다', '거짓말']
+
+
+def _episode(line_count: int) -> tuple[list[dict], list[dict]]:
+    rng = random.Random(3)
+    embedder = HashingEmbedder(dim=384)
+    lines = []
+    for idx in range(line_count):
+        text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 9)))
+        speaker = rng.choice(['민준', '수아', 'Captain', None])
+        lines.append(
+            {
+                'id': f'{idx:08d}-5f0c-4a7e-9d2b-{rng.getrandbits(48):012x}',
+                'episode_id': '3b1f2c8e-0d4a-4c55-b7e1-6a9f0e2d1c33',
+                'start_ms': idx * 2_500,
+                'end_ms': idx * 2_500 + 1_800,
+                'speaker_text': speaker,
+                'text': text,
+                'tokens': line_tokens(text, speaker),
+            }
+        )
+    chunks = []
+    for start in range(0, line_count, 3):  # 6-line windows every 3 lines
+        group = lines[start : start + 6]
+        text = ' '.join(line['text'] for line in group)
+        chunks.append(
+            {
+                'id': f'chunk-{start:06d}',
+                'episode_id': group[0]['episode_id'],
+                'start_ms': group[0]['start_ms'],
+                'end_ms': group[-1]['end_ms'],
+                'text_concat': text,
+                'subtitle_line_ids': [line['id'] for line in group],
+                'embedding': embedder.embed(text),
+                'tokens': chunk_terms(text),
+            }
+        )
+    return chunks, lines
+
+
+def _time(func, repeats: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - started) / repeats
+
+
+def run(line_count: int = 1200, repeats: int = 20) -> None:
+    chunks, lines = _episode(line_count)
+    print(f'episode: {len(lines)} lines, {len(chunks)} chunks, dim 384')
+    print(f'{"payload":<8} {"format":<7} {"bytes":>10} {"decode ms":>10} {"+chunks ms":>11}')
+    for name, rows, kind in (('chunks', chunks, cache_codec.KIND_CHUNKS), ('lines', lines, cache_codec.KIND_LINES)):
+        for fmt in cache_codec.FORMATS:
+            encoded = cache_codec.dumps(rows, kind=kind, fmt=fmt)
+            raw = encoded.encode('utf-8') if isinstance(encoded, str) else encoded
+            decoded = cache_codec.loads(raw)
+            assert [row['id'] for row in decoded] == [row['id'] for row in rows]
+            decode = _time(lambda: cache_codec.loads(raw), repeats)
+            build = ''
+            if kind == cache_codec.KIND_CHUNKS:
+                total = _time(lambda: [_chunk_from_cache_item(item) for item in cache_codec.loads(raw)], repeats)
+                build = f'{total * 1e3:11.2f}'
+            print(f'{name:<8} {fmt:<7} {len(raw):>10,} {decode * 1e3:>10.2f} {build}')
+
+
+if __name__ == '__main__':
+    args = [int(value) for value in sys.argv[1:3]]
+    run(*args)
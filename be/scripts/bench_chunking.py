@@ -0,0 +1,120 @@
+"""Compare chunking strategies on a synthetic episode.
+
+Reports chunk count, index size, search latency and how often the subtitle
+line a question was written from ends up among the six resolved evidence
+lines (same resolution as ``resolve_lines_from_chunks``).
+
+Usage: python scripts/bench_chunking.py [queries]
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+from dataclasses import dataclass
+
+from app.core.config import get_settings
+from app.rag.embeddings import HashingEmbedder
+from app.rag.episode_index import EpisodeIndex, RetrievalChunk
+from app.rag.tokenizer import chunk_terms
+from app.services.chunk_service import group_lines_by_time, group_lines_fixed
+
+TOPICS = [
+    ['harbor', 'storm', 'captain', 'rope', '항구', '폭풍'],
+    ['letter', 'brother', 'secret', 'drawer', '편지', '비밀'],
+    ['hospital', 'doctor', 'fever', 'night', '병원', '의사'],
+    ['wedding', 'ring', 'dress', 'church', '결혼식', '반지'],
+    ['money', 'debt', 'loan', 'bank', '돈', '빚'],
+    ['school', 'teacher', 'exam', 'class', '학교', '시험'],
+]
+FILLER = ['well', 'maybe', 'really', 'then', 'again', '그래', '진짜', '근데', '아마', '정말', '지금']
+NAMES = ['minjun', 'sua', 'jaehyun', 'hana', '민준', '수아', '재현']
+
+
+@dataclass
+class Line:
+    id: str
+    start_ms: int
+    end_ms: int
+    text: str
+
+
+def synthetic_episode(rng: random.Random, minutes: int = 50) -> list[Line]:
+    lines: list[Line] = []
+    now = 0
+    while now < minutes * 60_000:
+        topic = rng.choice(TOPICS)
+        # Fast banter, normal dialogue or slow scenes with long pauses.
+        pace = rng.choice([(600, 1_500), (1_500, 4_000), (4_000, 9_000)])
+        for _ in range(rng.randint(8, 40)):
+            words = rng.sample(topic, 2) + rng.sample(FILLER, 2) + [rng.choice(NAMES)]
+            rng.shuffle(words)
+            duration = rng.randint(500, 2_500)
+            lines.append(Line(f'l{len(lines)}', now, now + duration, ' '.join(words)))
+            now += duration + rng.randint(*pace)
+        now += rng.randint(12_000, 40_000)  # scene change
+    return lines
+
+
+def build_index(groups: list[list[Line]], embedder: HashingEmbedder) -> EpisodeIndex:
+    chunks = []
+    for group in groups:
+        text = ' '.join(line.text for line in group)
+        chunks.append(
+            RetrievalChunk(
+                start_ms=group[0].start_ms,
+                text_concat=text,
+                subtitle_line_ids=[line.id for line in group],
+                embedding=embedder.embed(text),
+                tokens=chunk_terms(text),
+            )
+        )
+    return EpisodeIndex(chunks, tokenize=chunk_terms)
+
+
+def evaluate(name: str, groups: list[list[Line]], lines: list[Line], queries, embedder) -> None:
+    by_id = {line.id: line for line in lines}
+    index = build_index(groups, embedder)
+    size = index.embeddings.nbytes + index.lexical.doc_ids.nbytes + index.lexical.tfs.nbytes
+    hits = 0
+    elapsed = 0.0
+    for target, question, current_time_ms in queries:
+        embedding = embedder.embed(question)
+        started = time.perf_counter()
+        found = index.search(query=question, query_embedding=embedding, current_time_ms=current_time_ms, limit=8)
+        elapsed += time.perf_counter() - started
+        candidates = {line_id for chunk in found for line_id in chunk.subtitle_line_ids}
+        visible = sorted(
+            (by_id[line_id] for line_id in candidates if by_id[line_id].start_ms <= current_time_ms),
+            key=lambda line: line.start_ms,
+            reverse=True,
+        )[:6]
+        hits += any(line.id == target.id for line in visible)
+    sizes = [len(group) for group in groups]
+    print(
+        f'{name:<28} chunks={len(groups):5d} lines/chunk={sum(sizes) / len(sizes):5.1f} '
+        f'max={max(sizes):3d} index={size / 1024:8.1f} KiB '
+        f'search={elapsed / len(queries) * 1e6:7.1f} us hit@6={hits / len(queries):.3f}'
+    )
+
+
+def run(query_count: int = 400) -> None:
+    rng = random.Random(7)
+    lines = synthetic_episode(rng)
+    embedder = HashingEmbedder(dim=get_settings().embedding_dim)
+    queries = []
+    for target in rng.sample(lines, query_count):
+        words = target.text.split()
+        question = ' '.join(rng.sample(words, 3))
+        queries.append((target, question, target.start_ms + rng.randint(0, 20_000)))
+
+    print(f'lines={len(lines)} queries={query_count}')
+    evaluate('lines size=6', group_lines_fixed(lines, 6), lines, queries, embedder)
+    evaluate('time 30s/30s gap=10s', group_lines_by_time(lines, window_ms=30_000, stride_ms=30_000, gap_ms=10_000), lines, queries, embedder)
+    evaluate('time 30s/15s gap=10s', group_lines_by_time(lines, window_ms=30_000, stride_ms=15_000, gap_ms=10_000), lines, queries, embedder)
+    evaluate('time 20s/10s gap=10s', group_lines_by_time(lines, window_ms=20_000, stride_ms=10_000, gap_ms=10_000), lines, queries, embedder)
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 400)
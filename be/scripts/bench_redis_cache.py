@@ -0,0 +1,112 @@
+"""Episode cache round trips: one episode at a time vs pipelined, sync vs asyncio.
+
+Runs against REDIS_URL when it is set, otherwise against an in-process
+fakeredis server (listed in requirements-dev.txt; it only shows the client-side
+cost, so compare with a real Redis for network latency). Writes a synthetic
+title one MULTI per episode, as ingestion used to, and then in one pipelined
+MULTI; reads it back episode by episode, batched, and over redis.asyncio.
+The process-local tier is disabled so every read goes to Redis.
+
+Usage: python scripts/bench_redis_cache.py [episodes] [lines] [repeats]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+from bench_cache_format import _episode
+
+from app.core.config import get_settings
+from app.services import cache_service
+
+
+def _use_fakeredis() -> bool:
+    try:
+        import fakeredis
+    except ImportError:
+        return False
+    server = fakeredis.FakeServer()
+    sync_client = fakeredis.FakeRedis(server=server)
+    cache_service._redis_client = lambda: sync_client
+    cache_service._async_redis_client = lambda: fakeredis.FakeAsyncRedis(server=server)
+    return True
+
+
+def _title(episode_count: int, line_count: int) -> dict[str, tuple[list[dict], list[dict]]]:
+    chunks, lines = _episode(line_count)
+    payloads = {}
+    for number in range(episode_count):
+        episode_id = f'bench-episode-{number:03d}'
+        payloads[episode_id] = (
+            [{**chunk, 'episode_id': episode_id} for chunk in chunks],
+            [{**line, 'episode_id': episode_id} for line in lines],
+        )
+    return payloads
+
+
+def _time(func, repeats: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - started) / repeats
+
+
+async def _time_async(func, repeats: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeats):
+        await func()
+    return (time.perf_counter() - started) / repeats
+
+
+def run(episode_count: int = 16, line_count: int = 600, repeats: int = 5) -> None:
+    settings = get_settings()
+    if settings.redis_url:
+        target = settings.redis_url
+    elif _use_fakeredis():
+        target = 'fakeredis'
+    else:
+        print('Set REDIS_URL or install fakeredis to run this benchmark')
+        return
+    settings.episode_cache_local_size = 0
+    settings.episode_cache_backend = 'redis'
+    backend = cache_service.get_cache_backend()
+    if backend is None:
+        print(f'Redis unavailable at {target}')
+        return
+
+    payloads = _title(episode_count, line_count)
+    episode_ids = list(payloads)
+    print(f'target: {target}; {episode_count} episodes x {line_count} lines, slices of {settings.episode_cache_slice_ms} ms')
+
+    def write_serial() -> None:
+        for episode_id in episode_ids:
+            cache_service.write_episode_payloads(backend, {episode_id: payloads[episode_id]})
+
+    rows = [
+        ('write, one MULTI per episode', _time(write_serial, repeats)),
+        ('write, one pipelined MULTI', _time(lambda: cache_service.write_episode_payloads(backend, payloads), repeats)),
+    ]
+    assert len(cache_service.get_cached_episodes(episode_ids)) == episode_count
+
+    rows.append(('read, per episode', _time(lambda: [cache_service.get_cached_episode(e) for e in episode_ids], repeats)))
+    rows.append(('read, batched', _time(lambda: cache_service.get_cached_episodes(episode_ids), repeats)))
+
+    async def read_async() -> list[tuple[str, float]]:
+        async def concurrent():
+            await asyncio.gather(*(cache_service.get_cached_episode_async(e) for e in episode_ids))
+
+        return [
+            ('read, asyncio per episode (gather)', await _time_async(concurrent, repeats)),
+            ('read, asyncio batched', await _time_async(lambda: cache_service.get_cached_episodes_async(episode_ids), repeats)),
+        ]
+
+    rows.extend(asyncio.run(read_async()))
+    for name, seconds in rows:
+        print(f'{name:<36} {seconds * 1e3:>9.2f} ms')
+
+
+if __name__ == '__main__':
+    args = [int(value) for value in sys.argv[1:4]]
+    run(*args)
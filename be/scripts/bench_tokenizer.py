@@ -0,0 +1,127 @@
+"""Per-request tokenization cost of a /qa call, before and after the shared tokenizer.
+
+Before: the question was tokenized by intent classification, retrieval and
+twice by evidence reranking, and every candidate line was tokenized twice.
+After: question tokens come from the LRU-backed tokenizer and candidate lines
+carry token sets stored at ingest, so scoring is set intersection only.
+
+Usage: python scripts/bench_tokenizer.py [requests]
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+import time
+
+from app.rag.tokenizer import chunk_terms, line_token_set, line_tokens, query_tokens, words
+
+QUESTIONS = [
+    '민준이가 왜 형에게서 편지를 숨겼어?',
+    'Why did the captain leave the harbor before the storm?',
+    '지금까지 수아와 재현의 관계는 어떻게 변했어?',
+    'who gave B the later clue',
+]
+LINES = [
+    ('민준', '형은 그 편지를 끝까지 읽지 않았어.'),
+    ('수아', '재현이한테서 연락 온 적 있어?'),
+    ('Captain', 'We leave the harbor at dawn, storm or not.'),
+    ('B', 'I found another clue near the lighthouse.'),
+    ('재현', '우리 사이에 비밀 같은 건 없었잖아.'),
+    ('A', 'The letter was hidden under the floorboards.'),
+    ('민준', '처음부터 형을 믿지 말았어야 했어.'),
+    ('수아', 'Nobody saw the captain after midnight.'),
+]
+
+# Pre-refactor implementations, kept here only for comparison.
+_LEGACY_WORD_RE = re.compile(r"[A-Za-z0-9가-힣]+")
+_LEGACY_STOPWORDS = {'the', 'a', 'an', 'of', 'to', 'in', 'on', 'at', 'for', 'and', 'or', 'is', 'are', 'was',
+                     'were', 'be', 'been', 'being', 'it', 'this', 'that', 'with', 'as', 'by'}
+_LEGACY_QUERY_STOPWORDS = {
+    '이', '그', '저', '것', '수', '좀', '더', '그리고', '근데', '그럼', '정말',
+    '은', '는', '이야', '가', '을', '를', '에', '의', '와', '과', '도', '로', '으로',
+    'a', 'an', 'the', 'is', 'are', 'was', 'were', 'be', 'to', 'of', 'in', 'on', 'and',
+}
+_LEGACY_KO_SUFFIXES = (
+    '으로부터', '에게서', '까지는', '까지도', '이라도', '처럼', '부터', '까지',
+    '으로', '에서', '에게', '한테', '께서', '의', '은', '는', '이', '가', '을', '를',
+    '와', '과', '도', '만', '나', '야', '요',
+)
+
+
+def _legacy_intent_tokens(text: str) -> list[str]:
+    return [token for token in _LEGACY_WORD_RE.findall(text.lower()) if token]
+
+
+def _legacy_terms(text: str) -> list[str]:
+    return [
+        token for token in _LEGACY_WORD_RE.findall(text.lower())
+        if token not in _LEGACY_STOPWORDS and (token.isdigit() or len(token) >= 2)
+    ]
+
+
+def _legacy_normalize(token: str) -> str:
+    t = token.lower().strip()
+    if len(t) < 2:
+        return t
+    for suffix in _LEGACY_KO_SUFFIXES:
+        if t.endswith(suffix) and len(t) - len(suffix) >= 2:
+            return t[: -len(suffix)]
+    return t
+
+
+def _legacy_query_tokens(text: str) -> set[str]:
+    normalized = [_legacy_normalize(t) for t in _LEGACY_WORD_RE.findall(text or '')]
+    return {t for t in normalized if len(t) >= 2 and t not in _LEGACY_QUERY_STOPWORDS}
+
+
+class _Line:
+    def __init__(self, speaker_text: str, text: str) -> None:
+        self.speaker_text = speaker_text
+        self.text = text
+        self.tokens = line_tokens(text, speaker_text)
+
+
+def _before(question: str) -> int:
+    _legacy_intent_tokens(question)
+    _legacy_terms(question)
+    overlap = 0
+    for _ in range(2):  # rerank, then filter
+        q_tokens = _legacy_query_tokens(question)
+        for speaker, text in LINES:
+            overlap += len(q_tokens & _legacy_query_tokens(f'{speaker} {text}'.lower()))
+    return overlap
+
+
+def _after(question: str, lines: list[_Line]) -> int:
+    words(question)
+    chunk_terms(question)
+    overlap = 0
+    for _ in range(2):
+        q_tokens = query_tokens(question)
+        for line in lines:
+            overlap += len(q_tokens & line_token_set(line))
+    return overlap
+
+
+def run(requests: int = 20000) -> None:
+    lines = [_Line(speaker, text) for speaker, text in LINES]
+    assert all(_before(q) == _after(q, lines) for q in QUESTIONS)
+
+    started = time.perf_counter()
+    for idx in range(requests):
+        _before(QUESTIONS[idx % len(QUESTIONS)])
+    before = (time.perf_counter() - started) / requests
+
+    started = time.perf_counter()
+    for idx in range(requests):
+        _after(QUESTIONS[idx % len(QUESTIONS)], lines)
+    after = (time.perf_counter() - started) / requests
+
+    print(f'candidate lines per request: {len(LINES)}')
+    print(f'before: {before * 1e6:8.1f} us/request')
+    print(f'after:  {after * 1e6:8.1f} us/request ({before / after:.1f}x faster)')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
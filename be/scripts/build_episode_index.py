@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import sys
+
+from sqlalchemy import select
+
+from app.db.models import Episode
+from app.db.session import SessionLocal
+from app.rag.index_artifact import artifact_path
+from app.rag.retrieval import warm_episode_index
+from app.services.cache_service import warmup_episodes_cache
+
+
+def run(episode_ids: list[str] | None = None) -> None:
+    db = SessionLocal()
+    try:
+        targets = episode_ids or list(db.scalars(select(Episode.id)).all())
+        # Build from the database, not from whatever the episode cache still holds.
+        warmup_episodes_cache(db, targets)
+        for episode_id in targets:
+            index = warm_episode_index(db, episode_id)
+            print(f'{episode_id}: {len(index)} chunks -> {artifact_path(episode_id)}')
+        print('Episode index build complete')
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    # Usage: python scripts/build_episode_index.py [episode_id ...]
+    run(sys.argv[1:] or None)
@@ -10,11 +10,18 @@ from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.api.deps import get_db
+from app.core.config import get_settings
 from app.db.base import Base
 from app.db.models import Episode, SubtitleChunk, SubtitleLine, Title
 from app.main import create_app
 
 
+@pytest.fixture(autouse=True)
+def episode_index_dir(tmp_path, monkeypatch) -> None:
+    # Keep index artifacts and their lock files out of the working tree.
+    monkeypatch.setattr(get_settings(), 'episode_index_dir', str(tmp_path / 'episode_index'))
+
+
 @pytest.fixture(scope='function')
 def db_session() -> Session:
     engine = create_engine(
@@ -0,0 +1,457 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from app.services import cache_service
+
+
+class _FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name, args))
+
+    def execute(self):
+        return [getattr(self.client, name)(*args) for name, args in self.calls]
+
+
+class _FakeRedis:
+    """In-memory stand-in for the few redis-py calls cache_service makes."""
+
+    def __init__(self):
+        self.values = {}
+        self.published = []
+        self.gets = 0
+        self.fetched = []
+        self.pipelines = 0
+
+    def get(self, key):
+        self.gets += 1
+        return self.values.get(key)
+
+    def mget(self, keys):
+        self.gets += 1
+        self.fetched.extend(keys)
+        return [self.values.get(key) for key in keys]
+
+    def setex(self, key, _ttl, value):
+        self.values[key] = value
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    def eval(self, _script, _numkeys, key, token):
+        # The lease release script: delete only if the token still matches.
+        if self.values.get(key) == token:
+            del self.values[key]
+            return 1
+        return 0
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+    def pipeline(self):
+        self.pipelines += 1
+        return _FakePipeline(self)
+
+
+class _FakeAsyncRedis:
+    def __init__(self, client):
+        self.client = client
+
+    async def mget(self, keys):
+        return self.client.mget(keys)
+
+
+@pytest.fixture()
+def fake_redis(monkeypatch):
+    client = _FakeRedis()
+    monkeypatch.setattr(cache_service, '_redis_client', lambda: client)
+    monkeypatch.setattr(cache_service, '_async_redis_client', lambda: _FakeAsyncRedis(client))
+    monkeypatch.setattr(cache_service, '_start_invalidation_listener', lambda _client: None)
+    cache_service._local_cache().clear()
+    yield client
+    cache_service._local_cache().clear()
+
+
+def test_local_tier_serves_repeat_reads_and_follows_invalidations(db_session, ids, fake_redis):
+    episode_id = ids['episode_id']
+    assert cache_service.warmup_episode_chunks_cache(db_session, episode_id) == 1
+    channel, message = fake_redis.published[-1]
+    assert json.loads(message)['episode_id'] == episode_id
+
+    first = cache_service.get_cached_episode(episode_id)
+    assert [item['start_ms'] for item in first.lines] == [1000, 2000]
+    reads = fake_redis.gets
+    assert cache_service.get_cached_episode(episode_id).chunks[0] is first.chunks[0]
+    assert fake_redis.gets == reads
+
+    # Another worker re-ingested the episode: its message drops our copy.
+    manifest_key = cache_service._key_episode_manifest(episode_id)
+    manifest = {**json.loads(fake_redis.values[manifest_key]), 'generation': 'next'}
+    for key in cache_service._slice_keys(episode_id, manifest):
+        fake_redis.values[key] = json.dumps([])
+    fake_redis.values[manifest_key] = json.dumps(manifest)
+    assert cache_service.apply_invalidation_message(message) is None  # own message
+    other = json.dumps({'episode_id': episode_id, 'sender': 'another-worker'})
+    assert cache_service.apply_invalidation_message(other) == episode_id
+    assert cache_service.get_cached_episode(episode_id).chunks == []
+    assert cache_service.apply_invalidation_message('not json') is None
+
+    cache_service.invalidate_episode_chunks_cache(episode_id)
+    assert cache_service.get_cached_episode(episode_id) is None
+    assert fake_redis.published[-1][0] == channel
+
+
+def test_listener_starts_without_the_local_tier(db_session, ids, fake_redis, monkeypatch):
+    from app.core.config import get_settings
+    from app.rag.episode_index import get_episode_index
+    from app.rag.retrieval import load_episode_index
+
+    monkeypatch.setattr(get_settings(), 'episode_cache_local_size', 0)
+    started = []
+    monkeypatch.setattr(cache_service, '_start_invalidation_listener', started.append)
+    episode_id = ids['episode_id']
+    cache_service.warmup_episode_chunks_cache(db_session, episode_id)
+    assert cache_service.get_cached_episode(episode_id) is not None
+    assert started and started[-1] is fake_redis
+
+    # The episode index still follows another worker's re-ingest.
+    index = load_episode_index(db_session, episode_id)
+    assert get_episode_index(episode_id) is index
+    cache_service.apply_invalidation_message(json.dumps({'episode_id': episode_id, 'sender': 'another-worker'}))
+    assert get_episode_index(episode_id) is None
+
+
+def test_foreign_invalidation_drops_cached_retrievals(ids, fake_redis, monkeypatch):
+    from app.core.config import get_settings
+    from app.rag.episode_index import LineRecord
+    from app.rag.result_cache import get_cached_retrieval, retrieval_cache_key, store_cached_retrieval
+
+    monkeypatch.setattr(get_settings(), 'episode_cache_local_size', 0)
+    episode_id = ids['episode_id']
+    key = retrieval_cache_key(
+        scope='episode',
+        title_id=ids['title_id'],
+        episode_id=episode_id,
+        current_time_ms=5000,
+        normalized_question='what clue did b give',
+    )
+    line = LineRecord(id='cached-line', episode_id=episode_id, start_ms=1000, end_ms=1500, text='clue')
+    store_cached_retrieval(key, lines=[line], current_time_ms=5000, episode_ids=[episode_id])
+    assert get_cached_retrieval(key, episode_id=episode_id, current_time_ms=5000) == [line]
+
+    # Another worker re-ingested the episode; its message reaches us only through the listener.
+    message = json.dumps({'episode_id': episode_id, 'sender': 'another-worker'})
+    assert cache_service.apply_invalidation_message(message) == episode_id
+    assert get_cached_retrieval(key, episode_id=episode_id, current_time_ms=5000) is None
+
+
+def test_readers_fetch_only_the_slices_before_the_viewer(db_session, ids, fake_redis, monkeypatch):
+    from app.core.config import get_settings
+    from app.db.models import SubtitleChunk, SubtitleLine
+
+    monkeypatch.setattr(get_settings(), 'episode_cache_slice_ms', 60_000)
+    episode_id = ids['episode_id']
+    db_session.add(SubtitleLine(id='late-line', episode_id=episode_id, start_ms=150_000, end_ms=151_000, text='the ending'))
+    db_session.add(
+        SubtitleChunk(
+            episode_id=episode_id,
+            start_ms=150_000,
+            end_ms=151_000,
+            text_concat='the ending',
+            subtitle_line_ids=['late-line'],
+        )
+    )
+    db_session.commit()
+    assert cache_service.warmup_episode_chunks_cache(db_session, episode_id) == 2
+    previous = json.loads(fake_redis.values[cache_service._key_episode_manifest(episode_id)])
+    assert previous['slices'] == 3
+
+    fake_redis.fetched.clear()
+    early = cache_service.get_cached_episode(episode_id, until_ms=5_000)
+    assert early.horizon_ms == 59_999
+    assert [item['start_ms'] for item in early.chunks] == [1000]
+    assert 'late-line' not in {item['id'] for item in early.lines}
+    slice_keys = [key for key in fake_redis.fetched if not key.endswith(':slices')]
+    assert len(slice_keys) == 2 and all(key.endswith(':0') for key in slice_keys)
+
+    full = cache_service.get_cached_episode(episode_id, until_ms=150_000)
+    assert full.horizon_ms is None
+    assert [item['start_ms'] for item in full.chunks] == [1000, 150_000]
+    assert len(fake_redis.fetched) == 7  # manifest and slice 0 came from the local tier
+
+    # Without artifacts the worker indexes the prefix and extends it past the horizon.
+    from app.rag import retrieval
+
+    monkeypatch.setattr(get_settings(), 'episode_index_dir', '')
+    retrieval.drop_episode_index(episode_id)
+    index = retrieval.load_episode_index(db_session, episode_id, current_time_ms=5_000)
+    assert (len(index), index.horizon_ms) == (1, 59_999)
+    assert retrieval.load_episode_index(db_session, episode_id, current_time_ms=30_000) is index
+    index = retrieval.load_episode_index(db_session, episode_id, current_time_ms=150_000)
+    assert (len(index), index.horizon_ms) == (2, None)
+
+    # Generations are content hashes: unchanged content keeps its keys, new content gets
+    # new ones while readers of the previous manifest still find their slices.
+    cache_service.warmup_episode_chunks_cache(db_session, episode_id)
+    assert json.loads(fake_redis.values[cache_service._key_episode_manifest(episode_id)]) == previous
+    db_session.get(SubtitleLine, 'late-line').text = 'a different ending'
+    db_session.commit()
+    cache_service.warmup_episode_chunks_cache(db_session, episode_id)
+    current = json.loads(fake_redis.values[cache_service._key_episode_manifest(episode_id)])
+    assert current['generation'] != previous['generation']
+    assert all(key in fake_redis.values for key in cache_service._slice_keys(episode_id, previous))
+
+
+def test_title_warmup_writes_every_episode_in_one_transaction(client, db_session, ids, fake_redis, monkeypatch):
+    from app.core.config import get_settings
+    from app.db.models import Episode
+
+    monkeypatch.setattr(get_settings(), 'episode_index_dir', '')
+    db_session.add(Episode(id='ep-2', title_id=ids['title_id'], season=1, episode_number=2, name='Ep2', duration_ms=1))
+    db_session.commit()
+
+    response = client.post(f"/api/titles/{ids['title_id']}/cache/warmup")
+    assert response.status_code == 200
+    assert [item['cached_chunks'] for item in response.json()['episodes']] == [1, 0]
+    assert fake_redis.pipelines == 1
+    assert len(fake_redis.published) == 2
+
+    monkeypatch.setattr(get_settings(), 'episode_cache_local_size', 0)
+    reads = fake_redis.gets
+    episodes = asyncio.run(cache_service.get_cached_episodes_async([ids['episode_id'], 'ep-2', 'missing']))
+    assert fake_redis.gets == reads + 2  # manifests, then slices
+    assert episodes[ids['episode_id']].chunks == cache_service.get_cached_episode(ids['episode_id']).chunks
+    assert episodes['ep-2'].chunks == [] and 'missing' not in episodes
+
+    cache_service.invalidate_episodes_cache([ids['episode_id'], 'ep-2'])
+    assert fake_redis.pipelines == 2
+    assert cache_service.get_cached_episodes([ids['episode_id'], 'ep-2']) == {}
+
+
+def test_concurrent_misses_fill_the_cache_once(db_session, ids, fake_redis, monkeypatch):
+    episode_id = ids['episode_id']
+    chunk = {'id': 'c1', 'episode_id': episode_id, 'start_ms': 1000, 'end_ms': 2000, 'text_concat': 'clue',
+             'subtitle_line_ids': [], 'embedding': None, 'tokens': None}
+    loads = []
+
+    def slow_payloads(_db, episode_ids):
+        loads.append(episode_ids)
+        time.sleep(0.05)
+        return {episode_ids[0]: ([chunk], [])}
+
+    monkeypatch.setattr(cache_service, '_episode_payloads', slow_payloads)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache_service.get_or_fill_cached_episode(db_session, episode_id)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert [episode.chunks[0]['id'] for episode in results] == ['c1'] * 8
+    assert cache_service._key_episode_fill_lease(episode_id) not in fake_redis.values  # lease released
+
+
+def test_fill_waits_for_the_lease_holder_on_another_host(ids, fake_redis, monkeypatch):
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), 'episode_cache_fill_wait_ms', 60)
+    monkeypatch.setattr(cache_service, '_episode_payloads', lambda *_: pytest.fail('lease holder loads, not us'))
+    episode_id = ids['episode_id']
+    fake_redis.values[cache_service._key_episode_fill_lease(episode_id)] = 'other-host'
+    assert cache_service.get_or_fill_cached_episode(None, episode_id) is None  # caller falls back to the database
+
+    payloads = {episode_id: ([], [{'id': 'l1', 'episode_id': episode_id, 'start_ms': 5, 'end_ms': 6, 'text': 'hi'}])}
+    threading.Timer(0.01, lambda: cache_service.write_episode_payloads(cache_service.get_cache_backend(), payloads)).start()
+    monkeypatch.setattr(get_settings(), 'episode_cache_fill_wait_ms', 2000)
+    assert cache_service.get_or_fill_cached_episode(None, episode_id).lines[0]['id'] == 'l1'
+
+
+@pytest.mark.parametrize('backend', ['memory', 'disk'])
+def test_single_node_backends_cache_without_redis(db_session, ids, monkeypatch, tmp_path, backend):
+    from app.core.config import get_settings
+    from app.services.cache_backends import DiskCacheBackend, MemoryCacheBackend
+
+    monkeypatch.setattr(cache_service, '_redis_client', lambda: None)
+    monkeypatch.setattr(get_settings(), 'episode_cache_backend', backend)
+    monkeypatch.setattr(get_settings(), 'episode_cache_disk_path', str(tmp_path / 'cache.sqlite3'))
+    cache_service._memory_backend.cache_clear()
+    cache_service._disk_backend.cache_clear()
+    episode_id = ids['episode_id']
+
+    assert cache_service.warmup_episode_chunks_cache(db_session, episode_id) == 1
+    assert [line['start_ms'] for line in cache_service.get_cached_episode(episode_id).lines] == [1000, 2000]
+    store = cache_service.get_cache_backend()
+    if backend == 'disk':  # survives a restart
+        assert DiskCacheBackend(tmp_path / 'cache.sqlite3').mget([cache_service._key_episode_manifest(episode_id)])[0]
+
+    assert store.add('lease', 'a', 10_000) and not store.add('lease', 'b', 10_000)
+    store.release('lease', 'b')
+    assert not store.add('lease', 'c', 10_000)
+    store.release('lease', 'a')
+    assert store.add('lease', 'c', 10_000)
+
+    cache_service.invalidate_episode_chunks_cache(episode_id)
+    assert cache_service.get_cached_episode(episode_id) is None
+    cache_service._memory_backend.cache_clear()
+    cache_service._disk_backend.cache_clear()
+
+    bounded = MemoryCacheBackend(max_bytes=10)
+    bounded.write(sets=[('a', b'123456'), ('b', b'123456')], ttl_seconds=60)
+    assert bounded.mget(['a', 'b']) == [None, b'123456']
+
+
+def test_post_commit_refresh_moves_readers_to_the_new_version(db_session, ids, fake_redis, monkeypatch):
+    from app.core.config import get_settings
+    from app.db.models import SubtitleLine
+    from app.rag.episode_index import get_episode_index
+    from app.services.warmup_service import refresh_episode_caches
+
+    monkeypatch.setattr(get_settings(), 'episode_index_dir', '')
+    episode_id = ids['episode_id']
+    cache_service.warmup_episode_chunks_cache(db_session, episode_id)
+    before = cache_service.get_cached_episode(episode_id)
+
+    # Committed, not yet refreshed: readers still get the previous, complete version.
+    db_session.add(SubtitleLine(id='new-line', episode_id=episode_id, start_ms=3000, end_ms=3100, text='new clue'))
+    db_session.commit()
+    assert cache_service.get_cached_episode(episode_id).lines == before.lines
+
+    refresh_episode_caches(db_session.get_bind(), [episode_id])
+    assert 'new-line' in {line['id'] for line in cache_service.get_cached_episode(episode_id).lines}
+    assert get_episode_index(episode_id) is not None
+
+
+def test_refresh_waits_for_a_fill_that_read_before_the_commit(db_session, ids, fake_redis):
+    from app.db.models import SubtitleLine
+
+    episode_id = ids['episode_id']
+    # A fill on another host holds the lease and read its snapshot before the ingest committed.
+    lease_key = cache_service._key_episode_fill_lease(episode_id)
+    fake_redis.values[lease_key] = 'stale-fill'
+    stale = cache_service._episode_payloads(db_session, [episode_id])
+    db_session.add(SubtitleLine(id='new-line', episode_id=episode_id, start_ms=3000, end_ms=3100, text='new clue'))
+    db_session.commit()
+
+    def finish_stale_fill():
+        cache_service.write_episode_payloads(cache_service.get_cache_backend(), stale)
+        fake_redis.eval(None, 1, lease_key, 'stale-fill')
+
+    timer = threading.Timer(0.05, finish_stale_fill)
+    timer.start()
+    cache_service.warmup_episode_chunks_cache(db_session, episode_id)
+    timer.join()
+    assert 'new-line' in {line['id'] for line in cache_service.get_cached_episode(episode_id).lines}
+    assert lease_key not in fake_redis.values
+
+
+def test_warmup_waits_once_for_all_contended_leases(db_session, ids, fake_redis, monkeypatch):
+    from app.core.config import get_settings
+    from app.db.models import Episode
+
+    monkeypatch.setattr(get_settings(), 'episode_cache_fill_lease_ms', 400)
+    db_session.add(Episode(id='ep-2', title_id=ids['title_id'], season=1, episode_number=2, name='Ep2'))
+    db_session.commit()
+    episode_ids = [ids['episode_id'], 'ep-2']
+    # Fills on another host hold both leases and never finish.
+    for episode_id in episode_ids:
+        fake_redis.values[cache_service._key_episode_fill_lease(episode_id)] = 'stuck-fill'
+
+    started = time.monotonic()
+    cache_service.warmup_episodes_cache(db_session, episode_ids)
+    assert time.monotonic() - started < 0.7
+    assert cache_service.get_cached_episode('ep-2') is not None
+
+
+def test_foreign_ingest_replaces_the_mapped_artifact(db_session, ids, fake_redis):
+    from app.db.models import SubtitleLine
+    from app.rag.episode_index import drop_episode_index
+    from app.rag.index_artifact import ArtifactChunks, artifact_path
+    from app.rag.retrieval import load_episode_index
+
+    episode_id = ids['episode_id']
+    drop_episode_index(episode_id)
+    mapped = load_episode_index(db_session, episode_id)
+    assert isinstance(mapped.chunks, ArtifactChunks)
+    assert mapped.generation == cache_service.get_cached_generation(episode_id)
+
+    # Another host re-ingests the episode; only its cache write and message reach us.
+    db_session.add(SubtitleLine(id='new-line', episode_id=episode_id, start_ms=3000, end_ms=3100, text='new clue'))
+    db_session.commit()
+    backend = cache_service.get_cache_backend()
+    cache_service.write_episode_payloads(backend, cache_service._episode_payloads(db_session, [episode_id]))
+    cache_service.apply_invalidation_message(json.dumps({'episode_id': episode_id, 'sender': 'another-host'}))
+
+    reloaded = load_episode_index(db_session, episode_id)
+    assert isinstance(reloaded.chunks, ArtifactChunks)
+    assert 'new-line' in reloaded.lines
+    assert reloaded.generation != mapped.generation
+
+    cache_service.invalidate_episode_chunks_cache(episode_id)
+    assert not artifact_path(episode_id).exists()
+    assert not artifact_path(episode_id).with_suffix('.lock').exists()
+
+
+def test_binary_cache_format_round_trips_payloads():
+    from app.services import cache_codec
+
+    chunks = [
+        {
+            'id': f'chunk-{idx}',
+            'episode_id': 'ep-1',
+            'start_ms': start_ms,
+            'end_ms': start_ms + 4_000,
+            'text_concat': f'대사 {idx} harbor',
+            'subtitle_line_ids': [f'line-{idx}', f'line-{idx + 1}'],
+            'embedding': None if idx == 1 else [0.25 * idx, -0.5, 1.0],
+            'tokens': None if idx == 2 else ['대사', 'harbor'],
+        }
+        for idx, start_ms in enumerate((1_000, 900, 70_000))
+    ]
+    encoded = cache_codec.dumps(chunks, kind=cache_codec.KIND_CHUNKS, fmt='binary')
+    assert isinstance(encoded, bytes) and len(encoded) < len(cache_codec.dumps(chunks, kind=cache_codec.KIND_CHUNKS, fmt='json').encode())
+    assert cache_codec.loads(encoded) == chunks
+    assert cache_codec.loads(cache_codec.dumps(chunks, kind=cache_codec.KIND_CHUNKS, fmt='json')) == chunks
+
+    lines = [{'id': 'l', 'episode_id': 'ep-1', 'start_ms': 5, 'end_ms': 9, 'speaker_text': None, 'text': '', 'tokens': []}]
+    assert cache_codec.loads(cache_codec.encode_payload(lines, cache_codec.KIND_LINES)) == lines
+
+    future = bytes(encoded[:4]) + bytes([cache_codec.FORMAT_VERSION + 1]) + encoded[5:]
+    assert cache_codec.loads(future) is None
+    assert cache_codec.loads(encoded[:-7]) is None
+
+
+def test_warmup_writes_binary_payloads_that_readers_decode(db_session, ids, fake_redis, monkeypatch):
+    from app.core.config import get_settings
+
+    monkeypatch.setattr(get_settings(), 'episode_cache_format', 'binary')
+    episode_id = ids['episode_id']
+    cache_service.warmup_episode_chunks_cache(db_session, episode_id)
+    manifest = json.loads(fake_redis.values[cache_service._key_episode_manifest(episode_id)])
+    raw = fake_redis.values[cache_service._slice_keys(episode_id, manifest)[0]]
+    assert raw.startswith(b'NPXC')
+
+    cached = cache_service.get_cached_episode(episode_id)
+    chunks = cached.chunks
+    assert chunks[0]['subtitle_line_ids'] and chunks[0]['embedding'] == pytest.approx([0.1, 0.2, 0.3, 0.4])
+    assert [line['text'] for line in cached.lines] == [
+        'A says first clue',
+        'B gives later clue',
+    ]
@@ -0,0 +1,48 @@
+from dataclasses import dataclass
+
+from app.services.chunk_service import group_lines_by_time, group_lines_fixed
+
+
+@dataclass
+class Line:
+    start_ms: int
+    end_ms: int
+
+
+def _starts(groups):
+    return [[line.start_ms for line in group] for group in groups]
+
+
+def test_time_windows_overlap_and_break_at_scene_gaps():
+    lines = [Line(start, start + 900) for start in (0, 1_000, 4_000, 6_000, 9_000, 40_000, 41_000, 45_000)]
+
+    groups = group_lines_by_time(lines, window_ms=5_000, stride_ms=2_500, gap_ms=10_000)
+
+    assert _starts(groups) == [
+        [0, 1_000, 4_000],
+        [4_000, 6_000],
+        [6_000, 9_000],
+        [40_000, 41_000],
+        [45_000],
+    ]
+    covered = {line.start_ms for group in groups for line in group}
+    assert covered == {line.start_ms for line in lines}
+    # No chunk spans the 9s -> 40s silence.
+    assert all(group[-1].start_ms - group[0].start_ms < 5_000 for group in groups)
+
+
+def test_time_windows_without_overlap_partition_lines():
+    lines = [Line(start, start + 500) for start in range(0, 60_000, 700)]
+    groups = group_lines_by_time(lines, window_ms=10_000, stride_ms=10_000, gap_ms=5_000)
+    assert [line for group in groups for line in group] == lines
+
+
+def test_zero_scene_gap_disables_scene_breaks():
+    lines = [Line(start, start + 900) for start in (0, 1_000, 4_000, 40_000, 41_000)]
+    groups = group_lines_by_time(lines, window_ms=50_000, stride_ms=50_000, gap_ms=0)
+    assert _starts(groups) == [[0, 1_000, 4_000, 40_000, 41_000]]
+
+
+def test_fixed_grouping_keeps_line_count_chunks():
+    lines = [Line(start, start + 1) for start in range(13)]
+    assert [len(group) for group in group_lines_fixed(lines, 6)] == [6, 6, 1]
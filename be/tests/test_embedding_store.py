@@ -0,0 +1,72 @@
+from sqlalchemy import func, select
+
+from app.db.models import ChunkEmbedding, SubtitleChunk, SubtitleLine
+from app.services.chunk_service import rebuild_chunks_for_episodes
+from app.services.embedding_store import content_hash, embed_texts
+
+
+class CountingEmbedder:
+    name = 'counting-test-8'
+    dim = 8
+
+    def __init__(self):
+        self.embedded: list[str] = []
+
+    def embed(self, text):
+        return self.embed_batch([text])[0]
+
+    def embed_batch(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(text))] + [0.0] * 7 for text in texts]
+
+
+def test_rebuild_only_embeds_changed_chunk_texts(db_session, ids, monkeypatch):
+    embedder = CountingEmbedder()
+    monkeypatch.setattr('app.services.embedding_store.get_embedder', lambda: embedder)
+    episode_id = ids['episode_id']
+    for idx in range(10):
+        db_session.add(
+            SubtitleLine(episode_id=episode_id, start_ms=10_000 + idx * 1000, end_ms=10_500 + idx * 1000, text=f'line {idx}')
+        )
+
+    rebuild_chunks_for_episodes(db_session, [episode_id])
+    db_session.commit()
+    first_pass = len(embedder.embedded)
+    assert first_pass == db_session.scalar(select(func.count()).select_from(SubtitleChunk))
+
+    last_line = db_session.scalar(
+        select(SubtitleLine).where(SubtitleLine.episode_id == episode_id).order_by(SubtitleLine.start_ms.desc())
+    )
+    last_line.text = 'corrected line'
+    rebuild_chunks_for_episodes(db_session, [episode_id])
+    db_session.commit()
+
+    assert len(embedder.embedded) == first_pass + 1
+    assert db_session.scalar(select(func.count()).select_from(ChunkEmbedding)) == first_pass + 1
+    assert all(chunk.content_hash for chunk in db_session.scalars(select(SubtitleChunk)).all())
+
+
+def test_embedding_stored_by_a_concurrent_ingest_is_skipped(db_session, monkeypatch):
+    embedder = CountingEmbedder()
+    embed_batch = embedder.embed_batch
+
+    def embed_while_another_ingest_commits(texts):
+        # Another ingest stores the same text after our lookup missed it.
+        db_session.add(
+            ChunkEmbedding(
+                content_hash=content_hash('shared', model=embedder.name),
+                model=embedder.name,
+                dim=embedder.dim,
+                embedding=[0.0] * 8,
+            )
+        )
+        db_session.commit()
+        return embed_batch(texts)
+
+    monkeypatch.setattr(embedder, 'embed_batch', embed_while_another_ingest_commits)
+    hashes, vectors = embed_texts(db_session, ['shared', 'fresh'], embedder=embedder)
+    db_session.commit()
+
+    assert len(vectors) == 2
+    assert db_session.scalar(select(func.count()).select_from(ChunkEmbedding)) == 2
+    assert set(hashes) == set(db_session.scalars(select(ChunkEmbedding.content_hash)).all())
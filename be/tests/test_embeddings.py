@@ -0,0 +1,58 @@
+import math
+
+from app.rag.embeddings import HashingEmbedder
+
+
+def _dot(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+def test_hashing_embedder_is_normalized_and_deterministic():
+    embedder = HashingEmbedder(dim=256)
+    vector = embedder.embed('The detective found the letter')
+
+    assert len(vector) == 256
+    assert math.isclose(math.sqrt(_dot(vector, vector)), 1.0, rel_tol=1e-4)
+    assert HashingEmbedder(dim=256).embed('The detective found the letter') == vector
+    assert embedder.embed('') == [0.0] * 256
+
+
+def test_hashing_embedder_ranks_overlapping_text_higher():
+    embedder = HashingEmbedder(dim=384)
+    query = embedder.embed('지하실에 숨은 범인')
+
+    related = embedder.embed('범인은 지하실에 숨어 있었어')
+    unrelated = embedder.embed('오늘 저녁 메뉴는 라면이야')
+    assert _dot(query, related) > _dot(query, unrelated)
+
+
+def test_query_embeddings_are_memoized_and_preloaded(client, db_session):
+    from app.db.models import ChatMessage, ChatSession
+    from app.rag.embeddings import get_embedder
+    from app.rag.query_embeddings import embed_query, query_embedding_cache_stats
+    from app.services.recap_service import RECAP_QUERY_SEEDS
+    from app.services.warmup_service import frequent_questions, warm_query_embeddings
+
+    session = ChatSession(title_id=db_session.info['title_id'], episode_id=db_session.info['episode_id'])
+    db_session.add(session)
+    db_session.flush()
+    for content in ('범인은 누구야?', '범인은 누구야?', 'who hid the letter'):
+        db_session.add(ChatMessage(session_id=session.id, role='user', content=content))
+    db_session.flush()
+
+    warm_query_embeddings(db_session)
+    before = query_embedding_cache_stats()
+    top_question = frequent_questions(db_session, limit=1)[0]
+    for text in [*RECAP_QUERY_SEEDS.values(), top_question]:
+        assert embed_query(text) == get_embedder().embed(text)
+    after = query_embedding_cache_stats()
+    assert after['hits'] - before['hits'] == len(RECAP_QUERY_SEEDS) + 1
+    assert after['misses'] == before['misses']
+
+    uncached = 'a question nobody asked before 7f3a'
+    assert embed_query(uncached) == embed_query(uncached)
+    assert query_embedding_cache_stats()['misses'] == after['misses'] + 1
+
+    stats = client.get('/api/health/caches').json()
+    assert 0.0 < stats['query_embeddings']['hit_ratio'] <= 1.0
+    assert 'hit_ratio' in stats['retrieval_results']
@@ -0,0 +1,282 @@
+import math
+import random
+from collections import Counter
+
+from app.rag import retrieval
+from app.rag.embeddings import HashingEmbedder
+from app.rag.episode_index import EpisodeIndex, LineRecord, RetrievalChunk
+from app.rag.tokenizer import chunk_terms
+
+_embed = HashingEmbedder(dim=64).embed
+
+
+def _reference_rerank(chunks, query, current_time_ms, limit, window=120):
+    query_tokens = chunk_terms(query)
+    query_embedding = _embed(query)
+    candidates = sorted(
+        (chunk for chunk in chunks if chunk.start_ms <= current_time_ms),
+        key=lambda item: item.start_ms,
+        reverse=True,
+    )[:window]
+
+    def _cosine(a, b):
+        if not a or not b or len(a) != len(b):
+            return 0.0
+        dot = sum(x * y for x, y in zip(a, b))
+        norm_a = sum(x * x for x in a) ** 0.5
+        norm_b = sum(y * y for y in b) ** 0.5
+        if norm_a == 0.0 or norm_b == 0.0:
+            return 0.0
+        return max(-1.0, min(1.0, dot / (norm_a * norm_b)))
+
+    prefix = [Counter(chunk_terms(chunk.text_concat)) for chunk in chunks if chunk.start_ms <= current_time_ms]
+    avg_length = sum(sum(doc.values()) for doc in prefix) / max(1, len(prefix))
+    q_counter = Counter(query_tokens)
+    idf = {}
+    for token in q_counter:
+        df = sum(1 for doc in prefix if token in doc)
+        idf[token] = math.log(1.0 + (len(prefix) - df + 0.5) / (df + 0.5))
+    upper_bound = sum(count * idf[token] * 2.2 for token, count in q_counter.items())
+
+    scored = []
+    for chunk in candidates:
+        t_counter = Counter(chunk_terms(chunk.text_concat))
+        length = sum(t_counter.values())
+        bm25 = 0.0
+        for token, count in q_counter.items():
+            tf = t_counter[token]
+            if tf:
+                bm25 += count * idf[token] * tf * 2.2 / (tf + 1.2 * (0.25 + 0.75 * length / avg_length))
+        lexical = bm25 / upper_bound if upper_bound else 0.0
+        vector = _cosine(query_embedding, chunk.embedding or [])
+        scored.append((chunk, (0.35 * lexical) + (0.65 * max(0.0, vector))))
+    scored.sort(key=lambda item: (item[1], item[0].start_ms), reverse=True)
+    return [chunk for chunk, _ in scored[:limit]]
+
+
+def test_episode_index_matches_reference_bm25_rerank():
+    rng = random.Random(7)
+    words = ['clue', 'detective', 'night', 'door', 'knife', 'letter', 'brother', 'train', 'rain', 'secret']
+    chunks = []
+    for idx in range(400):
+        text = ' '.join(rng.choice(words) for _ in range(rng.randint(3, 12)))
+        chunks.append(
+            RetrievalChunk(
+                start_ms=idx * 1000,
+                text_concat=text,
+                subtitle_line_ids=[f'line-{idx}'],
+                embedding=_embed(text),
+            )
+        )
+    index = EpisodeIndex(list(reversed(chunks)), tokenize=chunk_terms, window=120)
+
+    for current_time_ms in (0, 5_500, 150_000, 399_000, 1_000_000):
+        for query in ('who left the letter', 'secret door at night', 'knife'):
+            expected = _reference_rerank(chunks, query, current_time_ms, 8)
+            actual = index.search(
+                query=query,
+                query_embedding=_embed(query),
+                current_time_ms=current_time_ms,
+                limit=8,
+            )
+            assert [c.start_ms for c in actual] == [c.start_ms for c in expected]
+
+
+def test_episode_index_applies_time_cutoff():
+    chunks = [
+        RetrievalChunk(start_ms=1000, text_concat='early clue', subtitle_line_ids=['a'], embedding=[0.1, 0.2, 0.3, 0.4]),
+        RetrievalChunk(start_ms=5000, text_concat='late clue', subtitle_line_ids=['b'], embedding=None),
+    ]
+    index = EpisodeIndex(chunks, tokenize=chunk_terms)
+
+    assert index.search(query='clue', query_embedding=[0.1, 0.2, 0.3, 0.4], current_time_ms=999, limit=5) == []
+    result = index.search(query='clue', query_embedding=[0.1, 0.2, 0.3, 0.4], current_time_ms=4999, limit=5)
+    assert [chunk.start_ms for chunk in result] == [1000]
+
+
+def test_full_episode_search_scans_the_whole_prefix():
+    rng = random.Random(11)
+    words = ['clue', 'detective', 'night', 'door', 'knife', 'letter', 'brother', 'train', 'rain', 'secret']
+    chunks = []
+    for idx in range(600):
+        text = ' '.join(rng.choice(words) for _ in range(rng.randint(3, 12)))
+        chunks.append(RetrievalChunk(start_ms=idx * 1000, text_concat=text, subtitle_line_ids=[], embedding=_embed(text)))
+    chunks[3].text_concat = 'the lighthouse keeper hid the letter'
+    chunks[3].embedding = _embed(chunks[3].text_concat)
+    index = EpisodeIndex(chunks, tokenize=chunk_terms)
+
+    for current_time_ms in (500, 40_000, 599_000):
+        for query in ('lighthouse keeper', 'secret door at night'):
+            expected = _reference_rerank(chunks, query, current_time_ms, 8, window=None)
+            actual = index.search(query=query, query_embedding=_embed(query), current_time_ms=current_time_ms, limit=8)
+            assert [c.start_ms for c in actual] == [c.start_ms for c in expected]
+
+    # A match far behind the viewer is still found.
+    early = index.search(query='lighthouse keeper', query_embedding=[0.0] * 64, current_time_ms=599_000, limit=3)
+    assert early[0].start_ms == 3000
+
+
+def test_search_resolves_lines_from_the_index():
+    rng = random.Random(5)
+    words = ['harbor', 'storm', 'letter', 'brother', 'ring', 'debt', 'exam', 'fever']
+    chunks, lines = [], []
+    for idx in range(200):
+        line_id = f'line-{idx}'
+        text = ' '.join(rng.choice(words) for _ in range(5))
+        lines.append(LineRecord(id=line_id, episode_id='ep', start_ms=idx * 2_000, end_ms=idx * 2_000 + 900, text=text))
+        chunks.append(
+            RetrievalChunk(
+                start_ms=idx * 2_000,
+                end_ms=idx * 2_000 + 900,
+                text_concat=text,
+                subtitle_line_ids=[line_id],
+                embedding=_embed(text),
+                episode_id='ep',
+            )
+        )
+    index = EpisodeIndex(chunks, tokenize=chunk_terms, lines=lines)
+
+    for current_time_ms in (10_000, 200_000, 400_000):
+        found = index.search(
+            query='storm letter',
+            query_embedding=_embed('storm letter'),
+            current_time_ms=current_time_ms,
+            limit=8,
+        )
+        resolved = index.resolve_lines(found, episode_id='ep', current_time_ms=current_time_ms, max_lines=6)
+        expected = sorted(
+            (line for line in lines if line.id in {c.subtitle_line_ids[0] for c in found}),
+            key=lambda line: line.start_ms,
+        )[-6:]
+        assert resolved == expected
+
+    without_lines = EpisodeIndex(chunks, tokenize=chunk_terms)
+    assert without_lines.resolve_lines(chunks[:1], episode_id='ep', current_time_ms=400_000) is None
+
+
+def test_ivf_search_recall_against_exact_scan():
+    rng = random.Random(23)
+    words = ['clue', 'detective', 'night', 'door', 'knife', 'letter', 'brother', 'train', 'rain', 'secret']
+    chunks = []
+    for idx in range(3000):
+        text = ' '.join(rng.choice(words) for _ in range(rng.randint(3, 12)))
+        topic = rng.randrange(24)
+        embedding = [rng.gauss(1.0 if dim == topic else 0.0, 0.35) for dim in range(24)]
+        chunks.append(RetrievalChunk(start_ms=idx * 1000, text_concat=text, subtitle_line_ids=[], embedding=embedding))
+    chunks[7].text_concat = 'the lighthouse keeper hid the letter'
+
+    exact = EpisodeIndex(chunks, tokenize=chunk_terms)
+    approximate = EpisodeIndex(chunks, tokenize=chunk_terms)
+    approximate.use_ivf(lists=48, probes=6)
+    assert approximate.ivf is not None
+
+    hits = total = 0
+    for current_time_ms in (3_000, 400_000, 1_500_000, 2_999_000):
+        for _ in range(10):
+            query_embedding = [rng.gauss(0.0, 1.0) for _ in range(24)]
+            kwargs = dict(query='secret door', query_embedding=query_embedding, current_time_ms=current_time_ms, limit=8)
+            expected = {c.start_ms for c in exact.search(**kwargs)}
+            actual = approximate.search(**kwargs)
+            assert len(actual) == len(expected)
+            assert all(c.start_ms <= current_time_ms for c in actual)
+            hits += len(expected & {c.start_ms for c in actual})
+            total += len(expected)
+    assert hits / total >= 0.9
+
+    found = approximate.search(
+        query='lighthouse keeper',
+        query_embedding=[0.0] * 24,
+        current_time_ms=2_999_000,
+        limit=3,
+    )
+    assert found[0].start_ms == 7000
+
+
+def test_scene_search_expands_only_the_best_scenes():
+    rng = random.Random(5)
+    words = ['harbor', 'storm', 'letter', 'brother', 'ring', 'debt', 'exam', 'fever']
+    chunks, lines = [], []
+    start_ms = 0
+    for scene in range(40):
+        start_ms += 60_000  # silence between scenes
+        for _ in range(rng.randint(20, 40)):
+            line_id = f'line-{len(lines)}'
+            text = ' '.join(rng.choice(words) for _ in range(5))
+            lines.append(LineRecord(id=line_id, episode_id='ep', start_ms=start_ms, end_ms=start_ms + 900, text=text))
+            embedding = [rng.gauss(1.0 if dim == scene % 16 else 0.0, 0.3) for dim in range(16)]
+            chunks.append(
+                RetrievalChunk(
+                    start_ms=start_ms,
+                    end_ms=start_ms + 900,
+                    text_concat=text,
+                    subtitle_line_ids=[line_id],
+                    embedding=embedding,
+                    episode_id='ep',
+                )
+            )
+            start_ms += 2_000
+    chunks[5].text_concat = 'the lighthouse keeper hid the letter'
+
+    exact = EpisodeIndex(chunks, tokenize=chunk_terms)
+    scenes = EpisodeIndex(chunks, tokenize=chunk_terms, scene_gap_ms=10_000, lines=lines)
+    scenes.use_scenes(max_chunks=16, probes=6)
+    scene_of_row = scenes.scene_of_row(16)
+    assert scenes.ivf.lists == scene_of_row[-1] + 1 > 40
+    assert max(Counter(scene_of_row.tolist()).values()) <= 16
+    assert all(scene_of_row[row] == scene_of_row[row - 1] + 1 for row in range(1, len(chunks)) if scenes.scene_breaks[row])
+
+    hits = total = 0
+    for current_time_ms in (70_000, start_ms // 2, start_ms):
+        for dim in (0, 3, 7):
+            for query in ('storm letter', 'unknown words'):
+                kwargs = dict(
+                    query=query,
+                    query_embedding=[1.0 if d == dim else 0.0 for d in range(16)],
+                    current_time_ms=current_time_ms,
+                    limit=8,
+                )
+                expected = {c.start_ms for c in exact.search(**kwargs)}
+                found = scenes.search(**kwargs)
+                assert len(found) == len(expected)
+                assert all(c.start_ms <= current_time_ms for c in found)
+                hits += len(expected & {c.start_ms for c in found})
+                total += len(expected)
+
+                resolved = scenes.resolve_lines(found, episode_id='ep', current_time_ms=current_time_ms, max_lines=6)
+                assert resolved == sorted(
+                    (line for line in lines if line.id in {c.subtitle_line_ids[0] for c in found}),
+                    key=lambda line: line.start_ms,
+                )[-6:]
+    assert hits / total >= 0.95
+
+    # Without lexical matches only the rows of the probed scenes are scored.
+    scored = []
+    score_rows = scenes._score_rows
+    scenes._score_rows = lambda rows, *args: scored.append(rows.size) or score_rows(rows, *args)
+    scenes.search(query='unknown words', query_embedding=[1.0] + [0.0] * 15, current_time_ms=start_ms, limit=8)
+    assert len(scored) == 1 and scored[0] <= 6 * 16 < len(chunks)
+
+    early = scenes.search(query='lighthouse keeper', query_embedding=[0.0] * 16, current_time_ms=start_ms, limit=3)
+    assert early[0].start_ms == chunks[5].start_ms
+
+
+def test_long_episodes_take_the_ivf_path_by_default():
+    rng = random.Random(29)
+    chunks = []
+    for idx in range(3000):
+        topic = rng.randrange(24)
+        embedding = [rng.gauss(1.0 if dim == topic else 0.0, 0.35) for dim in range(24)]
+        chunks.append(RetrievalChunk(start_ms=idx * 1000, text_concat=f'line {idx}', subtitle_line_ids=[], embedding=embedding))
+
+    short = retrieval._apply_vector_backend(EpisodeIndex(chunks[:300], tokenize=chunk_terms))
+    long = retrieval._apply_vector_backend(EpisodeIndex(chunks, tokenize=chunk_terms))
+    assert short.ivf is None
+    assert long.ivf is not None
+
+    scored = []
+    score_rows = long._score_rows
+    long._score_rows = lambda rows, *args: scored.append(rows.size) or score_rows(rows, *args)
+    found = long.search(query='unknown words', query_embedding=[1.0] + [0.0] * 23, current_time_ms=2_999_000, limit=8)
+    assert len(found) == 8
+    # Only the probed lists are scored, not the 3000-chunk prefix.
+    assert len(scored) == 1 and scored[0] < len(chunks) // 4
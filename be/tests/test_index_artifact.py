@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from app.core.config import get_settings
+from app.rag import retrieval
+from app.rag.embeddings import HashingEmbedder
+from app.rag.episode_index import EpisodeIndex, LineRecord, RetrievalChunk, drop_episode_index
+from app.rag.index_artifact import (
+    ArtifactChunks,
+    artifact_path,
+    load_episode_artifact,
+    remove_episode_artifact,
+    write_episode_artifact,
+)
+from app.rag.retrieval import load_episode_index
+from app.rag.tokenizer import chunk_terms
+
+
+def _chunks(count):
+    embedder = HashingEmbedder(dim=32)
+    words = ['harbor', 'letter', 'brother', 'storm', 'lantern', '약속', '비밀']
+    chunks = []
+    for idx in range(count):
+        text = f'{words[idx % len(words)]} {words[(idx * 3) % len(words)]} scene {idx}'
+        chunks.append(
+            RetrievalChunk(
+                start_ms=idx * 1_000,
+                text_concat=text,
+                subtitle_line_ids=[f'line-{idx}-a', f'line-{idx}-b'],
+                embedding=embedder.embed(text),
+                episode_id='ep-1',
+            )
+        )
+    return chunks
+
+
+def _lines(count):
+    return [
+        LineRecord(
+            id=f'line-{idx}-{part}',
+            episode_id='ep-1',
+            start_ms=idx * 1_000 + (500 if part == 'b' else 0),
+            end_ms=idx * 1_000 + 900,
+            text=f'대사 {idx}{part}',
+            speaker_text=None if idx % 3 else f'speaker {idx}',
+            tokens=None if idx % 5 == 0 else ['대사', f'{idx}{part}'],
+        )
+        for idx in range(count)
+        for part in ('a', 'b')
+    ]
+
+
+def test_mapped_artifact_matches_built_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), 'episode_index_dir', str(tmp_path))
+    built = EpisodeIndex(_chunks(300), tokenize=chunk_terms, lines=_lines(300))
+    write_episode_artifact(built, 'ep-1')
+
+    mapped = load_episode_artifact('ep-1', tokenize=chunk_terms)
+    assert mapped is not None
+    assert len(mapped) == len(built)
+    assert {line_id: mapped.lines[line_id] for line_id in mapped.lines} == dict(built.lines)
+
+    query = 'storm lantern 비밀'
+    embedding = HashingEmbedder(dim=32).embed(query)
+    for current_time_ms in (0, 45_500, 299_000):
+        expected = built.search(query=query, query_embedding=embedding, current_time_ms=current_time_ms, limit=8)
+        actual = mapped.search(query=query, query_embedding=embedding, current_time_ms=current_time_ms, limit=8)
+        assert [(c.start_ms, c.text_concat, c.subtitle_line_ids) for c in actual] == [
+            (c.start_ms, c.text_concat, c.subtitle_line_ids) for c in expected
+        ]
+        assert all(chunk.start_ms <= current_time_ms for chunk in actual)
+        resolve = dict(episode_id='ep-1', current_time_ms=current_time_ms, max_lines=6)
+        assert mapped.resolve_lines(actual, **resolve) == built.resolve_lines(expected, **resolve)
+
+    # Scene lists are derived from the stored scene breaks.
+    built.use_scenes(max_chunks=16, probes=4)
+    mapped.use_scenes(max_chunks=16, probes=4)
+    kwargs = dict(query=query, query_embedding=embedding, current_time_ms=299_000, limit=8)
+    assert [c.start_ms for c in mapped.search(**kwargs)] == [c.start_ms for c in built.search(**kwargs)]
+
+    remove_episode_artifact('ep-1')
+    assert load_episode_artifact('ep-1', tokenize=chunk_terms) is None
+
+
+def test_ivf_lists_round_trip_through_artifact(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), 'episode_index_dir', str(tmp_path))
+    built = EpisodeIndex(_chunks(400), tokenize=chunk_terms, lines=_lines(400))
+    built.use_ivf(lists=12, probes=3)
+    write_episode_artifact(built, 'ep-1')
+
+    mapped = load_episode_artifact('ep-1', tokenize=chunk_terms)
+    assert mapped is not None and mapped.ivf is not None
+    assert mapped.ivf.lists == 12
+    mapped.use_ivf(probes=3)
+    assert isinstance(mapped.ivf.rows, np.ndarray) and not mapped.ivf.rows.flags.writeable
+
+    query = 'harbor letter'
+    embedding = HashingEmbedder(dim=32).embed(query)
+    for current_time_ms in (10_000, 399_000):
+        kwargs = dict(query=query, query_embedding=embedding, current_time_ms=current_time_ms, limit=8)
+        assert [c.start_ms for c in mapped.search(**kwargs)] == [c.start_ms for c in built.search(**kwargs)]
+
+
+def test_index_miss_publishes_artifact_that_other_workers_map(db_session, ids, tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), 'episode_index_dir', str(tmp_path))
+    episode_id = ids['episode_id']
+    drop_episode_index(episode_id)
+
+    first = load_episode_index(db_session, episode_id)
+    assert isinstance(first.chunks, ArtifactChunks)
+    assert artifact_path(episode_id).is_file()
+
+    # A second worker starts with an empty registry and must not rebuild.
+    drop_episode_index(episode_id)
+    monkeypatch.setattr(retrieval, '_build_episode_index', lambda *_: pytest.fail('index rebuilt'))
+    second = load_episode_index(db_session, episode_id)
+    assert isinstance(second.chunks, ArtifactChunks)
+    assert [c.start_ms for c in second.chunks] == [c.start_ms for c in first.chunks]
+    drop_episode_index(episode_id)
@@ -15,3 +15,58 @@
     for evidence in payload['evidences']:
         for line in evidence['lines']:
             assert line['start_ms'] <= 1500
+
+
+def test_time_guard_holds_for_cached_retrieval_in_same_bucket(client, ids):
+    def ask(current_time_ms):
+        response = client.post(
+            '/api/qa',
+            json={
+                'title_id': ids['title_id'],
+                'episode_id': ids['episode_id'],
+                'current_time_ms': current_time_ms,
+                'question': 'what clue did B give?',
+            },
+        )
+        assert response.status_code == 200
+        return [line['start_ms'] for evidence in response.json()['evidences'] for line in evidence['lines']]
+
+    assert 2000 in ask(2500)
+    assert all(start_ms <= 1500 for start_ms in ask(1500))
+
+
+def test_cached_retrieval_builds_evidence_without_subtitle_queries(client, ids, db_session):
+    from sqlalchemy import event
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    def ask(question):
+        response = client.post(
+            '/api/qa',
+            json={
+                'title_id': ids['title_id'],
+                'episode_id': ids['episode_id'],
+                'current_time_ms': 2500,
+                'question': question,
+            },
+        )
+        assert response.status_code == 200
+        return response.json()['evidences']
+
+    first = ask('what clue did A say first?')
+    engine = db_session.get_bind()
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        # Same question after intent normalization: same cache entry.
+        second = ask('  What clue did A say   first ')
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    assert [line['subtitle_line_id'] for e in second for line in e['lines']] == [
+        line['subtitle_line_id'] for e in first for line in e['lines']
+    ]
+    assert second and all(line['text'] for e in second for line in e['lines'])
+    assert not [s for s in statements if 'subtitle_lines' in s or 'subtitle_chunks' in s]
@@ -0,0 +1,81 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import json
+
+from app.db.models import Episode, SubtitleChunk, SubtitleLine
+from app.rag.embeddings import get_embedder
+from app.rag.episode_index import get_title_index
+from app.rag.retrieval import load_title_index, resolve_lines_from_title_chunks, retrieve_title_chunks
+from app.services import cache_service
+
+
+def _add_episode(session, title_id, number, texts):
+    now = datetime.now(timezone.utc)
+    episode = Episode(id=str(uuid4()), title_id=title_id, season=1, episode_number=number, created_at=now)
+    session.add(episode)
+    for idx, text in enumerate(texts):
+        start_ms = (idx + 1) * 10_000
+        line = SubtitleLine(
+            id=str(uuid4()), episode_id=episode.id, start_ms=start_ms, end_ms=start_ms + 500, text=text, created_at=now
+        )
+        session.add(line)
+        session.add(
+            SubtitleChunk(
+                id=str(uuid4()),
+                episode_id=episode.id,
+                start_ms=start_ms,
+                end_ms=start_ms + 500,
+                text_concat=text,
+                subtitle_line_ids=[line.id],
+                embedding=get_embedder().embed(text),
+                created_at=now,
+            )
+        )
+    return episode.id
+
+
+def test_title_retrieval_spans_previous_episodes_without_spoilers(db_session, ids):
+    title_id = ids['title_id']
+    ep2 = _add_episode(db_session, title_id, 2, ['the stranger with the red scarf arrives'])
+    ep3 = _add_episode(db_session, title_id, 3, ['quiet morning', 'the stranger with the red scarf returns'])
+    ep4 = _add_episode(db_session, title_id, 4, ['the stranger with the red scarf is the killer'])
+    db_session.commit()
+
+    chunks = retrieve_title_chunks(
+        db_session,
+        title_id=title_id,
+        episode_id=ep3,
+        current_time_ms=15_000,
+        query='stranger red scarf',
+    )
+    assert {chunk.episode_id for chunk in chunks} <= {ids['episode_id'], ep2, ep3}
+    assert chunks[0].episode_id == ep2
+    assert all(chunk.start_ms <= 15_000 for chunk in chunks if chunk.episode_id == ep3)
+
+    lines = resolve_lines_from_title_chunks(
+        db_session,
+        title_id=title_id,
+        episode_id=ep3,
+        current_time_ms=15_000,
+        chunks=chunks,
+    )
+    assert lines[0].text == 'the stranger with the red scarf arrives'
+    assert all(line.episode_id != ep4 for line in lines)
+
+
+def test_ingesting_a_new_episode_drops_the_title_index(db_session, ids):
+    title_id = ids['title_id']
+    load_title_index(db_session, title_id)
+    ep2 = _add_episode(db_session, title_id, 2, ['the stranger with the red scarf arrives'])
+    db_session.commit()
+
+    # The index predates ep2, so it cannot be found by membership.
+    cache_service.warmup_episodes_cache(db_session, [ep2])
+    assert get_title_index(title_id) is None
+
+    # Other workers drop it from the title id in the invalidation message.
+    load_title_index(db_session, title_id)
+    message = json.dumps({'episode_id': str(uuid4()), 'title_id': title_id, 'sender': 'another-worker'})
+    cache_service.apply_invalidation_message(message)
+    assert get_title_index(title_id) is None
@@ -0,0 +1,52 @@
+from sqlalchemy import select
+
+from app.db.models import SubtitleChunk, SubtitleLine
+from app.rag.tokenizer import KO_SUFFIXES, chunk_terms, line_token_set, normalize_token, query_tokens, words
+from app.services.chunk_service import rebuild_chunks_for_episodes
+from app.services.qa_service import _filter_relevant_lines
+
+
+def test_rebuild_stores_line_and_chunk_tokens(db_session, ids):
+    episode_id = ids['episode_id']
+    rebuild_chunks_for_episodes(db_session, [episode_id])
+    db_session.commit()
+
+    lines = db_session.scalars(select(SubtitleLine).where(SubtitleLine.episode_id == episode_id)).all()
+    assert {line.text: line.tokens for line in lines} == {
+        'A says first clue': ['clue', 'first', 'says'],
+        'B gives later clue': ['clue', 'gives', 'later'],
+    }
+    chunk = db_session.scalar(select(SubtitleChunk).where(SubtitleChunk.episode_id == episode_id))
+    assert chunk.tokens == chunk_terms(chunk.text_concat)
+
+
+def test_line_scoring_uses_stored_tokens():
+    stored = SubtitleLine(text='unrelated words', start_ms=0, end_ms=1, tokens=['harbor'])
+    legacy = SubtitleLine(text='the harbor at night', start_ms=5, end_ms=6, tokens=None)
+
+    assert line_token_set(stored) == {'harbor'}
+    assert line_token_set(legacy) == {'at', 'harbor', 'night'}
+    assert _filter_relevant_lines([stored, legacy], 'harbor?') == [stored, legacy]
+
+
+def test_suffix_trie_matches_first_listed_suffix():
+    def reference(token):
+        t = token.lower().strip()
+        if len(t) < 2:
+            return t
+        for suffix in KO_SUFFIXES:
+            if t.endswith(suffix) and len(t) - len(suffix) >= 2:
+                return t[: -len(suffix)]
+        return t
+
+    samples = ['바다으로부터', '친구에게서', '학교까지는', '우리까지도', '그녀이라도', '형처럼', '형에게', '이가', '나야', '민준이가', 'Harbor']
+    samples += [stem + suffix for stem in ('가', '가나', '가나다') for suffix in KO_SUFFIXES]
+    assert [normalize_token(token) for token in samples] == [reference(token) for token in samples]
+
+
+def test_question_tokens_are_shared_across_call_sites():
+    question = 'Why did 민준이가 hide the letter?'
+    assert words(question.lower()) == ('why', 'did', '민준이가', 'hide', 'the', 'letter')
+    assert chunk_terms(question) == ['why', 'did', '민준이가', 'hide', 'letter']
+    assert query_tokens(question) is query_tokens(question)
+    assert query_tokens(question) == {'why', 'did', '민준이', 'hide', 'letter'}
@@ -0,0 +1,44 @@
+import time
+
+from app.core.config import get_settings
+from app.db.models import Episode
+from app.rag.episode_index import drop_episode_index, get_episode_index
+from app.services import warmup_service
+
+
+def _wait_for_index(episode_id: str, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        index = get_episode_index(episode_id)
+        if index is not None:
+            return index
+        time.sleep(0.01)
+    return None
+
+
+def test_viewer_near_the_end_warms_the_next_episode(db_session, ids, monkeypatch):
+    monkeypatch.setattr(get_settings(), 'episode_index_dir', '')
+    monkeypatch.setattr(get_settings(), 'predictive_warmup_lead_ms', 3_000)
+    warmup_service._episode_positions().clear()
+    warmup_service._next_episodes().clear()
+    warmup_service._recently_warmed().clear()
+    bind = db_session.get_bind()
+    title_id, episode_id = ids['title_id'], ids['episode_id']
+    db_session.add(Episode(id='ep-2', title_id=title_id, season=1, episode_number=2, name='Ep2', duration_ms=10_000))
+    db_session.commit()
+    drop_episode_index('ep-2')
+
+    assert warmup_service.note_viewer_position(bind, episode_id, 1_000) is None
+    assert warmup_service.note_viewer_position(bind, episode_id, 8_000) == 'ep-2'
+    assert warmup_service.note_viewer_position(bind, episode_id, 9_000) is None  # already scheduled
+    assert _wait_for_index('ep-2') is not None
+    drop_episode_index('ep-2')
+
+    # The last episode has no successor yet; one ingested later is found without waiting for a TTL.
+    scheduled = []
+    monkeypatch.setattr(warmup_service, '_enqueue_warmup', lambda _engine, next_id: scheduled.append(next_id))
+    assert warmup_service.note_viewer_position(bind, 'ep-2', 9_500) is None
+    db_session.add(Episode(id='ep-3', title_id=title_id, season=2, episode_number=1, name='Ep3', duration_ms=10_000))
+    db_session.commit()
+    assert warmup_service.note_viewer_position(bind, 'ep-2', 9_600) == 'ep-3'
+    assert scheduled == ['ep-3']